@@ -12,19 +12,39 @@ Fecha: 2023-09-13
 
 import os
 import logging
-from flask import Flask, jsonify, request, abort
-from flasgger import Swagger
+from flask import Flask, jsonify, request, abort, g
 from flask_cors import CORS
 from commons.utils import interpretar_estado_plc
+from commons.metrics import REGISTRY, CONTENT_TYPE, HTTP_REQUEST_SECONDS
+from commons import tracing
 from models.plc import PLC  # Importación explícita del PLC real [[2]]
-from controllers.carousel_controller import CarouselController
+from controllers.carousel_controller import CarouselController, MOVE_BUSY, MOVE_NOT_READY
+from controllers.rotation_planner import REJECTED
 import time
 from plc_cache import plc_status_cache, plc_access_lock, plc_interprocess_lock
-from commons.error_codes import PLC_CONN_ERROR, PLC_BUSY, BAD_COMMAND, BAD_REQUEST, INTERNAL_ERROR
+from commons.error_codes import (PLC_CONN_ERROR, PLC_BUSY, PLC_UNAVAILABLE, BAD_COMMAND, BAD_REQUEST,
+                                 FEATURE_DISABLED, INTERNAL_ERROR)
+from models.circuit_breaker import CircuitOpenError
 from filelock import Timeout
+from datetime import datetime
 
+# ID con el que el modo single-PLC registra sus operaciones
+SINGLE_PLC_MACHINE_ID = "single_plc"
+OPERATIONS_MAX_LIMIT = 1000
 
-def create_app(plc=None, plc_manager=None):
+
+def _parse_time_param(value):
+    """Segundos epoch desde '1735689600' o '2025-01-01T00:00:00'; None si vacío."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def create_app(plc=None, plc_manager=None, enable_swagger=True, operations_journal=None,
+               status_history=None, movement_analytics=None, alarm_detector=None):
     """
     Crea la instancia de la aplicación Flask.
     Incluye configuración de CORS segura, logging y manejo global de errores.
@@ -32,6 +52,15 @@ def create_app(plc=None, plc_manager=None):
     Args:
         plc: Instancia del PLC (real o simulador) para modo single-PLC
         plc_manager: Instancia del PLCManager para modo multi-PLC
+        enable_swagger: Monta la documentación Swagger. flasgger solo se importa
+            si está habilitada.
+        operations_journal: OperationsJournal consultado por /v1/operations. En
+            modo multi-PLC se usa por defecto el del PLCManager.
+        status_history: StatusHistory consultado por
+            /v1/machines/<id>/history (modo multi-PLC)
+        movement_analytics: MovementAnalytics consultado por /v1/analytics y
+            /v1/machines/<id>/analytics (modo multi-PLC)
+        alarm_detector: AlarmDetector consultado por /v1/alarms (modo multi-PLC)
 
     Note:
         Debe proporcionarse exactamente uno de los dos parámetros
@@ -53,12 +82,14 @@ def create_app(plc=None, plc_manager=None):
     # Documentación: Para producción, configure API_ALLOWED_ORIGINS solo con los dominios/autorizados.
 
     # Configuración de Swagger [[5]]
-    app.config['SWAGGER'] = {
-        'title': 'API de Control de Carrusel',
-        'uiversion': 3,
-        'description': 'API para comunicación con PLC industrial (Modo real/simulador)'
-    }
-    Swagger(app)
+    if enable_swagger:
+        from flasgger import Swagger
+        app.config['SWAGGER'] = {
+            'title': 'API de Control de Carrusel',
+            'uiversion': 3,
+            'description': 'API para comunicación con PLC industrial (Modo real/simulador)'
+        }
+        Swagger(app)
 
     # Validar parámetros
     if not plc and not plc_manager:
@@ -70,8 +101,12 @@ def create_app(plc=None, plc_manager=None):
     # Determinar modo de operación
     is_multi_plc = plc_manager is not None
 
+    if operations_journal is None and plc_manager is not None:
+        operations_journal = plc_manager.journal
+
     # Inicializar controlador para modo single-PLC
-    carousel_controller = CarouselController(plc) if plc else None
+    carousel_controller = CarouselController(
+        plc, machine_id=SINGLE_PLC_MACHINE_ID, journal=operations_journal) if plc else None
 
     # Logging de errores
     logger = logging.getLogger("api")
@@ -91,6 +126,51 @@ def create_app(plc=None, plc_manager=None):
     def handle_large_request(e):
         return jsonify({'error': 'Payload demasiado grande'}), 413
 
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        if tracing.is_enabled():
+            route = request.url_rule.rule if request.url_rule else "<unmatched>"
+            tracing.start_trace(f"{request.method} {route}", path=request.path,
+                                client=request.remote_addr)
+
+    @app.after_request
+    def observe_request_latency(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            # Se etiqueta por plantilla de ruta para no crear una serie por máquina
+            route = request.url_rule.rule if request.url_rule else "<unmatched>"
+            HTTP_REQUEST_SECONDS.labels(request.method, route, response.status_code).observe(
+                time.perf_counter() - started)
+        trace = tracing.current_trace()
+        if trace is not None:
+            trace.attributes["status"] = response.status_code
+            tracing.finish_trace()
+            response.headers["Server-Timing"] = trace.server_timing()
+        return response
+
+    @app.teardown_request
+    def discard_unfinished_trace(error=None):
+        # Una excepción no controlada se salta after_request: no dejar la traza colgada
+        if tracing.current_trace() is not None:
+            tracing.finish_trace()
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """
+        Métricas en formato de texto de Prometheus.
+        ---
+        tags:
+          - Salud
+        produces:
+          - text/plain
+        responses:
+          200:
+            description: Contadores, gauges e histogramas en memoria (no consulta los PLCs).
+        """
+        return app.response_class(REGISTRY.render(), mimetype=None,
+                                  content_type=CONTENT_TYPE)
+
     @app.route('/v1/status', methods=['GET'])
     def get_status():
         """
@@ -119,9 +199,9 @@ def create_app(plc=None, plc_manager=None):
             description: Error de comunicación.
         """
         try:
-            logger.info(f"[STATUS] Petición desde {request.remote_addr}")
+            logger.info("[STATUS] Petición desde %s", request.remote_addr)
             result = carousel_controller.get_current_status()
-            logger.info(f"[STATUS] Respuesta: {result}")
+            logger.info("[STATUS] Respuesta: %s", result)
             return jsonify({
                 'success': True,
                 'data': result,
@@ -199,7 +279,8 @@ def create_app(plc=None, plc_manager=None):
         acquired_interprocess = False
         acquired_global = False
         try:
-            acquired_interprocess = plc_interprocess_lock.acquire(timeout=2)
+            with tracing.span("lock.interprocess"):
+                acquired_interprocess = plc_interprocess_lock.acquire(timeout=2)
             if not acquired_interprocess:
                 logger.warning(
                     f"[COMMAND] PLC ocupado por otro proceso (interproceso) desde {request.remote_addr}")
@@ -209,7 +290,8 @@ def create_app(plc=None, plc_manager=None):
                     'error': 'PLC ocupado por otro proceso, intente de nuevo en unos segundos',
                     'code': PLC_BUSY
                 }), 409
-            acquired_global = plc_access_lock.acquire(timeout=2)
+            with tracing.span("lock.global"):
+                acquired_global = plc_access_lock.acquire(timeout=2)
             if not acquired_global:
                 logger.warning(
                     f"[COMMAND] PLC ocupado (lock global) desde {request.remote_addr}")
@@ -221,7 +303,7 @@ def create_app(plc=None, plc_manager=None):
                 }), 409
             # Ejecutar el comando usando el controlador
             result = carousel_controller.send_command(command, argument)
-            logger.info(f"[COMMAND] Respuesta: {result}")
+            logger.info("[COMMAND] Respuesta: %s", result)
             if isinstance(result, dict) and result.get('error') == 'PLC en movimiento':
                 return jsonify({
                     'success': False,
@@ -263,32 +345,135 @@ def create_app(plc=None, plc_manager=None):
     def health():
         """
         Endpoint de salud para monitoreo y orquestadores.
+
+        En modo multi-PLC no contacta los PLCs: deriva la salud de la última
+        respuesta correcta de cada máquina y de su circuit breaker. Con
+        `?deep=1` consulta cada PLC (como máximo una vez por intervalo).
         ---
         tags:
           - Salud
+        parameters:
+          - name: deep
+            in: query
+            type: boolean
+            required: false
+            description: Consulta real a cada PLC, limitada en frecuencia.
         responses:
           200:
             description: API operativa.
         """
         if is_multi_plc:
-            health_data = plc_manager.health_check()
+            deep = request.args.get('deep', '').lower() in ('1', 'true', 'yes')
+            health_data = plc_manager.health_check(deep=deep)
             return jsonify({
                 'status': 'ok',
                 'mode': 'multi-plc',
                 'health': health_data
             }), 200
         else:
+            latency = getattr(plc, 'latency', None)
             return jsonify({
                 'status': 'ok',
-                'mode': 'single-plc'
+                'mode': 'single-plc',
+                'latency': latency.snapshot() if latency is not None else None
             }), 200
 
+    @app.route('/v1/operations', methods=['GET'])
+    def get_operations():
+        """
+        Consulta la bitácora de operaciones (más recientes primero).
+        ---
+        tags:
+          - Salud
+        parameters:
+          - name: machine
+            in: query
+            type: string
+            required: false
+            description: ID de la máquina (single_plc en modo single-PLC)
+          - name: client
+            in: query
+            type: string
+            required: false
+            description: IP o proceso que originó la operación
+          - name: command
+            in: query
+            type: integer
+            required: false
+          - name: since
+            in: query
+            type: string
+            required: false
+            description: Desde (segundos epoch o ISO 8601)
+          - name: until
+            in: query
+            type: string
+            required: false
+            description: Hasta, exclusivo (segundos epoch o ISO 8601)
+          - name: limit
+            in: query
+            type: integer
+            required: false
+            description: Máximo de operaciones (por defecto 100, máximo 1000)
+        responses:
+          200:
+            description: Operaciones que cumplen los filtros.
+          400:
+            description: Parámetros inválidos.
+          503:
+            description: Bitácora de operaciones no configurada.
+        """
+        if operations_journal is None:
+            return jsonify({
+                'success': False,
+                'data': None,
+                'error': 'Bitácora de operaciones no configurada',
+                'code': FEATURE_DISABLED
+            }), 503
+        try:
+            command = request.args.get('command')
+            limit = int(request.args.get('limit', 100))
+            if not 1 <= limit <= OPERATIONS_MAX_LIMIT:
+                raise ValueError(f"limit debe estar entre 1 y {OPERATIONS_MAX_LIMIT}")
+            filters = {
+                'machine': request.args.get('machine') or None,
+                'client': request.args.get('client') or None,
+                'command': int(command) if command else None,
+                'since': _parse_time_param(request.args.get('since')),
+                'until': _parse_time_param(request.args.get('until')),
+                'limit': limit,
+            }
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'data': None,
+                'error': f'Parámetros inválidos: {str(e)}',
+                'code': BAD_REQUEST
+            }), 400
+        operations = operations_journal.query(**filters)
+        return jsonify({
+            'success': True,
+            'data': {'operations': operations, 'count': len(operations)},
+            'error': None,
+            'code': None
+        }), 200
+
     # ================================
     # ENDPOINTS MULTI-PLC
     # ================================
 
     if is_multi_plc:
 
+        def circuit_open_response(error):
+            """Respuesta 503 inmediata para máquinas con el circuito abierto."""
+            logger.warning(f"[CIRCUIT] {str(error)}")
+            return jsonify({
+                'success': False,
+                'data': None,
+                'error': str(error),
+                'code': PLC_UNAVAILABLE
+            }), 503
+
         @app.route('/v1/machines', methods=['GET'])
         def get_machines():
             """
@@ -329,11 +514,18 @@ def create_app(plc=None, plc_manager=None):
                               status:
                                 type: string
                                 example: "available"
+                                description: available, recovering o unavailable según el circuit breaker
+                              circuit:
+                                type: object
+                                description: Estado del circuit breaker (state, consecutive_failures, retry_in, last_error)
+                              latency:
+                                type: object
+                                description: Latencia observada (samples, srtt_ms, rttvar_ms, timeout_ms, p50_ms, p99_ms, timeouts)
             """
             try:
-                logger.info(f"[MACHINES] Petición desde {request.remote_addr}")
+                logger.info("[MACHINES] Petición desde %s", request.remote_addr)
                 machines = plc_manager.get_available_machines()
-                logger.info(f"[MACHINES] Respuesta: {len(machines)} máquinas")
+                logger.info("[MACHINES] Respuesta: %d máquinas", len(machines))
                 return jsonify({
                     'success': True,
                     'data': machines,
@@ -350,6 +542,195 @@ def create_app(plc=None, plc_manager=None):
                     'code': INTERNAL_ERROR
                 }), 500
 
+        @app.route('/v1/machines/<machine_id>/history', methods=['GET'])
+        def get_machine_history(machine_id):
+            """
+            Historial de transiciones de estado de una máquina.
+            ---
+            tags:
+              - Multi-PLC
+            parameters:
+              - in: path
+                name: machine_id
+                type: string
+                required: true
+              - name: from
+                in: query
+                type: string
+                required: false
+                description: Desde (segundos epoch o ISO 8601). Por defecto, una hora antes de 'to'
+              - name: to
+                in: query
+                type: string
+                required: false
+                description: Hasta, exclusivo (segundos epoch o ISO 8601). Por defecto, ahora
+              - name: resolution
+                in: query
+                type: number
+                required: false
+                description: Segundos por intervalo; 0 devuelve cada transición
+            responses:
+              200:
+                description: Estado vigente en 'from' (initial) y transiciones o intervalos (points).
+              400:
+                description: Parámetros inválidos.
+              404:
+                description: Máquina no encontrada.
+              503:
+                description: Historial no configurado.
+            """
+            if status_history is None:
+                return jsonify({
+                    'success': False,
+                    'data': None,
+                    'error': 'Historial de estados no configurado',
+                    'code': FEATURE_DISABLED
+                }), 503
+            if machine_id not in plc_manager.controllers:
+                return jsonify({
+                    'success': False,
+                    'data': None,
+                    'error': f"Máquina '{machine_id}' no encontrada",
+                    'code': BAD_REQUEST
+                }), 404
+            try:
+                end = _parse_time_param(request.args.get('to')) or time.time()
+                start = _parse_time_param(request.args.get('from')) or end - 3600
+                resolution = float(request.args.get('resolution') or 0)
+                history = status_history.query(machine_id, start, end, resolution)
+            except ValueError as e:
+                return jsonify({
+                    'success': False,
+                    'data': None,
+                    'error': f'Parámetros inválidos: {str(e)}',
+                    'code': BAD_REQUEST
+                }), 400
+            return jsonify({
+                'success': True,
+                'data': {'machine_id': machine_id, 'from': start, 'to': end, **history},
+                'error': None,
+                'code': None
+            }), 200
+
+        def analytics_unavailable_response():
+            return jsonify({
+                'success': False,
+                'data': None,
+                'error': 'Analítica de movimientos no configurada',
+                'code': FEATURE_DISABLED
+            }), 503
+
+        @app.route('/v1/analytics', methods=['GET'])
+        def get_analytics():
+            """
+            Indicadores de operación de todas las máquinas y de la flota.
+            ---
+            tags:
+              - Multi-PLC
+            responses:
+              200:
+                description: Por máquina (movimientos, cangilones recorridos, duración de viajes, utilización, movimientos por hora) y totales de la flota.
+              503:
+                description: Analítica no configurada.
+            """
+            if movement_analytics is None:
+                return analytics_unavailable_response()
+            return jsonify({
+                'success': True,
+                'data': movement_analytics.summary(time.time()),
+                'error': None,
+                'code': None
+            }), 200
+
+        @app.route('/v1/machines/<machine_id>/analytics', methods=['GET'])
+        def get_machine_analytics(machine_id):
+            """
+            Indicadores de operación de una máquina.
+            ---
+            tags:
+              - Multi-PLC
+            parameters:
+              - in: path
+                name: machine_id
+                type: string
+                required: true
+            responses:
+              200:
+                description: Indicadores desde el arranque y en la ventana deslizante (data es null si aún no hay lecturas).
+              404:
+                description: Máquina no encontrada.
+              503:
+                description: Analítica no configurada.
+            """
+            if movement_analytics is None:
+                return analytics_unavailable_response()
+            if machine_id not in plc_manager.controllers:
+                return jsonify({
+                    'success': False,
+                    'data': None,
+                    'error': f"Máquina '{machine_id}' no encontrada",
+                    'code': BAD_REQUEST
+                }), 404
+            return jsonify({
+                'success': True,
+                'data': movement_analytics.machine(machine_id, time.time()),
+                'error': None,
+                'code': None
+            }), 200
+
+        @app.route('/v1/alarms', methods=['GET'])
+        def get_alarms():
+            """
+            Alarmas activas por máquina y eventos recientes de entrada y salida.
+            ---
+            tags:
+              - Multi-PLC
+            parameters:
+              - name: machine
+                in: query
+                type: string
+                required: false
+                description: ID de la máquina
+              - name: since_id
+                in: query
+                type: integer
+                required: false
+                description: Solo eventos con id mayor (para sondeo incremental)
+            responses:
+              200:
+                description: "{active: {máquina: {alarma: {since, raw_status, position}}}, events: [...]}"
+              400:
+                description: Parámetros inválidos.
+              503:
+                description: Detector de alarmas no configurado.
+            """
+            if alarm_detector is None:
+                return jsonify({
+                    'success': False,
+                    'data': None,
+                    'error': 'Detector de alarmas no configurado',
+                    'code': FEATURE_DISABLED
+                }), 503
+            machine = request.args.get('machine') or None
+            try:
+                since_id = int(request.args.get('since_id') or 0)
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'data': None,
+                    'error': "El parámetro 'since_id' debe ser un entero",
+                    'code': BAD_REQUEST
+                }), 400
+            return jsonify({
+                'success': True,
+                'data': {
+                    'active': alarm_detector.active(machine),
+                    'events': alarm_detector.events(machine, since_id),
+                },
+                'error': None,
+                'code': None
+            }), 200
+
         @app.route('/v1/machines/<machine_id>/status', methods=['GET'])
         def get_machine_status(machine_id):
             """
@@ -372,14 +753,15 @@ def create_app(plc=None, plc_manager=None):
                 description: Máquina no encontrada.
               500:
                 description: Error de comunicación.
+              503:
+                description: Máquina no disponible (circuito abierto).
             """
             try:
-                logger.info(
-                    f"[MACHINE_STATUS] Petición para {machine_id} desde {request.remote_addr}")
+                logger.info("[MACHINE_STATUS] Petición para %s desde %s",
+                            machine_id, request.remote_addr)
                 result = plc_manager.get_machine_status(
                     machine_id, request.remote_addr)
-                logger.info(
-                    f"[MACHINE_STATUS] Respuesta para {machine_id}: {result}")
+                logger.info("[MACHINE_STATUS] Respuesta para %s: %s", machine_id, result)
                 return jsonify({
                     'success': True,
                     'data': result,
@@ -395,6 +777,8 @@ def create_app(plc=None, plc_manager=None):
                     'error': str(e),
                     'code': BAD_REQUEST
                 }), 404
+            except CircuitOpenError as e:
+                return circuit_open_response(e)
             except Exception as e:
                 logger.error(
                     f"[MACHINE_STATUS] Error para {machine_id} desde {request.remote_addr}: {str(e)}")
@@ -445,6 +829,8 @@ def create_app(plc=None, plc_manager=None):
                 description: Máquina ocupada.
               500:
                 description: Error interno.
+              503:
+                description: Máquina no disponible (circuito abierto).
             """
             if not request.is_json:
                 logger.warning(
@@ -482,12 +868,11 @@ def create_app(plc=None, plc_manager=None):
                 }), 400
 
             try:
-                logger.info(
-                    f"[MACHINE_COMMAND] Comando {command}({argument}) para {machine_id} desde {request.remote_addr}")
+                logger.info("[MACHINE_COMMAND] Comando %s(%s) para %s desde %s",
+                            command, argument, machine_id, request.remote_addr)
                 result = plc_manager.send_command_to_machine(
                     machine_id, command, argument, request.remote_addr)
-                logger.info(
-                    f"[MACHINE_COMMAND] Respuesta para {machine_id}: {result}")
+                logger.info("[MACHINE_COMMAND] Respuesta para %s: %s", machine_id, result)
                 return jsonify({
                     'success': True,
                     'data': result,
@@ -503,6 +888,8 @@ def create_app(plc=None, plc_manager=None):
                     'error': str(e),
                     'code': BAD_REQUEST
                 }), 404
+            except CircuitOpenError as e:
+                return circuit_open_response(e)
             except Exception as e:
                 logger.error(
                     f"[MACHINE_COMMAND] Error para {machine_id} desde {request.remote_addr}: {str(e)}")
@@ -537,16 +924,20 @@ def create_app(plc=None, plc_manager=None):
                     position:
                       type: integer
                       example: 5
-                      description: Posición objetivo (0-9)
+                      description: Posición objetivo (0 a bucket_count - 1 de la máquina)
             responses:
               200:
-                description: Movimiento iniciado correctamente.
+                description: Movimiento iniciado. data.plan incluye direction (ascendente/descendente), buckets y eta_s estimado con los segundos por cangilón medidos.
               400:
                 description: Parámetros inválidos.
               404:
                 description: Máquina no encontrada.
+              409:
+                description: Movimiento rechazado (PLC_BUSY si está en movimiento o no listo, BAD_COMMAND con fallas activas); data.plan.reasons lista los motivos.
               500:
                 description: Error interno.
+              503:
+                description: Máquina no disponible (circuito abierto).
             """
             if not request.is_json:
                 return jsonify({
@@ -559,21 +950,35 @@ def create_app(plc=None, plc_manager=None):
             data = request.get_json()
             position = data.get('position')
 
-            if not isinstance(position, int) or not (0 <= position <= 9):
+            # El rango depende de los cangilones de la máquina; si no existe,
+            # move_machine_to_position responde 404
+            planner = plc_manager.get_planner(machine_id)
+            last_position = planner.bucket_count - 1 if planner is not None else 255
+            if not isinstance(position, int) or not (0 <= position <= last_position):
                 return jsonify({
                     'success': False,
                     'data': None,
-                    'error': "El parámetro 'position' debe ser un entero entre 0 y 9",
+                    'error': f"El parámetro 'position' debe ser un entero entre 0 y {last_position}",
                     'code': BAD_COMMAND
                 }), 400
 
             try:
-                logger.info(
-                    f"[MACHINE_MOVE] Mover {machine_id} a posición {position} desde {request.remote_addr}")
+                logger.info("[MACHINE_MOVE] Mover %s a posición %s desde %s",
+                            machine_id, position, request.remote_addr)
                 result = plc_manager.move_machine_to_position(
                     machine_id, position, request.remote_addr)
-                logger.info(
-                    f"[MACHINE_MOVE] Respuesta para {machine_id}: {result}")
+                logger.info("[MACHINE_MOVE] Respuesta para %s: %s", machine_id, result)
+                plan = result.get('plan')
+                if plan is not None and plan['state'] == REJECTED:
+                    reasons = plan['reasons']
+                    busy = all(reason in (MOVE_BUSY, MOVE_NOT_READY) for reason in reasons)
+                    return jsonify({
+                        'success': False,
+                        'data': result,
+                        'error': f"Movimiento de {machine_id} a {position} rechazado: "
+                                 f"{', '.join(reasons)}",
+                        'code': PLC_BUSY if busy else BAD_COMMAND
+                    }), 409
                 return jsonify({
                     'success': True,
                     'data': result,
@@ -587,6 +992,8 @@ def create_app(plc=None, plc_manager=None):
                     'error': str(e),
                     'code': BAD_REQUEST
                 }), 404
+            except CircuitOpenError as e:
+                return circuit_open_response(e)
             except Exception as e:
                 logger.error(
                     f"[MACHINE_MOVE] Error para {machine_id} desde {request.remote_addr}: {str(e)}")
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks de las rutas calientes del backend.
+
+Proyecto: Sistema de Control de Carrusel Industrial
+Cliente: Industrias Pico S.A.S
+Desarrollo: IA Punto: Soluciones Tecnológicas
+
+Creado: 2025-07-28
+Última modificación: 2025-07-28
+
+Uso:
+    python benchmarks/bench_hot_paths.py [--only NOMBRE ...] [--save benchmarks/baseline.json]
+    python benchmarks/bench_hot_paths.py --compare benchmarks/baseline.json [--threshold 0.25]
+
+Cubre lo que se ejecuta en cada petición: el framing `struct` de
+`PLC.send_command`/`receive_response`, `interpretar_estado_plc`, la
+serialización JSON de un estado, las búsquedas de `PLCManager` y la adquisición
+de `plc_access_lock` y de un `FileLock`.
+
+Cada caso se mide con `timeit` en varias rondas intercaladas y se reporta el
+mínimo en nanosegundos por operación (el valor menos afectado por ruido del
+sistema).
+Junto a los casos se mide un bucle de calibración en Python puro; en modo
+--compare la línea base se escala por la razón entre calibraciones, de modo que
+una línea base tomada en otro equipo sigue siendo comparable. El modo --compare
+termina con código 1 si algún caso es más lento que la línea base en más del
+umbral indicado.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import timeit
+from typing import Callable, Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+# Los logs de PLCManager van a un directorio temporal y no a los del operador
+os.environ["LOCALAPPDATA"] = tempfile.mkdtemp(prefix="bench_hot_paths_")
+
+import struct  # noqa: E402
+
+from filelock import FileLock  # noqa: E402
+
+from commons.utils import interpretar_estado_plc  # noqa: E402
+from models.plc import PLC  # noqa: E402
+from models.plc_manager import PLCManager  # noqa: E402
+
+
+class _LoopbackSocket:
+    """Socket mínimo que acepta cualquier envío y responde siempre 2 bytes."""
+
+    def __init__(self, response: bytes = b'\x14\x03'):
+        self.response = response
+
+    def settimeout(self, timeout):
+        pass
+
+    def sendall(self, data):
+        pass
+
+    def recv(self, size):
+        return self.response
+
+    def close(self):
+        pass
+
+
+def _calibration():
+    total = 0
+    for i in range(100):
+        total += i
+    return total
+
+
+def build_cases(fleet_size: int = 100) -> Dict[str, Callable[[], object]]:
+    """
+    Construye los casos del benchmark.
+
+    Returns:
+        Diccionario nombre -> función sin argumentos a medir.
+    """
+    cases: Dict[str, Callable[[], object]] = {}
+
+    pack_command = struct.Struct('B').pack
+    cases["struct_pack_command"] = lambda: pack_command(1) + pack_command(5)
+    cases["struct_unpack_response"] = lambda: struct.unpack('BB', b'\x14\x03')
+
+    plc = PLC("127.0.0.1", 1)
+    plc.sock = _LoopbackSocket()
+
+    def plc_exchange():
+        plc.send_command(1, 5)
+        return plc.receive_response()
+    cases["plc_send_receive"] = plc_exchange
+
+    cases["interpretar_estado_plc"] = lambda: interpretar_estado_plc(0b00010100)
+
+    payload = {
+        "success": True,
+        "machine_id": "machine_1",
+        "data": {
+            "status": interpretar_estado_plc(0b00010100),
+            "position": 3,
+            "raw_status": 0b00010100
+        }
+    }
+    cases["json_status_payload"] = lambda: json.dumps(payload)
+
+    manager = PLCManager([], fleet={"count": fleet_size, "seed": 1})
+    # La última máquina es el peor caso de las búsquedas lineales en plc_configs
+    machine_id = list(manager.controllers)[-1]
+    cases["manager_lookup"] = lambda: (manager.get_machine_info(machine_id),
+                                       manager.get_breaker_state(machine_id))
+    cases["manager_get_status"] = lambda: manager.get_machine_status(machine_id)
+
+    lock = threading.Lock()
+
+    def thread_lock():
+        if lock.acquire(timeout=2):
+            lock.release()
+    cases["plc_access_lock_acquire"] = thread_lock
+
+    file_lock = FileLock(os.path.join(os.environ["LOCALAPPDATA"], "plc_access.lock"))
+
+    def file_lock_acquire():
+        with file_lock.acquire(timeout=2):
+            pass
+    cases["filelock_acquire"] = file_lock_acquire
+
+    cases["_resources"] = (plc, manager)
+    return cases
+
+
+def _calibrate_number(timer: timeit.Timer, min_time: float) -> int:
+    """Iteraciones necesarias para que una medición dure al menos min_time."""
+    number, elapsed = timer.autorange()
+    # autorange llega a ~0.2 s; se ajusta a min_time por medición
+    return max(1, int(number * min_time / max(elapsed, 1e-9)))
+
+
+def run(names: List[str] = None, repeat: int = 9, min_time: float = 0.05,
+        fleet_size: int = 100) -> Dict[str, object]:
+    """
+    Ejecuta los casos seleccionados.
+
+    Las repeticiones se intercalan por rondas (cada ronda mide todos los casos
+    una vez) para que una interferencia pasajera del sistema no penalice siempre
+    al mismo caso; de cada caso se conserva el mínimo.
+
+    Returns:
+        {"calibration_ns": float, "results": {nombre: ns_por_op}}
+    """
+    cases = build_cases(fleet_size)
+    plc, manager = cases.pop("_resources")
+    try:
+        selected = names or list(cases)
+        unknown = set(selected) - set(cases)
+        if unknown:
+            raise ValueError(f"Casos desconocidos: {', '.join(sorted(unknown))}")
+        functions = dict((name, cases[name]) for name in selected)
+        functions["_calibration"] = _calibration
+        timers = {name: timeit.Timer(func) for name, func in functions.items()}
+        numbers = {name: _calibrate_number(timer, min_time)
+                   for name, timer in timers.items()}
+        best = {name: float("inf") for name in timers}
+        for _ in range(repeat):
+            for name, timer in timers.items():
+                elapsed = timer.timeit(numbers[name]) / numbers[name]
+                best[name] = min(best[name], elapsed)
+    finally:
+        plc.sock = None
+        manager.close_all_connections()
+    calibration = round(best.pop("_calibration") * 1e9, 1)
+    return {"calibration_ns": calibration,
+            "results": {name: round(value * 1e9, 1) for name, value in best.items()}}
+
+
+def compare(current: Dict[str, object], baseline: Dict[str, object],
+            threshold: float) -> List[Dict[str, object]]:
+    """
+    Compara contra una línea base normalizando por la calibración.
+
+    Returns:
+        Lista por caso con baseline, actual, ratio y si es regresión.
+    """
+    scale = 1.0
+    if baseline.get("calibration_ns") and current.get("calibration_ns"):
+        scale = current["calibration_ns"] / baseline["calibration_ns"]
+    report = []
+    for name, value in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            report.append({"case": name, "current_ns": value, "baseline_ns": None,
+                           "ratio": None, "regression": False})
+            continue
+        expected = reference * scale
+        ratio = value / expected if expected else float("inf")
+        report.append({"case": name, "current_ns": value,
+                       "baseline_ns": round(expected, 1), "ratio": round(ratio, 3),
+                       "regression": ratio > 1 + threshold})
+    return report
+
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de rutas calientes")
+    parser.add_argument("--only", nargs="+", metavar="NOMBRE",
+                        help="Ejecuta solo estos casos")
+    parser.add_argument("--repeat", type=int, default=9,
+                        help="Rondas de medición; se toma el mínimo (default: 9)")
+    parser.add_argument("--min-time", type=float, default=0.05,
+                        help="Segundos por medición de cada caso (default: 0.05)")
+    parser.add_argument("--save", metavar="PATH",
+                        help="Guarda los resultados como nueva línea base")
+    parser.add_argument("--compare", metavar="PATH",
+                        help="Compara contra una línea base y falla si hay regresiones")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Regresión tolerada sobre la línea base (default: 0.25 = 25%%)")
+    args = parser.parse_args()
+
+    current = run(args.only, repeat=args.repeat, min_time=args.min_time)
+    current["python"] = sys.version.split()[0]
+    current["host"] = socket.gethostname()
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+
+    if not args.compare:
+        print(json.dumps(current, indent=2, ensure_ascii=False))
+        sys.exit(0)
+
+    with open(args.compare, encoding="utf-8") as f:
+        baseline = json.load(f)
+    report = compare(current, baseline, args.threshold)
+    regressions = [entry["case"] for entry in report if entry["regression"]]
+    print(json.dumps({"threshold": args.threshold, "cases": report,
+                      "regressions": regressions}, indent=2, ensure_ascii=False))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
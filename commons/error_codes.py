@@ -6,14 +6,18 @@ Cada código tiene un identificador, descripción y uso recomendado.
 
 PLC_CONN_ERROR = "PLC_CONN_ERROR"
 PLC_BUSY = "PLC_BUSY"
+PLC_UNAVAILABLE = "PLC_UNAVAILABLE"
 BAD_COMMAND = "BAD_COMMAND"
+FEATURE_DISABLED = "FEATURE_DISABLED"
 BAD_REQUEST = "BAD_REQUEST"
 INTERNAL_ERROR = "INTERNAL_ERROR"
 
 ERROR_CODES = {
     PLC_CONN_ERROR: "Error de comunicación o conexión con el PLC.",
     PLC_BUSY: "El PLC está ocupado procesando otra solicitud.",
+    PLC_UNAVAILABLE: "El PLC se considera caído (circuito abierto); reintente más tarde.",
     BAD_COMMAND: "Comando o argumento inválido.",
+    FEATURE_DISABLED: "La función está desactivada en la configuración; reintentar no sirve.",
     BAD_REQUEST: "Solicitud malformada o no permitida.",
     INTERNAL_ERROR: "Error interno inesperado en el sistema."
 }
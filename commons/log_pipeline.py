@@ -0,0 +1,126 @@
+"""
+Pipeline de logging asíncrono: los hilos de petición solo encolan registros.
+
+`async_handler()` envuelve uno o más handlers de archivo/consola en un
+`QueueHandler` cuyo `QueueListener` escribe desde un hilo propio, de modo que la
+rotación y la escritura en disco dejan de sumarse a la latencia de las
+operaciones con el PLC. El mensaje `%` sí se resuelve en el hilo que llama
+(como hace `QueueHandler`): los argumentos suelen ser objetos vivos, como
+diccionarios de estado, que pueden cambiar antes de escribirse. La cola está acotada; si se llena (disco bloqueado), los registros se descartan
+y se cuentan en lugar de frenar al llamador.
+
+`SampledLogFilter` reduce los logs de estado de alta frecuencia (consultas del
+monitor cada segundo por máquina): deja pasar uno de cada N registros marcados
+con `extra={'sample_key': ...}` por clave, y nunca filtra advertencias ni errores.
+
+Autor: IA Punto: Soluciones Tecnológicas
+Proyecto para: INDUSTRIAS PICO S.A.S
+Fecha de creación: 2025-07-28
+"""
+
+import atexit
+import copy
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Tuple
+
+DEFAULT_QUEUE_SIZE = 10_000
+
+_listeners: List[QueueListener] = []
+_listeners_lock = threading.Lock()
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler que descarta registros si la cola está llena en lugar de bloquear.
+    """
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Copia del registro con el mensaje ya resuelto.
+
+        Se fusionan los args y la traza de excepción en el mensaje, y se
+        eliminan args, exc_info y exc_text. Así la línea refleja el estado en el
+        momento del evento y la cola no retiene objetos ni frames de la petición.
+        """
+        msg = self.format(record)
+        record = copy.copy(record)
+        record.message = msg
+        record.msg = msg
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def async_handler(*handlers: logging.Handler,
+                  queue_size: int = DEFAULT_QUEUE_SIZE) -> NonBlockingQueueHandler:
+    """
+    Envuelve handlers bloqueantes en una cola atendida por un hilo propio.
+
+    Args:
+        handlers: Handlers finales (con su formatter ya configurado)
+        queue_size: Registros máximos en espera antes de descartar
+
+    Returns:
+        El QueueHandler a añadir al logger. El listener se detiene (vaciando la
+        cola) al salir del proceso o con stop_all().
+    """
+    log_queue: "queue.Queue" = queue.Queue(queue_size)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    with _listeners_lock:
+        _listeners.append(listener)
+    return NonBlockingQueueHandler(log_queue)
+
+
+def stop_all():
+    """Vacía las colas y detiene todos los listeners."""
+    with _listeners_lock:
+        listeners = list(_listeners)
+        _listeners.clear()
+    for listener in listeners:
+        try:
+            listener.stop()
+        except Exception:
+            pass
+
+
+atexit.register(stop_all)
+
+
+class SampledLogFilter(logging.Filter):
+    """
+    Deja pasar 1 de cada `every` registros INFO/DEBUG marcados con `sample_key`.
+
+    Los registros sin `sample_key` y los de nivel WARNING o superior pasan siempre.
+    El primer registro de cada (plantilla, clave) siempre se escribe.
+    """
+
+    def __init__(self, every: int = 1):
+        super().__init__()
+        if every < 1:
+            raise ValueError("every debe ser >= 1")
+        self.every = every
+        self._counters: Dict[Tuple[str, str], int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "sample_key", None)
+        if key is None or self.every == 1 or record.levelno >= logging.WARNING:
+            return True
+        counter_key = (record.msg, key)
+        count = self._counters.get(counter_key, 0)
+        self._counters[counter_key] = count + 1
+        return count % self.every == 0
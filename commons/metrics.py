@@ -0,0 +1,328 @@
+"""
+Métricas en memoria con exposición en formato de texto de Prometheus.
+
+Contadores, gauges e histogramas con etiquetas, sin dependencias externas. Cada
+serie (combinación de etiquetas) tiene su propio lock, que en la ruta caliente
+nunca está disputado: registrar una muestra cuesta una búsqueda en un diccionario
+y un incremento. El lock del registro solo se toma al crear una serie nueva y al
+renderizar.
+
+Las métricas del backend se declaran al final del módulo para que todos los
+componentes (PLC, reactor, API, monitor, servidor WebSocket) registren en el
+mismo registro global `REGISTRY`, que la API sirve en `/metrics`.
+
+Autor: IA Punto: Soluciones Tecnológicas
+Proyecto para: INDUSTRIAS PICO S.A.S
+Fecha de creación: 2025-07-28
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _CounterChild:
+    __slots__ = ("_value", "_lock")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        if amount < 0:
+            raise ValueError("Un contador no puede decrementarse")
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class _GaugeChild:
+    __slots__ = ("_value", "_lock", "_function")
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self._value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]):
+        """El valor se obtiene llamando a `function` al renderizar."""
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        if self._function is not None:
+            return float(self._function())
+        return self._value
+
+
+class _HistogramChild:
+    __slots__ = ("_upper_bounds", "_counts", "_sum", "_lock")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self._upper_bounds = upper_bounds
+        self._counts = [0] * (len(upper_bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        """Conteos acumulados por cubeta (incluida +Inf) y suma."""
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total
+
+
+class _Metric:
+    """Base de una familia de métricas con etiquetas."""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Serie de la combinación de etiquetas indicada (se crea si no existe)."""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(
+                    f"{self.name} espera las etiquetas {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def clear(self):
+        with self._lock:
+            self._children = {} if self.labelnames else {(): self._new_child()}
+
+    def _series(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} {self.type_name}"]
+        for key, child in self._series():
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} "
+                f"{_format_value(child.value)}"]
+
+
+class Counter(_Metric):
+    """Contador monótono."""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """Valor que sube y baja, o que se calcula al renderizar con set_function."""
+
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self.labels().set_function(function)
+
+
+class Histogram(_Metric):
+    """Histograma de cubetas fijas (conteos acumulados al renderizar)."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.upper_bounds = tuple(sorted(float(b) for b in buckets if b != math.inf))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _render_child(self, key, child) -> List[str]:
+        cumulative, total = child.snapshot()
+        names = self.labelnames + ("le",)
+        lines = [f"{self.name}_bucket{_format_labels(names, key + (_format_value(bound),))} "
+                 f"{count}"
+                 for bound, count in zip(self.upper_bounds + (math.inf,), cumulative)]
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Conjunto de familias de métricas que se renderizan juntas."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrica duplicada: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str,
+                labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Exposición completa en formato de texto de Prometheus 0.0.4."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # Un gauge calculado que falla no debe tumbar el scrape completo
+                lines.append(f"# ERROR {metric.name}: {_escape(e)}")
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(port: int, host: str = "0.0.0.0",
+                  registry: "MetricsRegistry" = None):
+    """
+    Sirve `/metrics` en un hilo daemon (para procesos sin Flask, como el
+    servidor WebSocket independiente).
+
+    Returns:
+        La instancia de ThreadingHTTPServer (llamar a shutdown() para detenerla).
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    registry = registry or REGISTRY
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http",
+                     daemon=True).start()
+    return server
+
+
+REGISTRY = MetricsRegistry()
+
+PLC_EXCHANGE_SECONDS = REGISTRY.histogram(
+    "carousel_plc_exchange_seconds",
+    "Latencia de los intercambios comando-respuesta con el PLC", ("machine",))
+PLC_TIMEOUTS = REGISTRY.counter(
+    "carousel_plc_timeouts_total", "Respuestas del PLC que vencieron el plazo", ("machine",))
+PLC_RECONNECTS = REGISTRY.counter(
+    "carousel_plc_reconnects_total", "Reconexiones exitosas con el PLC", ("machine",))
+PLC_COMMANDS = REGISTRY.counter(
+    "carousel_plc_commands_total", "Comandos enviados al PLC por código",
+    ("machine", "command"))
+REACTOR_QUEUE_DEPTH = REGISTRY.gauge(
+    "carousel_reactor_queue_depth", "Intercambios encolados o en curso en el reactor de PLCs")
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "carousel_http_request_seconds", "Latencia de las peticiones HTTP por ruta",
+    ("method", "route", "status"))
+WEBSOCKET_CLIENTS = REGISTRY.gauge(
+    "carousel_websocket_clients", "Clientes WebSocket/Socket.IO conectados", ("server",))
+BROADCAST_SECONDS = REGISTRY.histogram(
+    "carousel_broadcast_seconds", "Duración de la difusión de un evento a los clientes",
+    ("server",))
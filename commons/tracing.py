@@ -0,0 +1,243 @@
+"""
+Trazas ligeras por petición con tiempos por etapa.
+
+Una traza se abre al inicio de una petición HTTP y vive en una `ContextVar`,
+de modo que la API, el PLCManager, el controlador y el PLC añaden spans sin
+pasar objetos de mano en mano. Al terminar la petición la traza se resume en
+una cabecera `Server-Timing` (duración acumulada por etapa) y, si hay archivo de
+exportación, se escribe como una línea JSON desde un hilo en segundo plano.
+
+Con el trazado desactivado, o fuera de una petición (p. ej. el monitor),
+`span()` devuelve un gestor de contexto vacío compartido: el coste es una
+comprobación de una variable global.
+
+Variables de entorno:
+    CAROUSEL_TRACING=1            Activa el trazado
+    CAROUSEL_TRACE_FILE=ruta      Exporta cada traza como una línea JSONL
+
+Autor: IA Punto: Soluciones Tecnológicas
+Proyecto para: INDUSTRIAS PICO S.A.S
+Fecha de creación: 2025-07-28
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_enabled = False
+_export_path: Optional[str] = None
+_export_queue: "queue.Queue" = queue.Queue()
+_export_thread: Optional[threading.Thread] = None
+_export_lock = threading.Lock()
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("carousel_trace", default=None)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """Spans de una petición, con tiempos relativos al inicio de la traza."""
+
+    __slots__ = ("trace_id", "name", "attributes", "started_at", "_start", "spans",
+                 "duration", "_stack")
+
+    def __init__(self, name: str, attributes: Dict[str, Any] = None):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.duration: Optional[float] = None
+        self._stack: List[int] = []
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._start
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Segundos acumulados por nombre de span, en orden de aparición."""
+        totals: Dict[str, float] = {}
+        for span in self.spans:
+            if span["duration"] is not None:
+                totals[span["name"]] = totals.get(span["name"], 0.0) + span["duration"]
+        return totals
+
+    def server_timing(self) -> str:
+        """Valor de la cabecera Server-Timing (milisegundos por etapa)."""
+        parts = [f"{name};dur={seconds * 1000:.2f}"
+                 for name, seconds in self.stage_totals().items()]
+        if self.duration is not None:
+            parts.append(f"total;dur={self.duration * 1000:.2f}")
+        return ", ".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "attributes": self.attributes,
+            "spans": [{
+                "name": span["name"],
+                "parent": span["parent"],
+                "start_ms": round(span["start"] * 1000, 3),
+                "duration_ms": (round(span["duration"] * 1000, 3)
+                                if span["duration"] is not None else None),
+                **({"attributes": span["attributes"]} if span["attributes"] else {})
+            } for span in self.spans]
+        }
+
+
+class _Span:
+    __slots__ = ("trace", "index")
+
+    def __init__(self, trace: Trace, name: str, attributes: Dict[str, Any]):
+        self.trace = trace
+        self.index = len(trace.spans)
+        parent = trace._stack[-1] if trace._stack else None
+        trace.spans.append({"name": name, "parent": parent, "attributes": attributes,
+                            "start": time.perf_counter() - trace._start, "duration": None})
+
+    def __enter__(self):
+        self.trace._stack.append(self.index)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        record = self.trace.spans[self.index]
+        record["duration"] = time.perf_counter() - self.trace._start - record["start"]
+        if exc_type is not None:
+            record["attributes"] = {**(record["attributes"] or {}),
+                                    "error": exc_type.__name__}
+        if self.trace._stack and self.trace._stack[-1] == self.index:
+            self.trace._stack.pop()
+        return False
+
+
+def configure(enabled: bool = None, export_path: str = None):
+    """
+    Activa o desactiva el trazado.
+
+    Args:
+        enabled: None lee CAROUSEL_TRACING del entorno
+        export_path: Archivo JSONL de exportación; None lee CAROUSEL_TRACE_FILE
+    """
+    global _enabled, _export_path
+    if enabled is None:
+        enabled = os.getenv("CAROUSEL_TRACING", "0").lower() in ("1", "true", "yes")
+    _enabled = bool(enabled)
+    _export_path = export_path if export_path is not None else os.getenv("CAROUSEL_TRACE_FILE")
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def start_trace(name: str, **attributes):
+    """
+    Abre una traza en el contexto actual.
+
+    Returns:
+        La traza, o None si el trazado está desactivado.
+    """
+    if not _enabled:
+        return None
+    trace = Trace(name, attributes)
+    _current.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def finish_trace() -> Optional[Trace]:
+    """Cierra la traza del contexto actual y la encola para exportación."""
+    trace = _current.get()
+    if trace is None:
+        return None
+    _current.set(None)
+    trace.finish()
+    if _export_path:
+        _export(trace)
+    return trace
+
+
+def span(name: str, **attributes):
+    """
+    Gestor de contexto que mide una etapa de la traza actual.
+
+    Sin traza activa devuelve un gestor vacío compartido.
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    trace = _current.get()
+    if trace is None:
+        return _NOOP_SPAN
+    return _Span(trace, name, attributes or None)
+
+
+def _export(trace: Trace):
+    global _export_thread
+    _export_queue.put(trace)
+    if _export_thread is None or not _export_thread.is_alive():
+        with _export_lock:
+            if _export_thread is None or not _export_thread.is_alive():
+                _export_thread = threading.Thread(
+                    target=_export_loop, name="trace-export", daemon=True)
+                _export_thread.start()
+
+
+def _export_loop():
+    while True:
+        trace = _export_queue.get()
+        batch = [trace]
+        # Agrupa lo acumulado para una sola apertura del archivo
+        while True:
+            try:
+                batch.append(_export_queue.get_nowait())
+            except queue.Empty:
+                break
+        path = _export_path
+        try:
+            if path:
+                with open(path, "a", encoding="utf-8") as f:
+                    for item in batch:
+                        f.write(json.dumps(item.to_dict(), ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning(f"No se pudieron exportar {len(batch)} trazas a {path}: {e}")
+        finally:
+            for _ in batch:
+                _export_queue.task_done()
+
+
+def flush(timeout: float = 2.0):
+    """Espera a que la cola de exportación se vacíe (útil en pruebas y al cerrar)."""
+    deadline = time.monotonic() + timeout
+    with _export_queue.all_tasks_done:
+        while _export_queue.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            _export_queue.all_tasks_done.wait(remaining)
+
+
+configure()
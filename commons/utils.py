@@ -68,6 +68,30 @@ ESTADOS_PLC = {
 }
 
 
+# Estados de falla y el valor de bit que indica la falla activa
+# (PARADA_EMERGENCIA es activa en bajo)
+FALLAS_PLC = {
+    "ALARMA": 1,
+    "PARADA_EMERGENCIA": 0,
+    "VFD": 1,
+    "ERROR_POSICIONAMIENTO": 1,
+}
+
+
+def fallas_activas(status_code):
+    """
+    Devuelve los nombres de las fallas activas en un código de estado.
+
+    Args:
+        status_code: El código de estado del PLC en formato entero (8 bits).
+
+    Returns:
+        Lista de nombres de FALLAS_PLC activos, en el orden de sus bits.
+    """
+    return [estado for estado, activo in FALLAS_PLC.items()
+            if (status_code >> ESTADOS_PLC[estado]["bit"]) & 1 == activo]
+
+
 def interpretar_estado_plc(status_code):
     """
     Interpreta el código de estado del PLC y devuelve un diccionario con los estados y sus descripciones específicas.
@@ -11,12 +11,21 @@ Fecha de creación: 2023-09-13
 
 from models.plc import PLC  # Importación explícita del PLC real [[2]]
 # Interpretación de estados [[3]]
-from commons.utils import interpretar_estado_plc, validar_comando, validar_argumento
+from commons.utils import (ESTADOS_PLC, fallas_activas, interpretar_estado_plc,
+                           validar_comando, validar_argumento)
+from commons import tracing
+from commons.log_pipeline import async_handler
+from controllers.rotation_planner import RotationPlanner
+from typing import List, Optional, Tuple
 import time
 import logging
 import os
 from logging.handlers import RotatingFileHandler
 
+# Motivos de rechazo de un movimiento que no son fallas del PLC
+MOVE_BUSY = "EN_MOVIMIENTO"
+MOVE_NOT_READY = "NO_LISTO"
+
 # Configuración de bitácora de operaciones
 operations_logger = logging.getLogger("operations")
 if not operations_logger.hasHandlers():
@@ -27,7 +36,8 @@ if not operations_logger.hasHandlers():
         os.path.join(log_folder, "operations.log"), maxBytes=500_000, backupCount=5, encoding="utf-8")
     formatter = logging.Formatter('%(asctime)s %(levelname)s %(message)s')
     handler.setFormatter(formatter)
-    operations_logger.addHandler(handler)
+    # La escritura en disco ocurre en el hilo del pipeline, no en el de la operación
+    operations_logger.addHandler(async_handler(handler))
     operations_logger.setLevel(logging.INFO)
 
 
@@ -36,16 +46,24 @@ class CarouselController:
     Controlador para operaciones del carrusel con el PLC.
     """
 
-    def __init__(self, plc: PLC):
+    def __init__(self, plc: PLC, machine_id: str = None, journal=None,
+                 planner: RotationPlanner = None):
         """
         Inicializa el controlador con una instancia de PLC.
 
         Args:
             plc: Instancia de la clase PLC (real o simulador) [[2]]
+            machine_id: ID de la máquina en la bitácora de operaciones
+            journal: OperationsJournal donde registrar cada comando (opcional)
+            planner: Planificador de giro; por defecto un anillo de 10 cangilones
         """
         self.plc = plc
+        self.machine_id = machine_id
+        self.journal = journal
+        self.planner = planner or RotationPlanner()
         self.logger = logging.getLogger(__name__)
         self.response_delay = 0.2  # Tiempo de espera para la respuesta del PLC en segundos
+        self.moving_target: Optional[int] = None  # Destino del último movimiento aceptado
 
     def send_command(self, command: int, argument: int = None, remote_addr=None) -> dict:
         """
@@ -63,55 +81,86 @@ class CarouselController:
             ValueError: Parámetros inválidos
             RuntimeError: Error de comunicación
         """
+        return self._send_command(command, argument, remote_addr)[0]
+
+    def _send_command(self, command: int, argument: int = None,
+                      remote_addr=None) -> Tuple[dict, Optional[dict]]:
+        """Como send_command, pero devuelve también el estado leído antes del comando."""
         estado_antes = None
+        started = time.time()
         try:
             if hasattr(self.plc, 'get_current_status'):
-                estado_antes = self.plc.get_current_status()
+                with tracing.span("controller.status_before"):
+                    estado_antes = self.plc.get_current_status()
         except Exception:
             estado_antes = None
+        self._observe_motion(estado_antes)
         validar_comando(command)
         if argument is not None:
             validar_argumento(argument)
         try:
             with self.plc:  # Gestión automática de conexión [[2]]
                 self.logger.info(
-                    f"[PLC] Enviando comando: {command}, argumento: {argument}")
+                    "[PLC] Enviando comando: %s, argumento: %s", command, argument)
                 self.plc.send_command(command, argument)
+                sent_at = time.monotonic()
                 # Pausa para dar tiempo al PLC a procesar el comando antes de responder
-                time.sleep(self.response_delay)
+                with tracing.span("controller.response_delay"):
+                    if self.response_delay and hasattr(self.plc, 'wait_response'):
+                        # Se espera primero la llegada para que la latencia medida
+                        # no incluya la pausa; luego solo se completa lo que falte
+                        self.plc.wait_response()
+                    remaining = self.response_delay - (time.monotonic() - sent_at)
+                    if remaining > 0:
+                        time.sleep(remaining)
                 response = self.plc.receive_response()
-            # Log de bajo nivel: datos crudos recibidos
             status_code = response['status_code']
             position = response['position']
-            # Formato binario de 8 bits
-            status_bin = format(status_code, '08b')
-            # Diccionario bit a bit
-            status_bits = {f'bit_{i}': (
-                status_code >> i) & 1 for i in range(7, -1, -1)}
-            self.logger.info(
-                f"[PLC][RAW] status_code: {status_code} (bin: {status_bin}), bits: {status_bits}, position: {position}")
-            self.logger.info(f"[PLC][RAW] Respuesta cruda: {response}")
-            status = interpretar_estado_plc(response['status_code'])
+            self._observe_motion(response)
+            # Log de bajo nivel: datos crudos recibidos (solo se calcula en DEBUG)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                status_bits = {f'bit_{i}': (
+                    status_code >> i) & 1 for i in range(7, -1, -1)}
+                self.logger.debug(
+                    "[PLC][RAW] status_code: %s (bin: %s), bits: %s, position: %s",
+                    status_code, format(status_code, '08b'), status_bits, position)
+            status = interpretar_estado_plc(status_code)
             self.logger.info(
-                f"[PLC] Respuesta recibida: status_code={response['status_code']}, position={response['position']}")
+                "[PLC] Respuesta recibida: status_code=%s, position=%s", status_code, position)
             estado_despues = None
             try:
                 if hasattr(self.plc, 'get_current_status'):
-                    estado_despues = self.plc.get_current_status()
+                    with tracing.span("controller.status_after"):
+                        estado_despues = self.plc.get_current_status()
             except Exception:
                 estado_despues = None
+            self._observe_motion(estado_despues)
             operations_logger.info(
-                f"[COMANDO] IP/Proceso: {remote_addr} | Comando: {command} | Argumento: {argument} | Resultado: OK | Estado antes: {estado_antes} | Estado después: {estado_despues}")
+                "[COMANDO] IP/Proceso: %s | Comando: %s | Argumento: %s | Resultado: OK | "
+                "Estado antes: %s | Estado después: %s",
+                remote_addr, command, argument, estado_antes, estado_despues)
+            if self.journal is not None:
+                self.journal.record(
+                    self.machine_id, command, argument, client=remote_addr,
+                    before=estado_antes, after=estado_despues or response,
+                    duration=time.time() - started, ts=started)
             return {
                 'status': status,
-                'position': response['position'],
-                'raw_status': response['status_code']
-            }
+                'position': position,
+                'raw_status': status_code
+            }, estado_antes
         except Exception as e:
+            self.moving_target = None  # Sin respuesta no se sabe si sigue en movimiento
             self.logger.error(
-                f"[PLC] Error en send_command (comando={command}, argumento={argument}): {str(e)}")
+                "[PLC] Error en send_command (comando=%s, argumento=%s): %s", command, argument, e)
             operations_logger.error(
-                f"[COMANDO] IP/Proceso: {remote_addr} | Comando: {command} | Argumento: {argument} | Resultado: ERROR | Error: {str(e)} | Estado antes: {estado_antes}")
+                "[COMANDO] IP/Proceso: %s | Comando: %s | Argumento: %s | Resultado: ERROR | "
+                "Error: %s | Estado antes: %s", remote_addr, command, argument, e, estado_antes)
+            if self.journal is not None:
+                self.journal.record(
+                    self.machine_id, command, argument, client=remote_addr,
+                    result="error", error=str(e), before=estado_antes,
+                    duration=time.time() - started, ts=started)
             raise RuntimeError(f"Fallo en comunicación PLC: {str(e)}")
 
     def get_current_status(self) -> dict:
@@ -123,20 +172,69 @@ class CarouselController:
         """
         return self.send_command(0)  # Comando 0 = STATUS
 
-    def move_to_position(self, target: int) -> dict:
+    def move_to_position(self, target: int, remote_addr=None) -> dict:
         """
         Mueve el carrusel a una posición específica.
 
         Args:
-            target: Posición objetivo (0-9)
+            target: Posición objetivo (0 a bucket_count - 1 del planificador)
+            remote_addr: Dirección IP o proceso remoto
 
         Returns:
-            Respuesta del PLC
+            Respuesta del PLC con 'plan': sentido más corto, cangilones y ETA
+            desde la posición leída antes del comando. Si el carrusel no podía
+            aceptar el movimiento el plan queda en estado 'rejected' con sus motivos
+        """
+        self.planner.validate(target)
+
+        # Comando 1 = MUEVETE
+        result, estado_antes = self._send_command(1, target, remote_addr)
+        before = estado_antes if estado_antes and 'error' not in estado_antes else None
+        current = before['position'] if before else result['position']
+        reasons = self._move_rejections(before, result['raw_status'], target)
+        if reasons:
+            self.logger.warning(
+                "[PLC] Movimiento a %s no aceptado: %s", target, ", ".join(reasons))
+            self.moving_target = None
+            result['plan'] = self.planner.reject(current, target, reasons)
+        else:
+            if (result['raw_status'] >> ESTADOS_PLC["RUN"]["bit"]) & 1:
+                self.moving_target = target
+            result['plan'] = self.planner.plan(current, target)
+        return result
+
+    def _observe_motion(self, estado: Optional[dict]):
+        """Olvida el destino en curso en cuanto una lectura muestra RUN=0."""
+        if (estado and 'status_code' in estado
+                and not (estado['status_code'] >> ESTADOS_PLC["RUN"]["bit"]) & 1):
+            self.moving_target = None
+
+    def _move_rejections(self, before: Optional[dict], reply_status: int,
+                         target: int) -> List[str]:
         """
-        if not (0 <= target <= 9):
-            raise ValueError("Posición debe estar entre 0-9")
+        Motivos por los que el carrusel no aceptó un movimiento.
 
-        return self.send_command(1, target)  # Comando 1 = MUEVETE
+        Antes del comando: fallas activas, equipo no listo o ya en movimiento
+        hacia otro destino. En la respuesta: fallas activas, o equipo no listo
+        sin haber arrancado.
+        """
+        def bit(status_code: int, name: str) -> int:
+            return (status_code >> ESTADOS_PLC[name]["bit"]) & 1
+
+        reasons = fallas_activas(reply_status)
+        if before is not None:
+            status_before = before['status_code']
+            reasons += [fault for fault in fallas_activas(status_before)
+                        if fault not in reasons]
+            if bit(status_before, "RUN"):
+                if self.moving_target != target:
+                    reasons.append(MOVE_BUSY)
+            elif bit(status_before, "READY"):
+                reasons.append(MOVE_NOT_READY)
+        if (bit(reply_status, "READY") and not bit(reply_status, "RUN")
+                and MOVE_NOT_READY not in reasons):
+            reasons.append(MOVE_NOT_READY)
+        return reasons
 
     def verify_ready_state(self) -> bool:
         """
@@ -0,0 +1,219 @@
+"""
+Monitor de estado para múltiples PLCs bajo eventlet.
+
+Ejecuta un poller (green thread) por máquina que consulta su estado a través del
+PLCManager y emite por Socket.IO solo los cambios, con un límite de frecuencia de
+emisión por máquina. Las consultas al PLC (sockets bloqueantes) se ejecutan en el
+pool de hilos nativos de eventlet (`eventlet.tpool`) para no detener el hub, y un
+semáforo acota cuántas hay en curso a la vez. Los pollers arrancan escalonados
+para que 50+ máquinas no consulten todas en el mismo instante.
+
+Autor: IA Punto: Soluciones Tecnológicas
+Proyecto para: INDUSTRIAS PICO S.A.S
+Fecha de creación: 2025-07-28
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from commons.error_codes import PLC_CONN_ERROR
+from commons.metrics import BROADCAST_SECONDS
+
+
+class MultiPLCMonitor:
+    """
+    Monitorea todas las máquinas de un PLCManager y emite eventos por máquina.
+
+    Eventos emitidos:
+        machine_status: {'machine_id', 'success', 'data', 'error', 'code', 'timestamp'}
+        machine_status_error: mismo formato con success=False
+    """
+
+    def __init__(self, plc_manager, emit: Callable[[str, Dict[str, Any]], Any],
+                 interval: float = 1.0, min_emit_interval: float = 0.5,
+                 max_concurrent: int = 16, status_board=None):
+        """
+        Args:
+            plc_manager: Instancia de PLCManager
+            emit: Función de emisión (p. ej. socketio.emit)
+            interval: Segundos entre consultas de cada máquina
+            min_emit_interval: Segundos mínimos entre emisiones de una misma máquina;
+                los cambios dentro de la ventana se agrupan y se emite el último
+            max_concurrent: Consultas simultáneas máximas al conjunto de PLCs
+            status_board: StatusBoard opcional donde publicar cada lectura
+        """
+        self.plc_manager = plc_manager
+        self.emit = emit
+        self.interval = interval
+        self.min_emit_interval = min_emit_interval
+        self.max_concurrent = max_concurrent
+        self.status_board = status_board
+        self.logger = logging.getLogger(__name__)
+        self.running = False
+
+        self.last_status: Dict[str, Dict[str, Any]] = {}
+        self.last_success: Dict[str, float] = {}
+        self._last_emit: Dict[str, float] = {}
+        # Máquinas en error -> instante de la última emisión de error (ventana propia)
+        self._failing: Dict[str, float] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._listeners: List[Callable[[str, Dict[str, Any], float], None]] = []
+
+        # Ejecución de la consulta bloqueante; start() la sustituye por tpool
+        self._execute = lambda fn, *args: fn(*args)
+        self._semaphore = None
+        self._machine_settings = {
+            config["id"]: config for config in plc_manager.plc_configs}
+
+    def add_listener(self, listener: Callable[[str, Dict[str, Any], float], None]):
+        """
+        Registra un consumidor del flujo de estados.
+
+        El listener recibe (machine_id, status, timestamp) en cada lectura
+        correcta y debe ser O(1): se ejecuta en el poller de la máquina.
+        """
+        self._listeners.append(listener)
+
+    def _interval_for(self, machine_id: str) -> float:
+        return self._machine_settings.get(machine_id, {}).get(
+            "monitor_interval", self.interval)
+
+    def _min_emit_for(self, machine_id: str) -> float:
+        return self._machine_settings.get(machine_id, {}).get(
+            "min_emit_interval", self.min_emit_interval)
+
+    def poll_machine(self, machine_id: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Consulta una máquina una vez y emite si corresponde.
+
+        Returns:
+            El estado leído o None si hubo error.
+        """
+        try:
+            if self._semaphore is not None:
+                with self._semaphore:
+                    status = self._execute(
+                        self.plc_manager.get_machine_status, machine_id, "monitor")
+            else:
+                status = self._execute(
+                    self.plc_manager.get_machine_status, machine_id, "monitor")
+        except Exception as e:
+            self._handle_error(machine_id, str(e), now)
+            return None
+
+        now = time.time() if now is None else now
+        self.last_success[machine_id] = now
+        if self._failing.pop(machine_id, None) is not None:
+            self.logger.info("[MULTI_MONITOR] %s responde de nuevo", machine_id)
+        if self.status_board is not None:
+            try:
+                self.status_board.publish_status(machine_id, status)
+            except Exception as e:
+                self.logger.warning(
+                    f"[MULTI_MONITOR] No se pudo publicar {machine_id} en el tablero: {e}")
+
+        for listener in self._listeners:
+            try:
+                listener(machine_id, status, now)
+            except Exception as e:
+                self.logger.error(
+                    f"[MULTI_MONITOR] Error en listener para {machine_id}: {e}")
+
+        previous = self.last_status.get(machine_id)
+        changed = previous is None or (
+            previous.get('raw_status'), previous.get('position')) != (
+            status.get('raw_status'), status.get('position'))
+        self.last_status[machine_id] = status
+        if changed:
+            self._pending[machine_id] = status
+        self._flush(machine_id, now)
+        return status
+
+    def _emit(self, event: str, payload: Dict[str, Any]):
+        started = time.perf_counter()
+        self.emit(event, payload)
+        BROADCAST_SECONDS.labels("socketio").observe(time.perf_counter() - started)
+
+    def _flush(self, machine_id: str, now: float):
+        """Emite el cambio pendiente si la ventana de la máquina lo permite."""
+        status = self._pending.get(machine_id)
+        if status is None:
+            return
+        if now - self._last_emit.get(machine_id, float('-inf')) < self._min_emit_for(machine_id):
+            return  # Se emitirá en una consulta posterior
+        del self._pending[machine_id]
+        self._last_emit[machine_id] = now
+        self._emit('machine_status', {
+            'machine_id': machine_id,
+            'success': True,
+            'data': status,
+            'error': None,
+            'code': None,
+            'timestamp': now
+        })
+
+    def _handle_error(self, machine_id: str, error: str, now: Optional[float] = None):
+        """
+        Emite el error de una máquina.
+
+        El primer error tras una lectura correcta se registra y se emite siempre.
+        Los siguientes se emiten como máximo una vez por ventana de la máquina,
+        medida aparte de la de los estados, y no se vuelven a registrar.
+        """
+        if self.status_board is not None:
+            try:
+                self.status_board.publish_status(machine_id, {'error': error})
+            except Exception:
+                pass
+        now = time.time() if now is None else now
+        last_error = self._failing.get(machine_id)
+        if last_error is None:
+            self.logger.warning(
+                "[MULTI_MONITOR] Error consultando %s: %s", machine_id, error)
+            # Sin estado previo, la recuperación se emite aunque repita el último
+            self.last_status.pop(machine_id, None)
+            self._pending.pop(machine_id, None)
+        elif now - last_error < self._min_emit_for(machine_id):
+            return
+        self._failing[machine_id] = now
+        self._emit('machine_status_error', {
+            'machine_id': machine_id,
+            'success': False,
+            'data': None,
+            'error': error,
+            'code': PLC_CONN_ERROR,
+            'timestamp': now
+        })
+
+    def _poll_loop(self, machine_id: str, initial_delay: float):
+        import eventlet
+        eventlet.sleep(initial_delay)
+        while self.running:
+            started = time.monotonic()
+            self.poll_machine(machine_id)
+            elapsed = time.monotonic() - started
+            eventlet.sleep(max(0.0, self._interval_for(machine_id) - elapsed))
+
+    def start(self):
+        """Lanza un green thread por máquina (requiere eventlet)."""
+        import eventlet
+        from eventlet import tpool
+        from eventlet.semaphore import Semaphore
+
+        self.running = True
+        self._execute = tpool.execute
+        self._semaphore = Semaphore(self.max_concurrent)
+        machine_ids = list(self.plc_manager.controllers.keys())
+        count = max(len(machine_ids), 1)
+        for index, machine_id in enumerate(machine_ids):
+            # Escalonar el arranque a lo largo de un intervalo
+            delay = self._interval_for(machine_id) * index / count
+            eventlet.spawn_n(self._poll_loop, machine_id, delay)
+        self.logger.info(
+            f"[MULTI_MONITOR] Monitor iniciado para {len(machine_ids)} máquinas "
+            f"(intervalo {self.interval}s, concurrencia {self.max_concurrent})")
+
+    def stop(self):
+        """Detiene los pollers al terminar su iteración actual."""
+        self.running = False
@@ -0,0 +1,123 @@
+"""
+Planificador de giro del carrusel.
+
+Modela el carrusel como un anillo de `bucket_count` cangilones. Para un
+movimiento calcula el sentido más corto (ascendente = posiciones crecientes,
+igual que SENTIDO_GIRO=0), los cangilones a recorrer y el tiempo estimado de
+llegada a partir de los segundos por cangilón medidos en la máquina. Mientras
+no haya medición usa el valor configurado; sin ninguno de los dos el ETA es None.
+
+El protocolo del PLC no recibe el sentido (el comando MUEVETE solo lleva la
+posición): el plan informa el recorrido esperado y valida la posición según los
+cangilones de cada máquina.
+
+Autor: IA Punto: Soluciones Tecnológicas
+Proyecto para: INDUSTRIAS PICO S.A.S
+Fecha de creación: 2025-07-28
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_BUCKET_COUNT = 10
+
+ASCENDING = "ascendente"
+DESCENDING = "descendente"
+
+PLANNED = "planned"
+REJECTED = "rejected"
+
+
+class RotationPlanner:
+    """
+    Sentido más corto y ETA de un movimiento en un anillo de cangilones.
+    """
+
+    def __init__(self, bucket_count: int = DEFAULT_BUCKET_COUNT,
+                 seconds_per_bucket: Optional[float] = None,
+                 measured: Callable[[], Optional[float]] = None):
+        """
+        Args:
+            bucket_count: Cangilones (posiciones) del carrusel
+            seconds_per_bucket: Segundos por cangilón configurados (respaldo)
+            measured: Devuelve los segundos por cangilón medidos, o None si aún
+                no hay viajes medidos (p. ej. MovementAnalytics.seconds_per_bucket)
+        """
+        if not 0 < bucket_count <= 256:
+            raise ValueError("bucket_count debe estar entre 1 y 256")
+        self.bucket_count = bucket_count
+        self.seconds_per_bucket = seconds_per_bucket
+        self.measured = measured
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RotationPlanner":
+        """
+        Crea el planificador de una máquina.
+
+        Claves opcionales: bucket_count, seconds_per_bucket (por defecto
+        bucket_interval de los simuladores).
+        """
+        return cls(config.get("bucket_count", DEFAULT_BUCKET_COUNT),
+                   config.get("seconds_per_bucket", config.get("bucket_interval")))
+
+    def validate(self, target: int):
+        """
+        Raises:
+            ValueError: Si la posición no existe en el carrusel
+        """
+        if not isinstance(target, int) or not 0 <= target < self.bucket_count:
+            raise ValueError(f"Posición debe estar entre 0-{self.bucket_count - 1}")
+
+    def timing(self) -> Optional[float]:
+        """Segundos por cangilón: medidos si los hay, si no los configurados."""
+        if self.measured is not None:
+            measured = self.measured()
+            if measured is not None:
+                return measured
+        return self.seconds_per_bucket
+
+    def plan(self, current: int, target: int) -> Dict[str, Any]:
+        """
+        Plan de un movimiento desde `current` hasta `target`.
+
+        Returns:
+            {'state', 'from', 'to', 'direction', 'buckets', 'eta_s',
+            'seconds_per_bucket'}; state es 'planned' y direction es None si no
+            hay que moverse. En empate se elige el sentido ascendente.
+        """
+        self.validate(target)
+        current %= self.bucket_count
+        forward = (target - current) % self.bucket_count
+        backward = (current - target) % self.bucket_count
+        buckets = min(forward, backward)
+        direction = None
+        if buckets:
+            direction = ASCENDING if forward <= backward else DESCENDING
+        seconds_per_bucket = self.timing()
+        return {
+            'state': PLANNED,
+            'from': current,
+            'to': target,
+            'direction': direction,
+            'buckets': buckets,
+            'eta_s': (round(buckets * seconds_per_bucket, 3)
+                      if seconds_per_bucket is not None else None),
+            'seconds_per_bucket': seconds_per_bucket,
+        }
+
+    def reject(self, current: int, target: int, reasons) -> Dict[str, Any]:
+        """
+        Plan de un movimiento que el carrusel no aceptó.
+
+        Conserva las claves de `plan` (sin sentido, recorrido ni ETA) y añade
+        'reasons' con los motivos.
+        """
+        return {
+            'state': REJECTED,
+            'from': current % self.bucket_count,
+            'to': target,
+            'direction': None,
+            'buckets': None,
+            'eta_s': None,
+            'seconds_per_bucket': self.timing(),
+            'reasons': list(reasons),
+        }
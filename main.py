@@ -1,25 +1,18 @@
 from __version__ import __version__, PROJECT_DESCRIPTION
-import tkinter as tk
-from tkinter import ttk, messagebox
+import argparse
 import json
-import threading
-from api import create_app  # Importa la API [[3]]
-from models.plc import PLC  # Importa PLC real
-from gui.main_gui import MainWindow  # Interfaz gráfica
 import logging
-import eventlet
-import eventlet.green.threading as threading
-from flask_socketio import SocketIO
 import copy
+import functools
 import multiprocessing
-import socket
 import time
 from plc_cache import plc_status_cache, plc_access_lock, plc_interprocess_lock
 from commons.error_codes import PLC_CONN_ERROR, PLC_BUSY
-from logging.handlers import RotatingFileHandler
 import sys
 import os
 from commons.utils import debug_print
+# tkinter, la GUI, eventlet, Flask-SocketIO, Swagger y el simulador se importan
+# solo donde se usan para que el backend headless arranque sin cargarlos.
 # Añade la ruta base del proyecto al sys.path para permitir imports de paquetes locales
 base_dir = os.path.dirname(os.path.abspath(__file__))
 if base_dir not in sys.path:
@@ -44,6 +37,8 @@ Actualizado: 2025-06-24
 # Configuración persistente [[1]]
 CONFIG_FILE = "config.json"
 MULTI_PLC_CONFIG_FILE = "config_multi_plc.json"
+# ID con el que se publica el PLC único (igual al usado por la app web)
+SINGLE_PLC_MACHINE_ID = "single_plc"
 DEFAULT_CONFIG = {
     "ip": "192.168.1.50",
     "port": 3200,
@@ -78,9 +73,13 @@ def create_plc_instance(config):
     """Crea instancia del PLC según modo [[6]]"""
     if config.get("simulator_enabled", False):
         from models.plc_simulator import PLCSimulator
-        return PLCSimulator(config["ip"], config["port"])
+        return PLCSimulator.from_config(config)
+    elif config.get("replay_file"):
+        from models.plc_replay import ReplayPLC
+        return ReplayPLC.from_config(config)
     else:
-        return PLC(config["ip"], config["port"])
+        from models.plc import PLC
+        return PLC.from_config(config)
 
 
 def monitor_plc_status(socketio, plc, interval=5.0):
@@ -194,13 +193,58 @@ def monitor_plc_status(socketio, plc, interval=5.0):
         _time.sleep(interval)
 
 
-def run_backend(config):
-    """Ejecuta el backend de la API en un proceso separado"""
-    from models.plc import PLC
-    from models.plc_simulator import PLCSimulator
+def is_swagger_enabled(config_value=True):
+    """
+    Indica si se debe montar la documentación Swagger (flasgger).
+
+    La variable de entorno API_SWAGGER_ENABLED ("0"/"1") tiene prioridad sobre
+    el valor de la configuración.
+    """
+    env_value = os.getenv("API_SWAGGER_ENABLED")
+    if env_value is not None:
+        return env_value.strip().lower() not in ("0", "false", "no", "off")
+    return bool(config_value)
+
+
+def create_status_board(machine_count=0):
+    """
+    Crea el tablero de estado en memoria compartida del backend.
+
+    El nombre del segmento se toma de CAROUSEL_STATUS_BOARD. Si no se puede
+    crear (p. ej. plataforma sin shared_memory) el backend sigue sin él.
+
+    Args:
+        machine_count: Máquinas a publicar; el tablero reserva un 25 % de
+            holgura y nunca menos de DEFAULT_SLOTS registros
+    """
+    from models.status_board import StatusBoard, DEFAULT_BOARD_NAME, DEFAULT_SLOTS, MAX_SLOTS
+    name = os.getenv("CAROUSEL_STATUS_BOARD", DEFAULT_BOARD_NAME)
+    slots = min(MAX_SLOTS, max(DEFAULT_SLOTS, machine_count + machine_count // 4))
+    try:
+        board = StatusBoard.create(name, slots)
+        debug_print(f"📋 Backend: Tablero de estado publicado en '{name}'")
+        return board
+    except Exception as e:
+        logging.getLogger("status_board").warning(
+            f"No se pudo crear el tablero de estado '{name}': {e}")
+        return None
+
+
+def run_backend(config, ready_conn=None):
+    """
+    Ejecuta el backend de la API en un proceso separado.
+
+    Args:
+        config: Configuración single-PLC
+        ready_conn: Extremo de escritura de un multiprocessing.Pipe. En cuanto el
+            socket del servidor queda enlazado se envía {'port', 'elapsed'} por él.
+    """
+    backend_start = time.monotonic()
     from api import create_app
     from flask_socketio import SocketIO
+    from commons.metrics import BROADCAST_SECONDS, WEBSOCKET_CLIENTS
     import eventlet
+    import eventlet.wsgi
     import copy
     import logging
 
@@ -208,32 +252,38 @@ def run_backend(config):
         if config.get("simulator_enabled"):
             debug_print(
                 f"Backend: Iniciando en modo Simulador, IP: {config['ip']}, Puerto: {config['port']}")
-            return PLCSimulator(config["ip"], config["port"])
         else:
             debug_print(
                 f"Backend: Iniciando en modo PLC real, IP: {config['ip']}, Puerto: {config['port']}")
-            return PLC(config["ip"], config["port"])
+        return create_plc_instance(config)
 
-    def monitor_plc_status_backend(socketio, plc, interval=1.0):
+    def monitor_plc_status_backend(socketio, plc, interval=1.0, status_board=None):
         last_status = None
         while True:
             try:
                 status = plc.get_current_status()
+                if status_board is not None:
+                    status_board.publish_status(SINGLE_PLC_MACHINE_ID, status)
                 if last_status is None or status != last_status:
+                    started = time.perf_counter()
                     socketio.emit('plc_status', status)
+                    BROADCAST_SECONDS.labels("socketio").observe(
+                        time.perf_counter() - started)
                     last_status = copy.deepcopy(status)
             except Exception as e:
                 socketio.emit('plc_status_error', {'error': str(e)})
             eventlet.sleep(interval)
 
-    # Configurar logging para el backend
+    # Configurar logging para el backend: archivo y consola se escriben desde el
+    # hilo del pipeline asíncrono, no desde las peticiones ni los pollers
+    from commons.log_pipeline import async_handler
+    backend_formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
+    backend_handlers = [logging.FileHandler("carousel_api.log"), logging.StreamHandler()]
+    for handler in backend_handlers:
+        handler.setFormatter(backend_formatter)
     logging.basicConfig(
         level=logging.INFO,
-        format='%(asctime)s %(levelname)s %(name)s: %(message)s',
-        handlers=[
-            logging.FileHandler("carousel_api.log"),
-            logging.StreamHandler()
-        ]
+        handlers=[async_handler(*backend_handlers)]
     )
 
     # Verificar si hay configuración multi-PLC
@@ -242,18 +292,56 @@ def run_backend(config):
         debug_print("🔄 Backend: Iniciando en modo MULTI-PLC")
         # Importar PLCManager para modo multi-PLC
         from models.plc_manager import PLCManager
-        plc_manager = PLCManager(multi_plc_config["plc_machines"])
-        flask_app = create_app(plc_manager=plc_manager)
+        from models.operations_journal import OperationsJournal
+        plc_manager = PLCManager(
+            multi_plc_config.get("plc_machines", []),
+            transport=multi_plc_config.get("api_config", {}).get("plc_transport", "blocking"),
+            connect_timeout=multi_plc_config.get("api_config", {}).get(
+                "plc_connect_timeout", 5.0),
+            fault_profiles=multi_plc_config.get("fault_profiles"),
+            default_fault_profile=multi_plc_config.get("default_fault_profile"),
+            fleet=multi_plc_config.get("fleet"),
+            health_stale_after=multi_plc_config.get("api_config", {}).get(
+                "health_stale_after", 30.0),
+            deep_health_interval=multi_plc_config.get("api_config", {}).get(
+                "deep_health_interval", 10.0),
+            status_log_sample_every=multi_plc_config.get("api_config", {}).get(
+                "status_log_sample_every", 1),
+            journal=OperationsJournal.from_config(
+                multi_plc_config.get("api_config", {}).get("operations_journal")))
+        from models.status_history import StatusHistory
+        # Las máquinas de la flota virtual no reservan segmento en disco
+        status_history = StatusHistory.from_config(
+            multi_plc_config.get("api_config", {}).get("status_history"),
+            memory_only=[config["id"] for config in plc_manager.plc_configs
+                         if "fleet_index" in config])
+        from models.movement_analytics import MovementAnalytics
+        movement_analytics = MovementAnalytics.from_config(
+            multi_plc_config.get("api_config", {}).get("movement_analytics"),
+            plc_manager.plc_configs)
+        from models.alarm_detector import AlarmDetector
+        alarm_detector = AlarmDetector.from_config(
+            multi_plc_config.get("api_config", {}).get("alarms"))
+        swagger_enabled = is_swagger_enabled(
+            multi_plc_config.get("api_config", {}).get("swagger_enabled", True))
+        flask_app = create_app(plc_manager=plc_manager,
+                               enable_swagger=swagger_enabled,
+                               status_history=status_history,
+                               movement_analytics=movement_analytics,
+                               alarm_detector=alarm_detector)
         debug_print(
-            f"✅ Backend: Sistema multi-PLC iniciado con {len(multi_plc_config['plc_machines'])} máquinas")
+            f"✅ Backend: Sistema multi-PLC iniciado con {len(plc_manager.plc_configs)} máquinas")
 
         # Obtener puerto de configuración multi-PLC
         api_port = multi_plc_config.get("api_config", {}).get("port", 5000)
     else:
         debug_print("🔄 Backend: Iniciando en modo SINGLE-PLC (fallback)")
         # Modo single-PLC original
+        from models.operations_journal import OperationsJournal
         plc = create_plc_instance_backend(config)
-        flask_app = create_app(plc)
+        flask_app = create_app(
+            plc, enable_swagger=is_swagger_enabled(config.get("swagger_enabled", True)),
+            operations_journal=OperationsJournal.from_config(config.get("operations_journal")))
         debug_print("✅ Backend: Sistema single-PLC iniciado")
 
         # Obtener puerto de configuración single-PLC
@@ -263,12 +351,76 @@ def run_backend(config):
     socketio = SocketIO(flask_app, cors_allowed_origins="*",
                         async_mode="eventlet")
 
-    # Solo iniciar monitor para single-PLC
-    if not multi_plc_config:
-        eventlet.spawn_n(monitor_plc_status_backend, socketio, plc, 1.0)
+    @socketio.on('connect')
+    def count_client_connect(*args):
+        WEBSOCKET_CLIENTS.labels("socketio").inc()
+
+    @socketio.on('disconnect')
+    def count_client_disconnect(*args):
+        WEBSOCKET_CLIENTS.labels("socketio").dec()
+
+    # Tablero de estado en memoria compartida para lectores locales
+    status_board = create_status_board(
+        len(plc_manager.plc_configs) if multi_plc_config else 1)
+
+    if multi_plc_config:
+        # Un poller por máquina con emisión de cambios por máquina
+        from controllers.plc_monitor import MultiPLCMonitor
+        api_config = multi_plc_config.get("api_config", {})
+        multi_monitor = MultiPLCMonitor(
+            plc_manager, socketio.emit,
+            interval=api_config.get("monitor_interval", 1.0),
+            min_emit_interval=api_config.get("monitor_min_emit_interval", 0.5),
+            max_concurrent=api_config.get("monitor_max_concurrent", 16),
+            status_board=status_board)
+        if status_history is not None:
+            multi_monitor.add_listener(status_history.record_status)
+        if movement_analytics is not None:
+            movement_analytics.emit = socketio.emit
+            multi_monitor.add_listener(movement_analytics.observe_status)
+            # El ETA de los movimientos usa los segundos por cangilón medidos
+            for machine_id, controller in plc_manager.controllers.items():
+                controller.planner.measured = functools.partial(
+                    movement_analytics.seconds_per_bucket, machine_id)
+        if alarm_detector is not None:
+            alarm_detector.emit = socketio.emit
+            multi_monitor.add_listener(alarm_detector.observe_status)
+        multi_monitor.start()
+    else:
+        eventlet.spawn_n(monitor_plc_status_backend,
+                         socketio, plc, 1.0, status_board)
 
     debug_print(f"🚀 Backend: Iniciando servidor en puerto {api_port}")
-    socketio.run(flask_app, host="0.0.0.0", port=api_port)
+    # Se enlaza el socket explícitamente (igual que socketio.run con eventlet)
+    # para poder avisar al proceso principal en cuanto acepta conexiones
+    listen_socket = eventlet.listen(("0.0.0.0", api_port))
+    elapsed = time.monotonic() - backend_start
+    logging.getLogger("backend").info(
+        f"Backend listo en puerto {api_port} (time-to-ready: {elapsed * 1000:.0f} ms)")
+    if ready_conn is not None:
+        ready_conn.send({'port': api_port, 'elapsed': elapsed})
+        ready_conn.close()
+    eventlet.wsgi.server(listen_socket, flask_app, log_output=False)
+
+
+def wait_for_backend_ready(ready_conn, timeout=30.0):
+    """
+    Espera el aviso de arranque enviado por `run_backend`.
+
+    Args:
+        ready_conn: Extremo de lectura del Pipe compartido con el backend
+        timeout: Segundos máximos de espera
+
+    Returns:
+        Diccionario {'port', 'elapsed'} enviado por el backend, o None si no
+        llegó a tiempo o el proceso backend terminó antes de estar listo.
+    """
+    try:
+        if ready_conn.poll(timeout):
+            return ready_conn.recv()
+    except (EOFError, OSError):
+        pass  # El backend murió antes de enlazar el socket
+    return None
 
 
 def get_api_port():
@@ -281,59 +433,96 @@ def get_api_port():
         return config.get("api_port", 5000)
 
 
+def run_gui(config, backend_process):
+    """Lanza la interfaz gráfica en el hilo principal hasta que se cierre."""
+    try:
+        # Iniciar GUI en el hilo principal
+        debug_print("🖥️ Iniciando interfaz gráfica...")
+        import tkinter as tk
+        from gui.main_gui import MainWindow  # Interfaz gráfica
+        root = tk.Tk()
+        plc = None  # La GUI usará la API/WS, no acceso directo
+        app_gui = MainWindow(root, plc, config)
+        debug_print("✅ GUI iniciada correctamente")
+        root.mainloop()
+    except Exception as e:
+        debug_print(f"❌ Error al iniciar GUI: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        debug_print("🔄 Terminando proceso backend...")
+        backend_process.terminate()
+        backend_process.join(timeout=5)
+        debug_print("✅ Aplicación terminada")
+
+
+def run_headless(config):
+    """
+    Ejecuta solo la API en el proceso actual, sin GUI ni proceso hijo.
+
+    Pensado para equipos de servicio: no importa tkinter ni la GUI.
+    """
+    debug_print("🔄 Iniciando backend en modo headless...")
+    run_backend(config)
+
+
+def parse_args(argv=None):
+    """Parsea los argumentos de línea de comandos del lanzador."""
+    parser = argparse.ArgumentParser(description=PROJECT_DESCRIPTION)
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Ejecuta solo la API (sin GUI) en el proceso actual")
+    parser.add_argument(
+        "--version",
+        action="version",
+        version=f"%(prog)s {__version__}")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    config = load_config()
+
+    if args.headless:
+        run_headless(config)
+        sys.exit(0)
+
     # Configurar logging básico para el proceso principal
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s %(levelname)s: %(message)s'
     )
 
-    config = load_config()
     api_port = get_api_port()
 
     debug_print("🔄 Iniciando proceso backend...")
+    ready_reader, ready_writer = multiprocessing.Pipe(duplex=False)
+    launch_time = time.monotonic()
     backend_process = multiprocessing.Process(
-        target=run_backend, args=(config,), daemon=True)
+        target=run_backend, args=(config, ready_writer), daemon=True)
     backend_process.start()
+    # Cerrar la copia local para detectar EOF si el backend muere
+    ready_writer.close()
 
     # Esperar a que el backend esté listo antes de lanzar la GUI
     debug_print(
         f"⏳ Esperando a que el backend esté disponible en puerto {api_port}...")
-    max_retries = 30
-    backend_ready = False
-
-    for i in range(max_retries):
-        try:
-            with socket.create_connection(("localhost", api_port), timeout=1):
-                backend_ready = True
-                debug_print(
-                    f"✅ Backend disponible en puerto {api_port}. Lanzando GUI...")
-                break
-        except (ConnectionRefusedError, OSError):
-            debug_print(
-                f"⏳ Esperando backend... (intento {i+1}/{max_retries})")
-            time.sleep(1)
+    backend_timeout = 30
+    ready_info = wait_for_backend_ready(ready_reader, backend_timeout)
+    ready_reader.close()
 
-    if not backend_ready:
+    if ready_info is None:
         debug_print(
-            f"❌ ERROR: El backend no respondió en el puerto {api_port} tras {max_retries} segundos. Abortando.")
+            f"❌ ERROR: El backend no respondió en el puerto {api_port} tras {backend_timeout} segundos. Abortando.")
         backend_process.terminate()
         sys.exit(1)
 
-    try:
-        # Iniciar GUI en el hilo principal
-        debug_print("🖥️ Iniciando interfaz gráfica...")
-        root = tk.Tk()
-        plc = None  # La GUI usará la API/WS, no acceso directo
-        app_gui = MainWindow(root, plc, config)
-        debug_print("✅ GUI iniciada correctamente")
-        root.mainloop()
-    except Exception as e:
-        debug_print(f"❌ Error al iniciar GUI: {e}")
-        import traceback
-        traceback.print_exc()
-    finally:
-        debug_print("🔄 Terminando proceso backend...")
-        backend_process.terminate()
-        backend_process.join(timeout=5)
-        debug_print("✅ Aplicación terminada")
+    startup_ms = (time.monotonic() - launch_time) * 1000
+    logging.info(
+        f"Backend disponible en puerto {ready_info['port']}: time-to-ready "
+        f"{startup_ms:.0f} ms (backend interno {ready_info['elapsed'] * 1000:.0f} ms)")
+    debug_print(
+        f"✅ Backend disponible en puerto {ready_info['port']}. Lanzando GUI...")
+
+    run_gui(config, backend_process)
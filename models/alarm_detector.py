@@ -0,0 +1,163 @@
+"""
+Detector de alarmas por flancos sobre el flujo de estados.
+
+Compara cada lectura con el estado de fallas anterior de la máquina y genera un
+único evento al entrar (`raised`) y al salir (`cleared`) de cada falla de
+`commons.utils.FALLAS_PLC`. Los clientes ya no tienen que comparar estados
+completos para enterarse de una alarma.
+
+Antirrebote: una falla se activa cuando lleva `raise_debounce` segundos presente
+(0 = en la primera lectura, dentro de un intervalo de consulta) y se despeja
+cuando lleva `clear_debounce` segundos ausente. Una falla intermitente dentro de
+esa ventana no repite eventos.
+
+Mantiene un índice de alarmas activas por máquina y los últimos eventos.
+
+Autor: IA Punto: Soluciones Tecnológicas
+Proyecto para: INDUSTRIAS PICO S.A.S
+Fecha de creación: 2025-07-28
+"""
+
+import itertools
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from commons.utils import ESTADOS_PLC, FALLAS_PLC
+
+ALARM_EVENT = 'plc_alarm'
+
+
+class _FaultState:
+    __slots__ = ("active", "since", "pending_since", "raw_status", "position")
+
+    def __init__(self):
+        self.active = False
+        self.since: Optional[float] = None
+        self.pending_since: Optional[float] = None
+        self.raw_status: Optional[int] = None
+        self.position: Optional[int] = None
+
+
+class AlarmDetector:
+    """
+    Eventos de entrada y salida de fallas por máquina, con antirrebote.
+    """
+
+    def __init__(self, raise_debounce: float = 0.0, clear_debounce: float = 2.0,
+                 history_size: int = 200, emit: Callable[[str, Dict[str, Any]], Any] = None):
+        """
+        Args:
+            raise_debounce: Segundos que una falla debe mantenerse para activarse
+            clear_debounce: Segundos que una falla debe faltar para despejarse
+            history_size: Eventos recientes conservados para /v1/alarms
+            emit: Función de emisión (p. ej. socketio.emit); recibe 'plc_alarm'
+        """
+        self.raise_debounce = raise_debounce
+        self.clear_debounce = clear_debounce
+        self.emit = emit
+        self.logger = logging.getLogger(__name__)
+        self.recent: deque = deque(maxlen=history_size)
+        self._faults: Dict[str, Dict[str, _FaultState]] = {}
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, value: Union[None, bool, Dict[str, Any]]) -> Optional["AlarmDetector"]:
+        """
+        Crea el detector desde la configuración.
+
+        Args:
+            value: False desactiva; None o True usan los valores por defecto; o
+                {raise_debounce, clear_debounce, history_size}
+        """
+        if value is False:
+            return None
+        options = dict(value) if isinstance(value, dict) else {}
+        return cls(**options)
+
+    def _transition(self, machine_id: str, alarm: str, fault: _FaultState,
+                    ts: float) -> Dict[str, Any]:
+        active_value = FALLAS_PLC[alarm]
+        event = {
+            'id': next(self._sequence),
+            'machine_id': machine_id,
+            'alarm': alarm,
+            'state': 'raised' if fault.active else 'cleared',
+            'description': ESTADOS_PLC[alarm]["descripcion"][
+                active_value if fault.active else 1 - active_value],
+            'raw_status': fault.raw_status,
+            'position': fault.position,
+            'timestamp': ts,
+        }
+        if not fault.active:
+            event['duration_s'] = round(ts - fault.since, 3)
+        self.recent.append(event)
+        return event
+
+    def observe(self, machine_id: str, raw_status: int, position: int = None,
+                ts: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Procesa una lectura y devuelve los eventos que genera (normalmente ninguno).
+        """
+        events = []
+        with self._lock:
+            faults = self._faults.get(machine_id)
+            if faults is None:
+                faults = self._faults[machine_id] = {name: _FaultState() for name in FALLAS_PLC}
+            for alarm, active_value in FALLAS_PLC.items():
+                fault = faults[alarm]
+                present = (raw_status >> ESTADOS_PLC[alarm]["bit"]) & 1 == active_value
+                if present == fault.active:
+                    fault.pending_since = None
+                    if present:
+                        fault.raw_status, fault.position = raw_status, position
+                    continue
+                if fault.pending_since is None:
+                    fault.pending_since = ts
+                debounce = self.clear_debounce if fault.active else self.raise_debounce
+                if ts - fault.pending_since < debounce:
+                    continue
+                fault.active = present
+                fault.pending_since = None
+                if present:
+                    fault.since = ts
+                    fault.raw_status, fault.position = raw_status, position
+                events.append(self._transition(machine_id, alarm, fault, ts))
+        for event in events:
+            log = self.logger.warning if event['state'] == 'raised' else self.logger.info
+            log("[ALARMA] %s %s: %s", event['machine_id'], event['state'], event['alarm'])
+            if self.emit is not None:
+                try:
+                    self.emit(ALARM_EVENT, event)
+                except Exception as e:
+                    self.logger.warning("No se pudo emitir la alarma de %s: %s", machine_id, e)
+        return events
+
+    def observe_status(self, machine_id: str, status: Dict[str, Any], ts: float):
+        """Listener de MultiPLCMonitor: (machine_id, status, timestamp)."""
+        raw = status.get('raw_status', status.get('status_code'))
+        if raw is not None:
+            self.observe(machine_id, raw, status.get('position'), ts)
+
+    def active(self, machine_id: str = None) -> Dict[str, Dict[str, Any]]:
+        """Alarmas activas por máquina: {machine_id: {alarma: {since, raw_status, position}}}."""
+        with self._lock:
+            machines = ([machine_id] if machine_id is not None else list(self._faults))
+            index = {}
+            for machine in machines:
+                active = {alarm: {'since': fault.since, 'raw_status': fault.raw_status,
+                                  'position': fault.position}
+                          for alarm, fault in self._faults.get(machine, {}).items()
+                          if fault.active}
+                if active:
+                    index[machine] = active
+            return index
+
+    def events(self, machine_id: str = None, since_id: int = 0) -> List[Dict[str, Any]]:
+        """Eventos recientes (más antiguos primero), opcionalmente de una máquina."""
+        with self._lock:
+            return [event for event in self.recent
+                    if event['id'] > since_id
+                    and (machine_id is None or event['machine_id'] == machine_id)]
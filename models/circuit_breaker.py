@@ -0,0 +1,115 @@
+"""
+Circuit breaker por máquina para la comunicación con PLCs.
+
+Evita tormentas de reintentos contra carruseles caídos: tras varios fallos
+consecutivos el circuito se abre y las llamadas fallan de inmediato. Pasado el
+tiempo de recuperación se deja pasar una única prueba (semiabierto); si tiene
+éxito el circuito se cierra y si falla vuelve a abrirse.
+
+Autor: IA Punto: Soluciones Tecnológicas
+Proyecto para: INDUSTRIAS PICO S.A.S
+Fecha de creación: 2025-07-28
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict
+
+
+class CircuitOpenError(RuntimeError):
+    """La máquina se considera caída y la llamada se rechazó sin contactar el PLC."""
+
+
+class CircuitBreaker:
+    """
+    Máquina de estados closed → open → half_open → closed.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, recovery_timeout: float = 10.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            failure_threshold: Fallos consecutivos que abren el circuito
+            recovery_timeout: Segundos en abierto antes de permitir una prueba
+            clock: Reloj monotónico (inyectable para pruebas)
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.last_error = None
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Indica si una llamada puede contactar al PLC.
+
+        En abierto, cuando vence el tiempo de recuperación, pasa a semiabierto
+        y autoriza una única llamada de prueba.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.recovery_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def ready_for_probe(self) -> bool:
+        """True si el circuito está abierto y ya venció el tiempo de recuperación."""
+        return (self._state == self.OPEN
+                and self._clock() - self._opened_at >= self.recovery_timeout)
+
+    def cancel_request(self):
+        """Libera una llamada autorizada que no llegó a contactar el PLC."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        """Registra una llamada exitosa y cierra el circuito."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+            self.last_error = None
+
+    def record_failure(self, error: str = None):
+        """Registra un fallo; abre el circuito al superar el umbral o si falla la prueba."""
+        with self._lock:
+            self._failures += 1
+            self.last_error = error
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+    def retry_in(self) -> float:
+        """Segundos que faltan para la próxima prueba (0 si no está abierto)."""
+        if self._state != self.OPEN:
+            return 0.0
+        return max(0.0, self.recovery_timeout - (self._clock() - self._opened_at))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado serializable para health y listado de máquinas."""
+        return {
+            "state": self._state,
+            "consecutive_failures": self._failures,
+            "retry_in": round(self.retry_in(), 2),
+            "last_error": self.last_error
+        }
@@ -0,0 +1,187 @@
+"""
+Simulador de flota: miles de carruseles virtuales en arreglos compactos.
+
+En lugar de un objeto `PLCSimulator` por máquina (con su logger, socket falso y
+modelo propio), el estado de toda la flota vive en arreglos paralelos: un byte de
+estado, un byte de posición, un byte de destino y el inicio y fin del movimiento
+en `array('d')`. Cada máquina se avanza de forma perezosa solo cuando se lee, sin
+hilos ni temporizadores, de modo que 1.000+ máquinas caben en un portátil.
+
+`FleetPLC` expone una máquina de la flota con la interfaz de `PLC` para que
+`PLCManager`, la API y el monitor la usen sin cambios.
+
+Autor: IA Punto: Soluciones Tecnológicas
+Proyecto para: INDUSTRIAS PICO S.A.S
+Fecha de creación: 2025-07-28
+"""
+
+import random
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from commons.utils import validar_comando, validar_argumento
+from models.plc_simulator import (BIT_DESCENDING, BIT_NOT_READY, BIT_RUN,
+                                  STATUS_IDLE)
+
+_MOVING_BITS = BIT_RUN | BIT_NOT_READY | BIT_DESCENDING
+
+
+class FleetSimulator:
+    """
+    Estado de N carruseles virtuales con avance perezoso.
+    """
+
+    def __init__(self, count: int, n_buckets: int = 10, bucket_interval: float = 0.5,
+                 seed: int = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            count: Número de máquinas virtuales
+            n_buckets: Cangilones por carrusel
+            bucket_interval: Segundos para avanzar un cangilón
+            seed: Semilla para las posiciones iniciales
+            clock: Reloj monotónico (inyectable para pruebas)
+        """
+        if not 0 < n_buckets <= 256:
+            raise ValueError("n_buckets debe estar entre 1 y 256")
+        self.count = count
+        self.n_buckets = n_buckets
+        self.bucket_interval = bucket_interval
+        self.clock = clock
+        rng = random.Random(seed)
+        self.status = bytearray([STATUS_IDLE]) * count
+        # Posición de origen mientras se mueve; posición actual en reposo
+        self.position = bytearray(rng.randrange(n_buckets) for _ in range(count))
+        self.target = bytearray(self.position)
+        self.started = array('d', bytes(8 * count))
+        self.deadline = array('d', bytes(8 * count))
+        self.exchanges = 0
+        self._lock = threading.Lock()
+
+    def _settle(self, index: int, now: float):
+        if self.status[index] & BIT_RUN and now >= self.deadline[index]:
+            self.position[index] = self.target[index]
+            self.status[index] &= ~_MOVING_BITS & 0xFF
+
+    def read(self, index: int) -> Tuple[int, int]:
+        """Estado y posición actuales de una máquina (avanza su movimiento)."""
+        with self._lock:
+            return self._read(index, self.clock())
+
+    def _read(self, index: int, now: float) -> Tuple[int, int]:
+        self._settle(index, now)
+        status = self.status[index]
+        if not status & BIT_RUN:
+            return status, self.position[index]
+        done = int((now - self.started[index]) / self.bucket_interval)
+        step = -done if status & BIT_DESCENDING else done
+        return status, (self.position[index] + step) % self.n_buckets
+
+    def start_move(self, index: int, target: int) -> bool:
+        """
+        Inicia un movimiento por el sentido más corto.
+
+        Returns:
+            False si la máquina ya está en movimiento o el destino no existe.
+        """
+        with self._lock:
+            return self._start_move(index, target, self.clock())
+
+    def _start_move(self, index: int, target: int, now: float) -> bool:
+        self._settle(index, now)
+        if self.status[index] & BIT_RUN or target >= self.n_buckets:
+            return False
+        origin = self.position[index]
+        forward = (target - origin) % self.n_buckets
+        backward = (origin - target) % self.n_buckets
+        steps = min(forward, backward)
+        if steps == 0:
+            return True
+        status = self.status[index] | BIT_RUN | BIT_NOT_READY
+        if forward > backward:
+            status |= BIT_DESCENDING
+        self.status[index] = status
+        self.target[index] = target
+        self.started[index] = now
+        self.deadline[index] = now + steps * self.bucket_interval
+        return True
+
+    def exchange(self, index: int, command: int, argument: int = None) -> Tuple[int, int]:
+        """Procesa un comando del protocolo y devuelve (estado, posición)."""
+        with self._lock:
+            self.exchanges += 1
+            now = self.clock()
+            if command == 1 and argument is not None:
+                self._start_move(index, argument, now)
+            return self._read(index, now)
+
+    def stats(self) -> Dict[str, Any]:
+        moving = sum(1 for i in range(self.count) if self.read(i)[0] & BIT_RUN)
+        return {"machines": self.count, "moving": moving, "exchanges": self.exchanges}
+
+    def machine_configs(self, id_prefix: str = "fleet_") -> List[Dict[str, Any]]:
+        """Entradas de configuración de máquina para PLCManager."""
+        width = len(str(max(self.count - 1, 0)))
+        return [{
+            "id": f"{id_prefix}{index:0{width}d}",
+            "name": f"Carrusel virtual {index}",
+            "ip": "fleet",
+            "port": index,
+            "simulator": True,
+            "bucket_count": self.n_buckets,
+            "bucket_interval": self.bucket_interval,
+            "fleet_index": index
+        } for index in range(self.count)]
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "FleetSimulator":
+        """Crea la flota desde la clave 'fleet' de la configuración multi-PLC."""
+        return cls(config["count"], n_buckets=config.get("bucket_count", 10),
+                   bucket_interval=config.get("bucket_interval", 0.5),
+                   seed=config.get("seed"))
+
+
+class FleetPLC:
+    """
+    Vista de una máquina de la flota con la interfaz de `PLC`.
+    """
+
+    connection_state = "connected"
+
+    def __init__(self, fleet: FleetSimulator, index: int, ip: str = "fleet", port: int = None):
+        self.fleet = fleet
+        self.index = index
+        self.ip = ip
+        self.port = index if port is None else port
+        self.sock = self
+        self._response: Optional[Tuple[int, int]] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._response = None
+
+    def connect(self) -> bool:
+        return True
+
+    def close(self):
+        self._response = None
+
+    def send_command(self, command: int, argument: int = None) -> bool:
+        validar_comando(command)
+        if argument is not None:
+            validar_argumento(argument)
+        self._response = self.fleet.exchange(self.index, command, argument)
+        return True
+
+    def receive_response(self) -> dict:
+        response, self._response = self._response, None
+        if response is None:
+            raise RuntimeError("No hay comando pendiente de respuesta")
+        return {'status_code': response[0], 'position': response[1]}
+
+    def get_current_status(self) -> dict:
+        status, position = self.fleet.exchange(self.index, 0)
+        return {'status_code': status, 'position': position}
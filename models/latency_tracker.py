@@ -0,0 +1,94 @@
+"""
+Estimador de latencia por máquina para timeouts adaptativos.
+
+Mantiene una media móvil exponencial (SRTT) y su desviación (RTTVAR) como el
+cálculo de RTO de TCP (RFC 6298): timeout = SRTT + 4·RTTVAR, acotado entre un
+piso y un techo configurables. Tras un timeout el plazo se duplica (hasta el
+techo) y vuelve al valor estimado con la siguiente muestra válida. Conserva una
+ventana de muestras recientes para reportar p50/p99.
+
+Autor: IA Punto: Soluciones Tecnológicas
+Proyecto para: INDUSTRIAS PICO S.A.S
+Fecha de creación: 2025-07-28
+"""
+
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+
+class LatencyEstimator:
+    """
+    Estimación de latencia y plazo de respuesta de un PLC.
+    """
+
+    ALPHA = 0.125  # Peso de la nueva muestra en SRTT
+    BETA = 0.25    # Peso de la nueva muestra en RTTVAR
+    K = 4          # Múltiplo de la desviación en el plazo
+
+    def __init__(self, floor: float = 0.2, ceiling: float = 5.0, window: int = 256):
+        """
+        Args:
+            floor: Plazo mínimo en segundos
+            ceiling: Plazo máximo en segundos (también el plazo sin muestras)
+            window: Muestras recientes conservadas para percentiles
+        """
+        if floor > ceiling:
+            raise ValueError("El piso del timeout no puede superar el techo")
+        self.floor = floor
+        self.ceiling = ceiling
+        self._samples = deque(maxlen=window)
+        self._srtt: Optional[float] = None
+        self._rttvar = 0.0
+        self._backoff = 1
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def record(self, sample: float):
+        """Registra una latencia observada en segundos."""
+        with self._lock:
+            self._samples.append(sample)
+            if self._srtt is None:
+                self._srtt = sample
+                self._rttvar = sample / 2
+            else:
+                self._rttvar = (1 - self.BETA) * self._rttvar + \
+                    self.BETA * abs(self._srtt - sample)
+                self._srtt = (1 - self.ALPHA) * self._srtt + self.ALPHA * sample
+            self._backoff = 1
+
+    def record_timeout(self):
+        """Registra un timeout: duplica el plazo hasta el techo."""
+        with self._lock:
+            self.timeouts += 1
+            self._backoff = min(self._backoff * 2, 64)
+
+    def timeout(self) -> float:
+        """Plazo de respuesta actual en segundos."""
+        if self._srtt is None:
+            return self.ceiling
+        rto = (self._srtt + self.K * self._rttvar) * self._backoff
+        return min(self.ceiling, max(self.floor, rto))
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Percentil p (0-100) de la ventana de muestras, o None si está vacía."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Resumen serializable en milisegundos."""
+        def ms(value):
+            return None if value is None else round(value * 1000, 1)
+        return {
+            "samples": len(self._samples),
+            "srtt_ms": ms(self._srtt),
+            "rttvar_ms": ms(self._rttvar if self._srtt is not None else None),
+            "timeout_ms": ms(self.timeout()),
+            "p50_ms": ms(self.percentile(50)),
+            "p99_ms": ms(self.percentile(99)),
+            "timeouts": self.timeouts
+        }
@@ -0,0 +1,324 @@
+"""
+Indicadores de operación por carrusel calculados sobre el flujo de estados.
+
+Consume cada lectura del monitor (listener de MultiPLCMonitor) y mantiene
+agregados incrementales sin volver a leer historiales ni logs:
+
+- Movimientos: flanco de subida de RUN inicia un viaje, flanco de bajada lo
+  cierra con su duración y los cangilones recorridos (según SENTIDO_GIRO y el
+  número de cangilones de la máquina). Un cambio de posición sin RUN observado
+  (movimiento más corto que el intervalo de consulta) cuenta como viaje sin
+  duración.
+- Tiempo en reposo, en movimiento y en falla (cualquier bit de FALLAS_PLC). El
+  tiempo entre dos lecturas se atribuye al estado anterior hasta `max_gap`
+  segundos; el resto se cuenta como desconocido (monitor detenido o PLC sin
+  respuesta).
+- Segundos por cangilón (media exponencial de los viajes medidos).
+
+Cada lectura cuesta O(1): además de los totales desde el arranque, una ventana
+deslizante en intervalos fijos (por defecto 60 x 60 s) da movimientos por hora y
+utilización recientes.
+
+Autor: IA Punto: Soluciones Tecnológicas
+Proyecto para: INDUSTRIAS PICO S.A.S
+Fecha de creación: 2025-07-28
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from commons.utils import ESTADOS_PLC, fallas_activas
+
+_RUN_MASK = 1 << ESTADOS_PLC["RUN"]["bit"]
+_DESCENDING_MASK = 1 << ESTADOS_PLC["SENTIDO_GIRO"]["bit"]
+
+STATES = ("idle", "busy", "alarm")
+_FIELDS = ("moves", "buckets", "move_seconds", "timed_moves",
+           "idle", "busy", "alarm", "unknown")
+_INDEX = {name: index for index, name in enumerate(_FIELDS)}
+
+DEFAULT_BUCKET_COUNT = 10
+
+
+class _RollingWindow:
+    """Sumas de una ventana deslizante dividida en intervalos fijos."""
+
+    def __init__(self, window_seconds: float, slot_seconds: float):
+        self.slot_seconds = slot_seconds
+        self.slot_count = max(1, int(round(window_seconds / slot_seconds)))
+        self.seconds = self.slot_count * slot_seconds
+        self._slots = [[0.0] * len(_FIELDS) for _ in range(self.slot_count)]
+        self.totals = [0.0] * len(_FIELDS)
+        self._current: Optional[int] = None
+
+    def advance(self, ts: float):
+        """Descarta los intervalos que salen de la ventana."""
+        slot = int(ts // self.slot_seconds)
+        if self._current is None or slot - self._current >= self.slot_count:
+            if self._current is not None:
+                for values in self._slots:
+                    values[:] = [0.0] * len(_FIELDS)
+                self.totals = [0.0] * len(_FIELDS)
+            self._current = slot
+            return
+        while self._current < slot:
+            self._current += 1
+            expired = self._slots[self._current % self.slot_count]
+            for index, value in enumerate(expired):
+                self.totals[index] -= value
+                expired[index] = 0.0
+
+    def add(self, field: str, value: float):
+        index = _INDEX[field]
+        self._slots[self._current % self.slot_count][index] += value
+        self.totals[index] += value
+
+
+def _utilization(seconds: Dict[str, float]) -> Dict[str, Optional[float]]:
+    observed = sum(seconds[state] for state in STATES)
+    return {state: (round(seconds[state] / observed, 4) if observed else None)
+            for state in STATES}
+
+
+class MachineAnalytics:
+    """Agregados de una máquina; `observe()` es O(1)."""
+
+    def __init__(self, machine_id: str, bucket_count: int, window: _RollingWindow,
+                 max_gap: float, ewma_alpha: float = 0.2):
+        self.machine_id = machine_id
+        self.bucket_count = bucket_count
+        self.window = window
+        self.max_gap = max_gap
+        self.ewma_alpha = ewma_alpha
+        self.totals = dict.fromkeys(_FIELDS, 0.0)
+        self.first_ts: Optional[float] = None
+        self.last_ts: Optional[float] = None
+        self.state: Optional[str] = None
+        self.position: Optional[int] = None
+        self.running = False
+        self.descending = False
+        self.move_started_at: Optional[float] = None
+        self.move_start_position: Optional[int] = None
+        self.last_move: Optional[Dict[str, Any]] = None
+        self.min_move_seconds: Optional[float] = None
+        self.max_move_seconds: Optional[float] = None
+        self.seconds_per_bucket: Optional[float] = None
+
+    def _add(self, field: str, value: float):
+        self.totals[field] += value
+        self.window.add(field, value)
+
+    def _distance(self, start: int, end: int, descending: Optional[bool]) -> int:
+        forward = (end - start) % self.bucket_count
+        backward = (start - end) % self.bucket_count
+        if descending is None:
+            return min(forward, backward)
+        return backward if descending else forward
+
+    def _complete_move(self, ts: float, position: int, duration: Optional[float],
+                       start_position: int, descending: Optional[bool]) -> Dict[str, Any]:
+        buckets = self._distance(start_position, position, descending)
+        self._add("moves", 1)
+        self._add("buckets", buckets)
+        if duration is not None:
+            self._add("move_seconds", duration)
+            self._add("timed_moves", 1)
+            self.min_move_seconds = (duration if self.min_move_seconds is None
+                                     else min(self.min_move_seconds, duration))
+            self.max_move_seconds = (duration if self.max_move_seconds is None
+                                     else max(self.max_move_seconds, duration))
+            if buckets:
+                sample = duration / buckets
+                self.seconds_per_bucket = (
+                    sample if self.seconds_per_bucket is None else
+                    self.seconds_per_bucket + self.ewma_alpha * (sample - self.seconds_per_bucket))
+        self.last_move = {
+            'from': start_position, 'to': position, 'buckets': buckets,
+            'duration_s': round(duration, 3) if duration is not None else None,
+            'ended_at': ts,
+        }
+        return self.last_move
+
+    def observe(self, ts: float, raw_status: int, position: int) -> Optional[Dict[str, Any]]:
+        """
+        Procesa una lectura.
+
+        Returns:
+            El viaje completado en esta lectura, o None.
+        """
+        self.window.advance(ts)
+        if self.last_ts is not None:
+            elapsed = max(0.0, ts - self.last_ts)
+            attributed = min(elapsed, self.max_gap)
+            self._add(self.state, attributed)
+            if elapsed > attributed:
+                self._add("unknown", elapsed - attributed)
+        else:
+            self.first_ts = ts
+
+        running = bool(raw_status & _RUN_MASK)
+        completed = None
+        if running:
+            if not self.running:
+                self.move_started_at = ts
+                self.move_start_position = (self.position if self.position is not None
+                                            else position)
+            self.descending = bool(raw_status & _DESCENDING_MASK)
+        elif self.running and self.move_started_at is not None:
+            completed = self._complete_move(ts, position, ts - self.move_started_at,
+                                            self.move_start_position, self.descending)
+            self.move_started_at = None
+        elif self.position is not None and position != self.position:
+            completed = self._complete_move(ts, position, None, self.position, None)
+
+        self.running = running
+        self.position = position
+        self.state = "alarm" if fallas_activas(raw_status) else "busy" if running else "idle"
+        self.last_ts = ts
+        return completed
+
+    def snapshot(self, now: float = None) -> Dict[str, Any]:
+        """Indicadores desde el arranque y en la ventana deslizante."""
+        now = self.last_ts if now is None else max(now, self.last_ts or now)
+        self.window.advance(now)
+        totals = self.totals
+        window = dict(zip(_FIELDS, self.window.totals))
+        covered = min(self.window.seconds, now - self.first_ts) if self.first_ts is not None else 0
+        return {
+            'machine_id': self.machine_id,
+            'state': self.state,
+            'position': self.position,
+            'bucket_count': self.bucket_count,
+            'moves': int(totals['moves']),
+            'buckets_traveled': int(totals['buckets']),
+            'move_duration': {
+                'mean_s': (round(totals['move_seconds'] / totals['timed_moves'], 3)
+                           if totals['timed_moves'] else None),
+                'min_s': self.min_move_seconds,
+                'max_s': self.max_move_seconds,
+            },
+            'seconds_per_bucket': (round(self.seconds_per_bucket, 3)
+                                   if self.seconds_per_bucket is not None else None),
+            'last_move': self.last_move,
+            'time_s': {state: round(totals[state], 3) for state in STATES + ("unknown",)},
+            'utilization': _utilization(totals),
+            'window': {
+                'seconds': self.window.seconds,
+                'moves': int(window['moves']),
+                'buckets_traveled': int(window['buckets']),
+                'moves_per_hour': (round(window['moves'] * 3600 / covered, 2)
+                                   if covered > 0 else None),
+                'mean_move_s': (round(window['move_seconds'] / window['timed_moves'], 3)
+                                if window['timed_moves'] else None),
+                'utilization': _utilization(window),
+            },
+        }
+
+
+class MovementAnalytics:
+    """
+    Indicadores de movimiento y utilización de todas las máquinas.
+    """
+
+    def __init__(self, bucket_counts: Dict[str, int] = None, window_seconds: float = 3600.0,
+                 slot_seconds: float = 60.0, max_gap: float = 10.0,
+                 emit: Callable[[str, Dict[str, Any]], Any] = None):
+        """
+        Args:
+            bucket_counts: Cangilones por máquina (por defecto 10)
+            window_seconds: Duración de la ventana deslizante
+            slot_seconds: Granularidad de la ventana
+            max_gap: Segundos máximos entre lecturas atribuibles al estado anterior
+            emit: Función de emisión (p. ej. socketio.emit); recibe
+                'machine_analytics' al completarse cada viaje
+        """
+        self.bucket_counts = dict(bucket_counts or {})
+        self.window_seconds = window_seconds
+        self.slot_seconds = slot_seconds
+        self.max_gap = max_gap
+        self.emit = emit
+        self.logger = logging.getLogger(__name__)
+        self._machines: Dict[str, MachineAnalytics] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_machines(cls, plc_configs: List[Dict[str, Any]], **options) -> "MovementAnalytics":
+        """Crea el motor con el 'bucket_count' de cada configuración de máquina."""
+        return cls({config["id"]: config.get("bucket_count", DEFAULT_BUCKET_COUNT)
+                    for config in plc_configs}, **options)
+
+    @classmethod
+    def from_config(cls, value: Union[None, bool, Dict[str, Any]],
+                    plc_configs: List[Dict[str, Any]]) -> Optional["MovementAnalytics"]:
+        """
+        Crea el motor desde la configuración.
+
+        Args:
+            value: False desactiva; None o True usan los valores por defecto; o
+                {window_seconds, slot_seconds, max_gap}
+            plc_configs: Configuraciones de máquina (para 'bucket_count')
+        """
+        if value is False:
+            return None
+        options = dict(value) if isinstance(value, dict) else {}
+        return cls.for_machines(plc_configs, **options)
+
+    def _machine(self, machine_id: str) -> MachineAnalytics:
+        machine = self._machines.get(machine_id)
+        if machine is None:
+            machine = MachineAnalytics(
+                machine_id, self.bucket_counts.get(machine_id, DEFAULT_BUCKET_COUNT),
+                _RollingWindow(self.window_seconds, self.slot_seconds), self.max_gap)
+            self._machines[machine_id] = machine
+        return machine
+
+    def observe_status(self, machine_id: str, status: Dict[str, Any], ts: float):
+        """Listener de MultiPLCMonitor: (machine_id, status, timestamp)."""
+        raw = status.get('raw_status', status.get('status_code'))
+        position = status.get('position')
+        if raw is None or position is None:
+            return
+        with self._lock:
+            machine = self._machine(machine_id)
+            move = machine.observe(ts, raw, position)
+            payload = machine.snapshot() if move is not None and self.emit else None
+        if payload is not None:
+            try:
+                self.emit('machine_analytics', {
+                    'machine_id': machine_id, 'move': move, 'analytics': payload,
+                    'timestamp': ts})
+            except Exception as e:
+                self.logger.warning("No se pudo emitir analítica de %s: %s", machine_id, e)
+
+    def seconds_per_bucket(self, machine_id: str) -> Optional[float]:
+        """Segundos medidos por cangilón de la máquina (None sin viajes medidos)."""
+        machine = self._machines.get(machine_id)
+        return machine.seconds_per_bucket if machine is not None else None
+
+    def machine(self, machine_id: str, now: float = None) -> Optional[Dict[str, Any]]:
+        """Indicadores de una máquina, o None si aún no hay lecturas."""
+        with self._lock:
+            machine = self._machines.get(machine_id)
+            return machine.snapshot(now) if machine is not None else None
+
+    def summary(self, now: float = None) -> Dict[str, Any]:
+        """Indicadores de todas las máquinas y totales de la flota."""
+        with self._lock:
+            machines = {machine_id: machine.snapshot(now)
+                        for machine_id, machine in self._machines.items()}
+        window_moves = sum(m['window']['moves'] for m in machines.values())
+        time_s = {state: sum(m['time_s'][state] for m in machines.values())
+                  for state in STATES}
+        return {
+            'machines': machines,
+            'fleet': {
+                'machines': len(machines),
+                'moves': sum(m['moves'] for m in machines.values()),
+                'buckets_traveled': sum(m['buckets_traveled'] for m in machines.values()),
+                'window_moves': window_moves,
+                'moves_per_hour': round(sum(m['window']['moves_per_hour'] or 0
+                                            for m in machines.values()), 2),
+                'utilization': _utilization(time_s),
+            },
+        }
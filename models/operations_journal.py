@@ -0,0 +1,281 @@
+"""
+Bitácora estructurada de operaciones sobre los carruseles.
+
+Sustituye la búsqueda con grep en `operations.log` por una tabla SQLite
+indexada por máquina, cliente, comando y tiempo. Las escrituras no bloquean al
+llamador: `record()` encola la operación y un hilo escritor la inserta en lotes
+dentro de una transacción. La base usa WAL, de modo que las consultas de la API
+leen en paralelo con el escritor.
+
+El uso de disco está acotado por una retención en días y un máximo de filas; la
+poda corre en el propio hilo escritor y libera páginas con `incremental_vacuum`.
+
+Autor: IA Punto: Soluciones Tecnológicas
+Proyecto para: INDUSTRIAS PICO S.A.S
+Fecha de creación: 2025-07-28
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    machine TEXT NOT NULL,
+    client TEXT,
+    command INTEGER NOT NULL,
+    argument INTEGER,
+    result TEXT NOT NULL,
+    error TEXT,
+    status_before INTEGER,
+    position_before INTEGER,
+    status_after INTEGER,
+    position_after INTEGER,
+    duration_ms REAL
+);
+CREATE INDEX IF NOT EXISTS idx_operations_ts ON operations (ts);
+CREATE INDEX IF NOT EXISTS idx_operations_machine_ts ON operations (machine, ts);
+CREATE INDEX IF NOT EXISTS idx_operations_client_ts ON operations (client, ts);
+CREATE INDEX IF NOT EXISTS idx_operations_command_ts ON operations (command, ts);
+"""
+
+_COLUMNS = ("ts", "machine", "client", "command", "argument", "result", "error",
+            "status_before", "position_before", "status_after", "position_after",
+            "duration_ms")
+
+_STOP = object()
+
+
+def _status_fields(status: Optional[Dict[str, Any]]):
+    """(raw_status, position) de un estado del controlador o del PLC."""
+    if not isinstance(status, dict) or 'error' in status:
+        return None, None
+    raw = status.get('raw_status', status.get('status_code'))
+    return raw, status.get('position')
+
+
+class OperationsJournal:
+    """
+    Bitácora SQLite con escritor en segundo plano, índices y retención.
+    """
+
+    def __init__(self, path: str, retention_days: float = 365.0, max_rows: int = 5_000_000,
+                 include_status: bool = False, batch_size: int = 500,
+                 prune_interval: float = 3600.0, queue_size: int = 100_000):
+        """
+        Args:
+            path: Archivo SQLite (se crea si no existe)
+            retention_days: Antigüedad máxima de las operaciones conservadas
+            max_rows: Filas máximas; se eliminan las más antiguas
+            include_status: Registrar también las consultas de estado (comando 0)
+            batch_size: Operaciones máximas por transacción del escritor
+            prune_interval: Segundos entre podas de retención
+            queue_size: Operaciones en espera antes de descartar
+        """
+        self.path = path
+        self.retention_days = retention_days
+        self.max_rows = max_rows
+        self.include_status = include_status
+        self.batch_size = batch_size
+        self.prune_interval = prune_interval
+        self.dropped = 0
+        self.logger = logging.getLogger(__name__)
+        self._queue: "queue.Queue" = queue.Queue(queue_size)
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connect()
+        # auto_vacuum solo surte efecto al crear la base (antes de la primera tabla)
+        connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        connection.executescript(_SCHEMA)
+        connection.close()
+        self._last_prune = float('-inf')
+        self._writer = threading.Thread(
+            target=self._writer_loop, name="operations-journal", daemon=True)
+        self._writer.start()
+
+    @classmethod
+    def from_config(cls, value: Union[None, bool, str, Dict[str, Any]],
+                    default_dir: str = None) -> Optional["OperationsJournal"]:
+        """
+        Crea la bitácora desde la configuración.
+
+        Args:
+            value: False desactiva; None usa la ruta por defecto; una ruta; o
+                {path, retention_days, max_rows, include_status}
+            default_dir: Carpeta de la ruta por defecto (LOCALAPPDATA/Vertical PIC)
+        """
+        if value is False:
+            return None
+        options = dict(value) if isinstance(value, dict) else {}
+        if isinstance(value, str):
+            options["path"] = value
+        if not options.get("path"):
+            base = default_dir or os.path.join(os.getenv('LOCALAPPDATA', '.'), 'Vertical PIC')
+            options["path"] = os.path.join(base, "operations.sqlite3")
+        return cls(options.pop("path"), **options)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=10, isolation_level=None,
+                                     check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connect()
+            connection.row_factory = sqlite3.Row
+            self._local.connection = connection
+        return connection
+
+    def record(self, machine: str, command: int, argument: int = None, client: str = None,
+               result: str = "ok", error: str = None, before: Dict[str, Any] = None,
+               after: Dict[str, Any] = None, duration: float = None, ts: float = None):
+        """
+        Encola una operación (no bloquea; descarta si la cola está llena).
+
+        Args:
+            machine: ID de la máquina
+            command, argument: Comando enviado
+            client: IP o proceso que originó la operación
+            result: "ok" o "error"
+            error: Mensaje de error
+            before, after: Estado antes y después ({'raw_status'|'status_code', 'position'})
+            duration: Segundos de la operación
+            ts: Marca de tiempo (time.time()); por defecto ahora
+        """
+        if command == 0 and not self.include_status:
+            return
+        status_before, position_before = _status_fields(before)
+        status_after, position_after = _status_fields(after)
+        row = (time.time() if ts is None else ts, machine, client, command, argument,
+               result, error, status_before, position_before, status_after,
+               position_after, round(duration * 1000, 3) if duration is not None else None)
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def _writer_loop(self):
+        connection = self._connect()
+        insert = (f"INSERT INTO operations ({', '.join(_COLUMNS)}) "
+                  f"VALUES ({', '.join('?' for _ in _COLUMNS)})")
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=min(self.prune_interval, 60.0))
+            except queue.Empty:
+                item = None
+            batch = []
+            processed = 0
+            while item is not None:
+                processed += 1
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+                if stopping or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+            try:
+                if batch:
+                    with connection:
+                        connection.execute("BEGIN")
+                        connection.executemany(insert, batch)
+                if time.monotonic() - self._last_prune >= self.prune_interval:
+                    self._prune(connection)
+            except sqlite3.Error as e:
+                self.logger.error("No se pudieron guardar %d operaciones: %s", len(batch), e)
+            finally:
+                for _ in range(processed):
+                    self._queue.task_done()
+        connection.close()
+
+    def _prune(self, connection: sqlite3.Connection):
+        """Aplica la retención por antigüedad y por número de filas."""
+        self._last_prune = time.monotonic()
+        deleted = 0
+        if self.retention_days:
+            cutoff = time.time() - self.retention_days * 86400
+            deleted += connection.execute(
+                "DELETE FROM operations WHERE ts < ?", (cutoff,)).rowcount
+        if self.max_rows:
+            row = connection.execute(
+                "SELECT id FROM operations ORDER BY id DESC LIMIT 1 OFFSET ?",
+                (self.max_rows,)).fetchone()
+            if row is not None:
+                deleted += connection.execute(
+                    "DELETE FROM operations WHERE id <= ?", (row[0],)).rowcount
+        if deleted:
+            connection.execute("PRAGMA incremental_vacuum")
+            self.logger.info("Bitácora de operaciones: %d operaciones podadas", deleted)
+
+    def prune(self):
+        """Escribe lo pendiente y aplica la retención de inmediato."""
+        self.flush()
+        connection = self._connect()
+        try:
+            self._prune(connection)
+        finally:
+            connection.close()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Espera a que se escriban las operaciones encoladas."""
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def query(self, machine: str = None, client: str = None, command: int = None,
+              since: float = None, until: float = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Operaciones más recientes primero que cumplen los filtros.
+
+        Args:
+            machine, client, command: Filtros exactos
+            since, until: Intervalo de tiempo (segundos epoch, until exclusivo)
+            limit: Filas máximas
+        """
+        clauses, params = [], []
+        for column, value in (("machine", machine), ("client", client), ("command", command)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(int(limit))
+        rows = self._reader().execute(
+            f"SELECT id, {', '.join(_COLUMNS)} FROM operations {where} "
+            f"ORDER BY ts DESC LIMIT ?", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self, timeout: float = 5.0):
+        """Escribe lo pendiente y detiene el hilo escritor."""
+        if not self._writer.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._writer.join(timeout)
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
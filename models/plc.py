@@ -1,19 +1,155 @@
 """
 Clase PLC para comunicación con PLC Delta AS Series vía sockets TCP/IP.
 
-Permite enviar comandos y recibir estados del PLC industrial, con manejo de reintentos y backoff exponencial.
+Permite enviar comandos y recibir estados del PLC industrial. La reconexión se
+delega en un supervisor en segundo plano con backoff exponencial, de modo que el
+hilo que llama nunca duerme esperando al PLC.
 
 Autor: IA Punto: Soluciones Tecnológicas
 Proyecto para: INDUSTRIAS PICO S.A.S
 Fecha: 2024-09-27
 """
 
+import os
 import socket
 import struct
 import time
 import logging
 import random
+import select
+import threading
+from typing import Any, Dict, Iterator, Tuple, Union
+from commons import tracing
+from commons.metrics import (PLC_COMMANDS, PLC_EXCHANGE_SECONDS, PLC_RECONNECTS,
+                             PLC_TIMEOUTS)
 from commons.utils import validar_comando, validar_argumento
+from models.latency_tracker import LatencyEstimator
+
+# Keepalive TCP por defecto: primera sonda tras 10 s de inactividad, luego cada
+# 3 s; la conexión se da por muerta tras 3 sondas sin respuesta (~19 s).
+DEFAULT_KEEPALIVE = {"enabled": True, "idle": 10, "interval": 3, "count": 3}
+
+
+class PLCReconnectingError(RuntimeError):
+    """La conexión se perdió y el supervisor está reconectando en segundo plano."""
+
+
+class PLCTrafficRecorder:
+    """
+    Grabador de tramas enviadas y recibidas en un archivo binario de solo anexado.
+
+    Formato: cabecera `<4sHxxd` (magic, versión, epoch de inicio) seguida de
+    registros `<dBH` (segundos monotónicos desde el inicio, dirección, longitud)
+    más la trama. Al superar `max_bytes` el archivo se rota a `<path>.1`, ... hasta
+    `backups` copias (también al arrancar si ya existe una sesión anterior); un
+    registro incompleto al final (corte de energía) se ignora al leer.
+    """
+
+    MAGIC = b'PLCR'
+    VERSION = 1
+    SENT = 0
+    RECEIVED = 1
+    _HEADER = struct.Struct('<4sHxxd')
+    _RECORD = struct.Struct('<dBH')
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backups: int = 1):
+        """
+        Args:
+            path: Ruta del archivo de grabación
+            max_bytes: Tamaño máximo de cada archivo antes de rotar
+            backups: Archivos rotados que se conservan
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._file = None
+        self._size = 0
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._shift_backups()  # Conservar la sesión anterior
+        self._open()
+
+    @classmethod
+    def from_config(cls, value: Union[str, Dict[str, Any], None]) -> "PLCTrafficRecorder":
+        """Crea un grabador desde la clave 'traffic_recording' (ruta o diccionario)."""
+        if not value:
+            return None
+        if isinstance(value, str):
+            return cls(value)
+        return cls(value["path"], max_bytes=value.get("max_bytes", 10 * 1024 * 1024),
+                   backups=value.get("backups", 1))
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Cada archivo es una sesión: el tiempo relativo parte de su cabecera
+        self._file = open(self.path, 'wb')
+        self._start = time.monotonic()
+        self._file.write(self._HEADER.pack(self.MAGIC, self.VERSION, time.time()))
+        self._size = self._HEADER.size
+
+    def _rotate(self):
+        self._file.close()
+        self._shift_backups()
+        self._open()
+
+    def _shift_backups(self):
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+
+    def record(self, direction: int, data: bytes):
+        """Anexa una trama (SENT o RECEIVED) con su marca de tiempo monotónica."""
+        with self._lock:
+            if self._file is None:
+                return
+            entry = self._RECORD.pack(time.monotonic() - self._start, direction,
+                                      len(data)) + data
+            if self._size + len(entry) > self.max_bytes:
+                self._rotate()
+            self._file.write(entry)
+            # Se vacía en cada trama para no perder el final si el proceso muere
+            self._file.flush()
+            self._size += len(entry)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    @classmethod
+    def read(cls, path: str) -> Iterator[Tuple[float, int, bytes]]:
+        """
+        Recorre una grabación.
+
+        Yields:
+            Tuplas (segundos desde el inicio, dirección, trama).
+
+        Raises:
+            ValueError: Si el archivo no es una grabación de tráfico
+        """
+        with open(path, 'rb') as f:
+            header = f.read(cls._HEADER.size)
+            if len(header) < cls._HEADER.size:
+                raise ValueError(f"'{path}' no es una grabación de tráfico PLC")
+            magic, version, _started = cls._HEADER.unpack(header)
+            if magic != cls.MAGIC or version != cls.VERSION:
+                raise ValueError(f"'{path}' no es una grabación de tráfico PLC")
+            while True:
+                raw = f.read(cls._RECORD.size)
+                if len(raw) < cls._RECORD.size:
+                    return
+                timestamp, direction, length = cls._RECORD.unpack(raw)
+                data = f.read(length)
+                if len(data) < length:
+                    return
+                yield timestamp, direction, data
 
 
 class PLC:
@@ -21,126 +157,384 @@ class PLC:
     Encapsula la lógica de comunicación con el PLC Delta AS Series.
     """
 
-    def __init__(self, ip: str, port: int):
+    def __init__(self, ip: str, port: int, keepalive: Dict[str, Any] = None,
+                 nodelay: bool = True, persistent: bool = False,
+                 heartbeat_interval: float = None, timeout_floor: float = 0.2,
+                 timeout_ceiling: float = 5.0, base_backoff: float = 0.5,
+                 recorder: PLCTrafficRecorder = None, machine_id: str = None):
         """
         Inicializa el cliente TCP/IP para el PLC.
 
         Args:
             ip: Dirección IP del PLC (ej: '192.168.1.100').
             port: Puerto de comunicación (típicamente 5000).
+            keepalive: Opciones de keepalive TCP (enabled, idle, interval, count)
+                que se combinan con DEFAULT_KEEPALIVE.
+            nodelay: Activa TCP_NODELAY (los comandos son de 1-2 bytes).
+            persistent: Mantiene la conexión abierta al salir de un bloque 'with'.
+            heartbeat_interval: Segundos de inactividad tras los que se envía un
+                comando STATUS de latido (solo con conexión persistente).
+            timeout_floor: Plazo mínimo de respuesta en segundos.
+            timeout_ceiling: Plazo máximo de respuesta y de conexión en segundos.
+            base_backoff: Espera inicial del supervisor de reconexión.
+            recorder: Grabador opcional de todas las tramas intercambiadas.
+            machine_id: Etiqueta de la máquina en las métricas (por defecto ip:puerto).
         """
         self.ip = ip
         self.port = port
+        self.machine_id = machine_id or f"{ip}:{port}"
         self.sock = None
-        self.timeout = 5.0  # Timeout en segundos [[8]]
+        self.timeout = timeout_ceiling  # Timeout de conexión en segundos [[8]]
+        # Plazo de respuesta adaptativo según la latencia observada
+        self.latency = LatencyEstimator(timeout_floor, timeout_ceiling)
+        self._sent_at = None
+        self._arrived_at = None
+        self.recorder = recorder
+        self.keepalive = {**DEFAULT_KEEPALIVE, **(keepalive or {})}
+        self.nodelay = nodelay
+        self.persistent = persistent
+        self.heartbeat_interval = heartbeat_interval
+        self._io_lock = threading.RLock()
+        self._last_activity = time.monotonic()
+        self._heartbeat_stop = threading.Event()
+        self._heartbeat_thread = None
         self.logger = logging.getLogger(__name__)
-        self.max_retries = 3
-        self.base_backoff = 0.5  # segundos
+        self.base_backoff = base_backoff  # segundos
+        self.max_backoff = 30.0  # tope del backoff del supervisor
+        # disconnected | connected | reconnecting
+        self.connection_state = "disconnected"
+        self._conn_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._reconnect_thread = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "PLC":
+        """
+        Crea un PLC a partir de una entrada de configuración.
+
+        Claves opcionales: keepalive, nodelay, persistent_connection,
+        heartbeat_interval, timeout_floor, timeout_ceiling, base_backoff,
+        traffic_recording (ruta o {path, max_bytes, backups}).
+        """
+        return cls(config["ip"], config["port"],
+                   keepalive=config.get("keepalive"),
+                   nodelay=config.get("nodelay", True),
+                   persistent=config.get("persistent_connection", False),
+                   heartbeat_interval=config.get("heartbeat_interval"),
+                   timeout_floor=config.get("timeout_floor", 0.2),
+                   timeout_ceiling=config.get("timeout_ceiling", 5.0),
+                   base_backoff=config.get("base_backoff", 0.5),
+                   recorder=PLCTrafficRecorder.from_config(
+                       config.get("traffic_recording")),
+                   machine_id=config.get("id"))
 
     def __enter__(self):
         """Permite uso con 'with' para gestión automática de recursos"""
-        self.connect()
+        # El bloque 'with' es un intercambio completo: el latido no lo interrumpe
+        with tracing.span("plc.io_lock"):
+            self._io_lock.acquire()
+        try:
+            self.connect()
+        except BaseException:
+            self._io_lock.release()
+            raise
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Cierra conexión al salir del bloque 'with'"""
-        self.close()
+        """Cierra conexión al salir del bloque 'with' (salvo conexión persistente)"""
+        try:
+            if not self.persistent:
+                self.close()
+        finally:
+            self._io_lock.release()
 
     def connect(self) -> bool:
         """
-        Establece conexión TCP/IP con el PLC con reintentos y backoff exponencial.
+        Establece conexión TCP/IP con el PLC sin bloquear en reintentos.
+
+        Si ya hay un supervisor reconectando retorna False de inmediato. Si el
+        único intento directo falla, la reconexión continúa en segundo plano.
+
         Returns:
-            True si la conexión es exitosa, False en caso contrario.
+            True si hay conexión activa, False en caso contrario.
         """
         if self.sock:
             return True  # Ya conectado
+        if self.is_reconnecting():
+            return False
+        try:
+            with tracing.span("plc.connect"):
+                sock = self._open_socket()
+        except OSError as e:
+            self.logger.warning(
+                f"Error de conexión con el PLC {self.ip}:{self.port}: {str(e)}")
+            self._start_reconnect()
+            return False
+        with self._conn_lock:
+            if self.sock is None:
+                self.sock = sock
+            else:
+                sock.close()
+        self.connection_state = "connected"
+        self._last_activity = time.monotonic()
+        self._start_heartbeat()
+        self.logger.info("Conexión establecida con el PLC en %s:%s", self.ip, self.port)
+        return True
+
+    def _open_socket(self) -> socket.socket:
+        """Abre un socket conectado al PLC (un único intento)."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            self._configure_socket(sock)
+            sock.connect((self.ip, self.port))
+        except OSError:
+            sock.close()
+            raise
+        return sock
 
-        for attempt in range(1, self.max_retries + 1):
+    def _configure_socket(self, sock: socket.socket):
+        """Aplica TCP_NODELAY y keepalive TCP según la plataforma."""
+        if self.nodelay:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if not self.keepalive.get("enabled", True):
+            return
+        idle = int(self.keepalive["idle"])
+        interval = int(self.keepalive["interval"])
+        count = int(self.keepalive["count"])
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if hasattr(socket, "SIO_KEEPALIVE_VALS"):
+            # Windows: (activado, inactividad ms, intervalo ms)
+            sock.ioctl(socket.SIO_KEEPALIVE_VALS,
+                       (1, idle * 1000, interval * 1000))
+        elif hasattr(socket, "TCP_KEEPIDLE"):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle)
+        elif hasattr(socket, "TCP_KEEPALIVE"):
+            # macOS usa TCP_KEEPALIVE para el tiempo de inactividad
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, idle)
+        if hasattr(socket, "TCP_KEEPINTVL"):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval)
+        if hasattr(socket, "TCP_KEEPCNT"):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, count)
+
+    def _start_heartbeat(self):
+        """Arranca el hilo de latido si la conexión es persistente y está configurado."""
+        if not (self.persistent and self.heartbeat_interval):
+            return
+        thread = self._heartbeat_thread
+        if thread is not None and thread.is_alive():
+            return
+        self._heartbeat_stop.clear()
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat_loop,
+            name=f"plc-heartbeat-{self.ip}:{self.port}", daemon=True)
+        self._heartbeat_thread.start()
+
+    def _heartbeat_loop(self):
+        """Envía STATUS en los periodos de inactividad para detectar enlaces muertos."""
+        while not self._heartbeat_stop.wait(self.heartbeat_interval / 2):
+            if time.monotonic() - self._last_activity < self.heartbeat_interval:
+                continue
+            if not self._io_lock.acquire(blocking=False):
+                continue  # Hay un intercambio en curso
             try:
-                self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                self.sock.settimeout(self.timeout)
-                self.sock.connect((self.ip, self.port))
-                self.logger.info(
-                    f"Conexión establecida con el PLC en {self.ip}:{self.port}")
-                return True
-            except (socket.timeout, ConnectionRefusedError, OSError) as e:
+                if self.sock is None:
+                    if not self.is_reconnecting():
+                        self.connect()
+                    continue
+                self.send_command(0)
+                self.receive_response()
+                self.logger.debug(
+                    f"Latido OK con el PLC {self.ip}:{self.port}")
+            except RuntimeError as e:
+                # _connection_lost ya lanzó el supervisor de reconexión
                 self.logger.warning(
-                    f"Intento {attempt}: Error de conexión con el PLC: {str(e)}")
-                self.close()
-                if attempt < self.max_retries:
-                    backoff = self.base_backoff * \
-                        (2 ** (attempt - 1)) + random.uniform(0, 0.2)
-                    time.sleep(backoff)
-        self.logger.error(
-            f"No se pudo conectar al PLC tras {self.max_retries} intentos.")
-        return False
+                    f"Latido fallido con el PLC {self.ip}:{self.port}: {str(e)}")
+            finally:
+                self._io_lock.release()
+
+    def is_reconnecting(self) -> bool:
+        """True si el supervisor de reconexión está activo."""
+        thread = self._reconnect_thread
+        return thread is not None and thread.is_alive()
+
+    def _start_reconnect(self):
+        """Arranca el supervisor de reconexión si no está ya en marcha."""
+        with self._conn_lock:
+            if self.is_reconnecting():
+                return
+            self.connection_state = "reconnecting"
+            self._stop_event.clear()
+            self._reconnect_thread = threading.Thread(
+                target=self._reconnect_loop,
+                name=f"plc-reconnect-{self.ip}:{self.port}", daemon=True)
+            self._reconnect_thread.start()
+
+    def _reconnect_loop(self):
+        """Reintenta la conexión con backoff exponencial hasta lograrlo o detenerse."""
+        attempt = 0
+        while not self._stop_event.is_set():
+            attempt += 1
+            try:
+                sock = self._open_socket()
+            except OSError as e:
+                backoff = min(self.max_backoff,
+                              self.base_backoff * (2 ** (attempt - 1))) + random.uniform(0, 0.2)
+                self.logger.warning(
+                    f"Reconexión {attempt} con el PLC {self.ip}:{self.port} fallida: "
+                    f"{str(e)}; nuevo intento en {backoff:.1f}s")
+                if self._stop_event.wait(backoff):
+                    break
+                continue
+            with self._conn_lock:
+                if self.sock is None:
+                    self.sock = sock
+                else:
+                    sock.close()
+            self.connection_state = "connected"
+            self._last_activity = time.monotonic()
+            self._start_heartbeat()
+            PLC_RECONNECTS.labels(self.machine_id).inc()
+            self.logger.info(
+                f"Reconexión con el PLC {self.ip}:{self.port} exitosa tras {attempt} intentos")
+            return
+        if self.sock is None:
+            self.connection_state = "disconnected"
+
+    def _connection_lost(self, error: Exception, action: str):
+        """Cierra el socket roto, lanza el supervisor y avisa al llamador de inmediato."""
+        self.logger.warning(
+            f"Error {action} el PLC {self.ip}:{self.port}: {str(error)}")
+        self.close()
+        self._start_reconnect()
+        raise PLCReconnectingError(
+            f"Conexión con el PLC perdida ({str(error)}); reconectando en segundo plano")
 
     def close(self):
         """Cierra la conexión de forma segura"""
-        if self.sock:
+        with self._conn_lock:
+            sock, self.sock = self.sock, None
+        if sock:
             try:
-                self.sock.shutdown(socket.SHUT_RDWR)
-                self.sock.close()
+                sock.shutdown(socket.SHUT_RDWR)
+                sock.close()
             except OSError:
                 pass  # Ignorar errores si ya estaba cerrado
-            finally:
-                self.sock = None
+        if not self.is_reconnecting():
+            self.connection_state = "disconnected"
+
+    def shutdown(self):
+        """Detiene el supervisor de reconexión y el latido, y cierra la conexión."""
+        self._stop_event.set()
+        self._heartbeat_stop.set()
+        for thread in (self._reconnect_thread, self._heartbeat_thread):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout=1.0)
+        self.close()
+        if self.recorder is not None:
+            self.recorder.close()
 
     def send_command(self, command: int, argument: int = None) -> bool:
         """
-        Envía un comando al PLC con reintentos y backoff exponencial.
+        Envía un comando al PLC.
+
+        Raises:
+            PLCReconnectingError: Si la conexión se perdió o se está restableciendo
         """
         validar_comando(command)
         if argument is not None:
             validar_argumento(argument)
         if not self.sock:
+            if self.is_reconnecting():
+                raise PLCReconnectingError(
+                    f"Reconectando con el PLC en {self.ip}:{self.port}")
             raise RuntimeError("No hay conexión activa con el PLC")
-        for attempt in range(1, self.max_retries + 1):
-            try:
-                data = struct.pack('B', command)
-                if argument is not None:
-                    data += struct.pack('B', argument)
+        data = struct.pack('B', command)
+        if argument is not None:
+            data += struct.pack('B', argument)
+        try:
+            with tracing.span("plc.send"):
+                self.sock.settimeout(self.timeout)
                 self.sock.sendall(data)
-                return True
-            except (socket.timeout, BrokenPipeError, OSError) as e:
-                self.logger.warning(
-                    f"Intento {attempt}: Error enviando datos al PLC: {str(e)}")
-                self.close()
-                if attempt < self.max_retries:
-                    if self.connect():
-                        backoff = self.base_backoff * \
-                            (2 ** (attempt - 1)) + random.uniform(0, 0.2)
-                        time.sleep(backoff)
-                        continue
-                raise RuntimeError(f"Error enviando datos: {str(e)}")
+            self._last_activity = self._sent_at = time.monotonic()
+            self._arrived_at = None
+            PLC_COMMANDS.labels(self.machine_id, command).inc()
+            if self.recorder is not None:
+                self.recorder.record(PLCTrafficRecorder.SENT, data)
+            return True
+        except (socket.timeout, BrokenPipeError, OSError) as e:
+            self._connection_lost(e, "enviando datos a")
+
+    def wait_response(self, timeout: float = None) -> bool:
+        """
+        Espera a que llegue la respuesta del último comando sin leerla.
+
+        Anota el instante de llegada para la muestra de latencia: si el llamador
+        hace una pausa antes de receive_response, la pausa no cuenta.
+
+        Args:
+            timeout: Segundos máximos de espera; por defecto lo que queda del
+                plazo adaptativo contado desde el envío
+
+        Returns:
+            True si la respuesta está lista para leerse
+        """
+        sock, sent_at = self.sock, self._sent_at
+        if sock is None or sent_at is None:
+            return False
+        if timeout is None:
+            timeout = max(0.0, sent_at + self.latency.timeout() - time.monotonic())
+        try:
+            readable, _, _ = select.select([sock], [], [], timeout)
+        except (OSError, ValueError):
+            return False  # receive_response informará del error
+        if readable and self._arrived_at is None:
+            self._arrived_at = time.monotonic()
+        return bool(readable)
 
     def receive_response(self) -> dict:
         """
-        Recibe respuesta del PLC (2 bytes: estado y posición) con reintentos y backoff exponencial.
+        Recibe respuesta del PLC (2 bytes: estado y posición).
+
+        El plazo se cuenta desde el envío del comando y sale del estimador de
+        latencia de la máquina (nunca menor que el piso configurado). La
+        latencia se mide hasta la llegada anotada por wait_response, o hasta
+        la lectura si no se llamó.
+
+        Raises:
+            PLCReconnectingError: Si la conexión se perdió o se está restableciendo
         """
         if not self.sock:
+            if self.is_reconnecting():
+                raise PLCReconnectingError(
+                    f"Reconectando con el PLC en {self.ip}:{self.port}")
             raise RuntimeError("No hay conexión activa")
-        for attempt in range(1, self.max_retries + 1):
-            try:
+        sent_at = self._sent_at if self._sent_at is not None else time.monotonic()
+        arrived_at, self._sent_at, self._arrived_at = self._arrived_at, None, None
+        try:
+            remaining = sent_at + self.latency.timeout() - time.monotonic()
+            self.sock.settimeout(max(self.latency.floor, remaining))
+            with tracing.span("plc.receive"):
                 data = self.sock.recv(2)
-                if len(data) < 2:
-                    raise RuntimeError("Respuesta incompleta del PLC")
-                status, position = struct.unpack('BB', data)
-                return {
-                    'status_code': status,
-                    'position': position
-                }
-            except (socket.timeout, struct.error, OSError) as e:
-                self.logger.warning(
-                    f"Intento {attempt}: Error recibiendo datos del PLC: {str(e)}")
-                self.close()
-                if attempt < self.max_retries:
-                    if self.connect():
-                        backoff = self.base_backoff * \
-                            (2 ** (attempt - 1)) + random.uniform(0, 0.2)
-                        time.sleep(backoff)
-                        continue
-                raise RuntimeError(f"Error recibiendo datos: {str(e)}")
+            if len(data) < 2:
+                raise OSError("Respuesta incompleta del PLC")
+            self._last_activity = time.monotonic()
+            elapsed = (arrived_at or self._last_activity) - sent_at
+            self.latency.record(elapsed)
+            PLC_EXCHANGE_SECONDS.labels(self.machine_id).observe(elapsed)
+            if self.recorder is not None:
+                self.recorder.record(PLCTrafficRecorder.RECEIVED, data)
+            status, position = struct.unpack('BB', data)
+            return {
+                'status_code': status,
+                'position': position
+            }
+        except socket.timeout as e:
+            self.latency.record_timeout()
+            PLC_TIMEOUTS.labels(self.machine_id).inc()
+            self._connection_lost(e, "recibiendo datos de")
+        except (struct.error, OSError) as e:
+            self._connection_lost(e, "recibiendo datos de")
 
     def get_current_status(self) -> dict:
         """
@@ -151,11 +545,12 @@ class PLC:
             Si ocurre un error, retorna {'error': <mensaje>}.
         """
         try:
-            if not self.sock:
-                self.connect()
-            self.send_command(0)  # Comando STATUS
-            time.sleep(0.2)  # Pequeña espera para respuesta
-            response = self.receive_response()
+            with self._io_lock:
+                if not self.sock:
+                    self.connect()
+                self.send_command(0)  # Comando STATUS
+                # recv espera la respuesta con el plazo adaptativo
+                response = self.receive_response()
             return response
         except Exception as e:
             self.logger.error(f"Error en get_current_status: {str(e)}")
@@ -15,9 +15,13 @@ import time
 import threading
 from typing import Dict, List, Optional, Any
 from datetime import datetime
+from commons import tracing
+from commons.log_pipeline import SampledLogFilter, async_handler
+from commons.metrics import REACTOR_QUEUE_DEPTH
 from models.plc import PLC
-from models.plc_simulator import PLCSimulator
+from models.circuit_breaker import CircuitBreaker, CircuitOpenError
 from controllers.carousel_controller import CarouselController
+from controllers.rotation_planner import RotationPlanner
 import os
 from logging.handlers import RotatingFileHandler
 
@@ -28,29 +32,89 @@ class PLCManager:
     Permite operaciones por ID de máquina y mantiene registro de conexiones.
     """
 
-    def __init__(self, plc_configs: List[Dict[str, Any]]):
+    def __init__(self, plc_configs: List[Dict[str, Any]], transport: str = "blocking",
+                 fault_profiles: Dict[str, Dict[str, Any]] = None,
+                 default_fault_profile: str = None, fleet: Dict[str, Any] = None,
+                 health_stale_after: float = 30.0, deep_health_interval: float = 10.0,
+                 status_log_sample_every: int = 1, journal=None,
+                 connect_timeout: float = 5.0):
         """
         Inicializa el gestor con configuraciones de múltiples PLCs.
 
         Args:
             plc_configs: Lista de configuraciones de PLC
                         [{"id": "machine_1", "ip": "192.168.1.50", "port": 3200, "name": "Carrusel Principal", "simulator": False}]
+            transport: "blocking" (un socket bloqueante por PLC) o "reactor"
+                       (todas las máquinas reales multiplexadas en un solo hilo)
+            fault_profiles: Perfiles de fallos con nombre para máquinas simuladas
+            default_fault_profile: Perfil aplicado a las máquinas simuladas sin
+                       'fault_profile' propio
+            fleet: Flota simulada {'count', 'id_prefix', 'bucket_count',
+                       'bucket_interval', 'seed'} que se añade a plc_configs
+            health_stale_after: Segundos sin una respuesta correcta tras los que
+                       health_check() considera obsoleta una máquina
+            deep_health_interval: Segundos mínimos entre dos sondeos reales de
+                       health_check(deep=True); entre tanto se reutiliza el último
+            status_log_sample_every: Escribe 1 de cada N líneas STATUS_REQUEST /
+                       STATUS_RESPONSE por máquina (los errores siempre se escriben)
+            journal: OperationsJournal que registra cada comando enviado a las
+                       máquinas; se cierra con close_all_connections()
+            connect_timeout: Plazo en segundos para establecer la conexión TCP
+                       con cada máquina en el transporte "reactor"
         """
-        self.plc_configs = plc_configs
+        if transport not in ("blocking", "reactor"):
+            raise ValueError(f"Transporte de PLC desconocido: {transport}")
+        self.plc_configs = list(plc_configs)
+        self.fleet = None
+        if fleet:
+            from models.fleet_simulator import FleetSimulator
+            self.fleet = FleetSimulator.from_config(fleet)
+            self.plc_configs += self.fleet.machine_configs(
+                fleet.get("id_prefix", "fleet_"))
+        self.transport = transport
+        self.connect_timeout = connect_timeout
+        self.fault_profiles = fault_profiles or {}
+        self.default_fault_profile = default_fault_profile
+        self.journal = journal
+        self.reactor = None
         self.plc_instances: Dict[str, PLC] = {}
         self.controllers: Dict[str, CarouselController] = {}
         self.connection_locks: Dict[str, threading.Lock] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.probe_interval = 1.0  # segundos entre revisiones del sondeo de recuperación
+        self._probe_thread: Optional[threading.Thread] = None
+        self._probe_lock = threading.Lock()
+        # Marcas de tiempo (time.time()) de la última respuesta correcta y del
+        # último fallo de cada máquina; la salud se deriva de ellas sin tocar el PLC
+        self.last_success: Dict[str, float] = {}
+        self.last_failure: Dict[str, float] = {}
+        self.health_stale_after = health_stale_after
+        self.deep_health_interval = deep_health_interval
+        self._deep_health_lock = threading.Lock()
+        self._deep_health: Optional[Dict[str, Any]] = None
+        self._deep_health_at = float('-inf')
         self.logger = logging.getLogger(__name__)
 
         # Logger específico para conexiones de clientes
-        self._setup_connection_logger()
+        self._setup_connection_logger(status_log_sample_every)
 
         # Inicializar PLCs
         self._initialize_plcs()
 
-    def _setup_connection_logger(self):
-        """Configura el logger específico para conexiones de clientes."""
+    def _setup_connection_logger(self, sample_every: int = 1):
+        """
+        Configura el logger específico para conexiones de clientes.
+
+        El archivo se escribe desde el hilo del pipeline asíncrono, nunca desde
+        el hilo de la petición.
+        """
         self.connection_logger = logging.getLogger("client_connections")
+        sampler = next((f for f in self.connection_logger.filters
+                        if isinstance(f, SampledLogFilter)), None)
+        if sampler is None:
+            sampler = SampledLogFilter()
+            self.connection_logger.addFilter(sampler)
+        sampler.every = sample_every
         if not self.connection_logger.hasHandlers():
             log_folder = os.path.join(
                 os.getenv('LOCALAPPDATA', '.'), 'Vertical PIC', 'logs')
@@ -61,37 +125,165 @@ class PLCManager:
             formatter = logging.Formatter(
                 '%(asctime)s | %(levelname)s | %(message)s')
             handler.setFormatter(formatter)
-            self.connection_logger.addHandler(handler)
+            self.connection_logger.addHandler(async_handler(handler))
             self.connection_logger.setLevel(logging.INFO)
 
     def _initialize_plcs(self):
         """Inicializa todas las instancias de PLC según la configuración."""
+        if self.transport == "reactor":
+            from models.plc_reactor import PLCReactor
+            self.reactor = PLCReactor(connect_timeout=self.connect_timeout)
+            self.reactor.start()
+            REACTOR_QUEUE_DEPTH.set_function(self.reactor.pending_count)
         for config in self.plc_configs:
             machine_id = config["id"]
             try:
                 # Crear instancia de PLC (real o simulador)
-                if config.get("simulator", False):
-                    plc_instance = PLCSimulator(config["ip"], config["port"])
+                if config.get("fleet_index") is not None:
+                    from models.fleet_simulator import FleetPLC
+                    plc_instance = FleetPLC(
+                        self.fleet, config["fleet_index"], config["ip"], config["port"])
+                elif config.get("simulator", False):
+                    # Import diferido: solo se carga si hay máquinas simuladas
+                    from models.plc_simulator import PLCSimulator
+                    if self.default_fault_profile and "fault_profile" not in config:
+                        config = {**config, "fault_profile": self.default_fault_profile}
+                    plc_instance = PLCSimulator.from_config(
+                        config, self.fault_profiles)
+                elif config.get("replay_file"):
+                    from models.plc_replay import ReplayPLC
+                    plc_instance = ReplayPLC.from_config(config)
+                elif self.reactor is not None:
+                    from models.plc_reactor import ReactorPLC
+                    plc_instance = ReactorPLC(
+                        self.reactor, config["ip"], config["port"],
+                        timeout_floor=config.get("timeout_floor", 0.2),
+                        timeout_ceiling=config.get("timeout_ceiling", 5.0),
+                        machine_id=machine_id)
                 else:
-                    plc_instance = PLC(config["ip"], config["port"])
+                    plc_instance = PLC.from_config(config)
 
                 # Crear controlador para este PLC
-                controller = CarouselController(plc_instance)
+                controller = CarouselController(
+                    plc_instance, machine_id=machine_id, journal=self.journal,
+                    planner=RotationPlanner.from_config(config))
+                if config.get("fleet_index") is not None:
+                    controller.response_delay = 0  # Respuesta inmediata en memoria
 
                 # Almacenar referencias
                 self.plc_instances[machine_id] = plc_instance
                 self.controllers[machine_id] = controller
                 self.connection_locks[machine_id] = threading.Lock()
+                self.breakers[machine_id] = CircuitBreaker(
+                    **config.get("circuit_breaker", {}))
 
-                self.logger.info(
-                    f"PLC inicializado: {machine_id} ({config.get('name', 'Sin nombre')}) "
-                    f"- IP: {config['ip']}:{config['port']} "
-                    f"- Modo: {'Simulador' if config.get('simulator') else 'Real'}")
+                if config.get("fleet_index") is None:
+                    self.logger.info(
+                        f"PLC inicializado: {machine_id} ({config.get('name', 'Sin nombre')}) "
+                        f"- IP: {config['ip']}:{config['port']} "
+                        f"- Modo: {'Simulador' if config.get('simulator') else 'Real'}")
 
             except Exception as e:
                 self.logger.error(
                     f"Error inicializando PLC {machine_id}: {str(e)}")
                 raise
+        if self.fleet is not None:
+            self.logger.info(
+                f"Flota simulada inicializada: {self.fleet.count} máquinas virtuales")
+
+    def _call_with_breaker(self, machine_id: str, operation, *args):
+        """
+        Ejecuta una operación sobre la máquina protegida por su circuit breaker.
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto (sin contactar el PLC)
+        """
+        breaker = self.breakers[machine_id]
+        if not breaker.allow_request():
+            raise CircuitOpenError(
+                f"Máquina '{machine_id}' no disponible (circuito abierto, "
+                f"próximo intento en {breaker.retry_in():.1f}s)")
+        lock = self.connection_locks[machine_id]
+        try:
+            with tracing.span("manager.lock_wait", machine=machine_id):
+                lock.acquire()
+            try:
+                result = operation(*args)
+            finally:
+                lock.release()
+        except ValueError:
+            breaker.cancel_request()  # Error de validación: no dice nada del PLC
+            raise
+        except Exception as e:
+            self.last_failure[machine_id] = time.time()
+            breaker.record_failure(str(e))
+            if breaker.state == CircuitBreaker.OPEN:
+                self.logger.warning(
+                    f"Circuito abierto para {machine_id} tras fallo: {str(e)}")
+                self._ensure_probe_thread()
+            raise
+        self.last_success[machine_id] = time.time()
+        breaker.record_success()
+        return result
+
+    def _ensure_probe_thread(self):
+        """Arranca el hilo de sondeo de recuperación si no está activo."""
+        with self._probe_lock:
+            if self._probe_thread and self._probe_thread.is_alive():
+                return
+            self._probe_thread = threading.Thread(
+                target=self._probe_loop, name="plc-breaker-probe", daemon=True)
+            self._probe_thread.start()
+
+    def _probe_loop(self):
+        """Prueba en segundo plano las máquinas con circuito abierto hasta recuperarlas."""
+        while True:
+            open_machines = [mid for mid, breaker in self.breakers.items()
+                             if breaker.state != CircuitBreaker.CLOSED]
+            if not open_machines:
+                return
+            for machine_id in open_machines:
+                if self.breakers[machine_id].ready_for_probe():
+                    self.probe_machine(machine_id)
+            time.sleep(self.probe_interval)
+
+    def probe_machine(self, machine_id: str) -> bool:
+        """
+        Ejecuta la prueba de recuperación de una máquina (semiabierto).
+
+        Returns:
+            True si la máquina respondió y el circuito se cerró.
+        """
+        breaker = self.breakers[machine_id]
+        if not breaker.allow_request():
+            return False
+        lock = self.connection_locks[machine_id]
+        if not lock.acquire(blocking=False):
+            breaker.record_failure("Máquina ocupada durante la prueba")
+            return False
+        try:
+            self.controllers[machine_id].get_current_status()
+        except Exception as e:
+            self.last_failure[machine_id] = time.time()
+            breaker.record_failure(str(e))
+            self.logger.info(
+                f"Prueba de recuperación fallida para {machine_id}: {str(e)}")
+            return False
+        finally:
+            lock.release()
+        self.last_success[machine_id] = time.time()
+        breaker.record_success()
+        self.logger.info(f"Circuito cerrado para {machine_id}: máquina recuperada")
+        return True
+
+    def get_breaker_state(self, machine_id: str) -> Dict[str, Any]:
+        """Estado del circuit breaker de una máquina."""
+        return self.breakers[machine_id].snapshot()
+
+    def get_latency(self, machine_id: str) -> Optional[Dict[str, Any]]:
+        """Latencia observada (p50/p99 y plazo actual) de una máquina, si se mide."""
+        latency = getattr(self.plc_instances.get(machine_id), "latency", None)
+        return latency.snapshot() if latency is not None else None
 
     def get_available_machines(self) -> List[Dict[str, Any]]:
         """
@@ -101,14 +293,24 @@ class PLCManager:
             Lista con información de todas las máquinas configuradas
         """
         machines = []
+        availability = {
+            CircuitBreaker.CLOSED: "available",
+            CircuitBreaker.HALF_OPEN: "recovering",
+            CircuitBreaker.OPEN: "unavailable"
+        }
         for config in self.plc_configs:
+            breaker = self.breakers.get(config["id"])
             machines.append({
                 "id": config["id"],
                 "name": config.get("name", "Sin nombre"),
                 "ip": config["ip"],
                 "port": config["port"],
                 "type": "Simulador" if config.get("simulator") else "Real PLC",
-                "status": "available"
+                "status": availability[breaker.state] if breaker else "available",
+                "circuit": breaker.snapshot() if breaker else None,
+                "connection": getattr(self.plc_instances.get(config["id"]),
+                                      "connection_state", None),
+                "latency": self.get_latency(config["id"])
             })
         return machines
 
@@ -131,24 +333,24 @@ class PLCManager:
 
         # Log de conexión
         self.connection_logger.info(
-            f"STATUS_REQUEST | Cliente: {client_ip or 'Unknown'} | "
-            f"Máquina: {machine_id} | Timestamp: {datetime.now().isoformat()}")
+            "STATUS_REQUEST | Cliente: %s | Máquina: %s",
+            client_ip or 'Unknown', machine_id, extra={"sample_key": machine_id})
 
         try:
-            with self.connection_locks[machine_id]:
-                result = self.controllers[machine_id].get_current_status()
+            result = self._call_with_breaker(
+                machine_id, self.controllers[machine_id].get_current_status)
 
             self.connection_logger.info(
-                f"STATUS_RESPONSE | Cliente: {client_ip or 'Unknown'} | "
-                f"Máquina: {machine_id} | Resultado: OK | "
-                f"Estado: {result.get('status', {}).get('READY', 'N/A')}")
+                "STATUS_RESPONSE | Cliente: %s | Máquina: %s | Resultado: OK | Estado: %s",
+                client_ip or 'Unknown', machine_id,
+                result.get('status', {}).get('READY', 'N/A'), extra={"sample_key": machine_id})
 
             return result
 
         except Exception as e:
             self.connection_logger.error(
-                f"STATUS_ERROR | Cliente: {client_ip or 'Unknown'} | "
-                f"Máquina: {machine_id} | Error: {str(e)}")
+                "STATUS_ERROR | Cliente: %s | Máquina: %s | Error: %s",
+                client_ip or 'Unknown', machine_id, e)
             raise
 
     def send_command_to_machine(self, machine_id: str, command: int,
@@ -173,28 +375,27 @@ class PLCManager:
 
         # Log de comando
         self.connection_logger.info(
-            f"COMMAND_REQUEST | Cliente: {client_ip or 'Unknown'} | "
-            f"Máquina: {machine_id} | Comando: {command} | "
-            f"Argumento: {argument} | Timestamp: {datetime.now().isoformat()}")
+            "COMMAND_REQUEST | Cliente: %s | Máquina: %s | Comando: %s | Argumento: %s",
+            client_ip or 'Unknown', machine_id, command, argument)
 
         try:
-            with self.connection_locks[machine_id]:
-                result = self.controllers[machine_id].send_command(
-                    command, argument, client_ip)
+            result = self._call_with_breaker(
+                machine_id, self.controllers[machine_id].send_command,
+                command, argument, client_ip)
 
             self.connection_logger.info(
-                f"COMMAND_RESPONSE | Cliente: {client_ip or 'Unknown'} | "
-                f"Máquina: {machine_id} | Comando: {command} | "
-                f"Argumento: {argument} | Resultado: OK | "
-                f"Nueva_posición: {result.get('position', 'N/A')}")
+                "COMMAND_RESPONSE | Cliente: %s | Máquina: %s | Comando: %s | "
+                "Argumento: %s | Resultado: OK | Nueva_posición: %s",
+                client_ip or 'Unknown', machine_id, command, argument,
+                result.get('position', 'N/A'))
 
             return result
 
         except Exception as e:
             self.connection_logger.error(
-                f"COMMAND_ERROR | Cliente: {client_ip or 'Unknown'} | "
-                f"Máquina: {machine_id} | Comando: {command} | "
-                f"Argumento: {argument} | Error: {str(e)}")
+                "COMMAND_ERROR | Cliente: %s | Máquina: %s | Comando: %s | "
+                "Argumento: %s | Error: %s",
+                client_ip or 'Unknown', machine_id, command, argument, e)
             raise
 
     def move_machine_to_position(self, machine_id: str, target_position: int,
@@ -204,7 +405,7 @@ class PLCManager:
 
         Args:
             machine_id: ID de la máquina
-            target_position: Posición objetivo (0-9)
+            target_position: Posición objetivo (0 a bucket_count - 1)
             client_ip: IP del cliente (para logging)
 
         Returns:
@@ -214,26 +415,24 @@ class PLCManager:
             raise ValueError(f"Máquina '{machine_id}' no encontrada")
 
         self.connection_logger.info(
-            f"MOVE_REQUEST | Cliente: {client_ip or 'Unknown'} | "
-            f"Máquina: {machine_id} | Posición_objetivo: {target_position}")
+            "MOVE_REQUEST | Cliente: %s | Máquina: %s | Posición_objetivo: %s",
+            client_ip or 'Unknown', machine_id, target_position)
 
         try:
-            with self.connection_locks[machine_id]:
-                result = self.controllers[machine_id].move_to_position(
-                    target_position)
+            result = self._call_with_breaker(
+                machine_id, self.controllers[machine_id].move_to_position,
+                target_position, client_ip)
 
             self.connection_logger.info(
-                f"MOVE_RESPONSE | Cliente: {client_ip or 'Unknown'} | "
-                f"Máquina: {machine_id} | Posición_objetivo: {target_position} | "
-                f"Resultado: OK")
+                "MOVE_RESPONSE | Cliente: %s | Máquina: %s | Posición_objetivo: %s | "
+                "Resultado: OK", client_ip or 'Unknown', machine_id, target_position)
 
             return result
 
         except Exception as e:
             self.connection_logger.error(
-                f"MOVE_ERROR | Cliente: {client_ip or 'Unknown'} | "
-                f"Máquina: {machine_id} | Posición_objetivo: {target_position} | "
-                f"Error: {str(e)}")
+                "MOVE_ERROR | Cliente: %s | Máquina: %s | Posición_objetivo: %s | "
+                "Error: %s", client_ip or 'Unknown', machine_id, target_position, e)
             raise
 
     def get_machine_info(self, machine_id: str) -> Optional[Dict[str, Any]]:
@@ -257,50 +456,100 @@ class PLCManager:
                 }
         return None
 
+    def get_planner(self, machine_id: str) -> Optional[RotationPlanner]:
+        """Planificador de giro de la máquina (None si no existe)."""
+        controller = self.controllers.get(machine_id)
+        return controller.planner if controller is not None else None
+
     def close_all_connections(self):
         """Cierra todas las conexiones de PLC de forma segura."""
         for machine_id, plc in self.plc_instances.items():
             try:
-                plc.close()
+                # shutdown() además detiene el supervisor de reconexión del PLC real
+                if hasattr(plc, "shutdown"):
+                    plc.shutdown()
+                else:
+                    plc.close()
                 self.logger.info(
                     f"Conexión cerrada para máquina: {machine_id}")
             except Exception as e:
                 self.logger.error(
                     f"Error cerrando conexión para máquina {machine_id}: {str(e)}")
+        if self.reactor is not None:
+            self.reactor.stop()
+        if self.journal is not None:
+            self.journal.close()
 
-    def health_check(self) -> Dict[str, Any]:
+    def health_check(self, deep: bool = False) -> Dict[str, Any]:
         """
         Verifica el estado de salud de todas las máquinas.
 
+        Por defecto no contacta ningún PLC: la salud se deriva del estado del
+        circuit breaker y de la última respuesta correcta registrada (el monitor
+        consulta cada máquina periódicamente), de modo que el sondeo de un
+        balanceador cuesta microsegundos. Con deep=True se consulta cada máquina,
+        como máximo una vez cada `deep_health_interval` segundos; las peticiones
+        dentro de esa ventana reciben el último resultado.
+
+        Args:
+            deep: Consultar realmente cada PLC (limitado en frecuencia)
+
         Returns:
             Diccionario con estado de salud de cada máquina
         """
-        health_status = {
+        if deep:
+            return self._deep_health_check()
+
+        now = time.time()
+        health_status = self._new_health_report("cached")
+        for machine_id in self.controllers.keys():
+            breaker = self.breakers[machine_id]
+            last_ok = self.last_success.get(machine_id)
+            last_error = self.last_failure.get(machine_id)
+            if breaker.state != CircuitBreaker.CLOSED:
+                status = "unhealthy"
+            elif last_ok is None:
+                status = "unknown" if last_error is None else "unhealthy"
+            elif now - last_ok > self.health_stale_after:
+                status = "stale"
+            else:
+                status = "healthy"
+            entry = {
+                "status": status,
+                "last_success": datetime.fromtimestamp(last_ok).isoformat() if last_ok else None,
+                "age_s": round(now - last_ok, 3) if last_ok else None,
+                "circuit": breaker.snapshot(),
+                "latency": self.get_latency(machine_id)
+            }
+            if breaker.last_error:
+                entry["error"] = breaker.last_error
+            health_status["machines"][machine_id] = entry
+            self._count_health(health_status, status)
+        return self._finish_health_report(health_status)
+
+    def _new_health_report(self, mode: str) -> Dict[str, Any]:
+        return {
             "overall_status": "healthy",
+            "mode": mode,
+            "generated_at": datetime.now().isoformat(),
             "machines": {},
             "total_machines": len(self.plc_configs),
             "healthy_machines": 0,
-            "unhealthy_machines": 0
+            "unhealthy_machines": 0,
+            "unknown_machines": 0
         }
 
-        for machine_id in self.controllers.keys():
-            try:
-                # Intentar obtener estado sin logging detallado
-                status = self.controllers[machine_id].get_current_status()
-                health_status["machines"][machine_id] = {
-                    "status": "healthy",
-                    "last_check": datetime.now().isoformat(),
-                    "position": status.get("position", "unknown")
-                }
-                health_status["healthy_machines"] += 1
-            except Exception as e:
-                health_status["machines"][machine_id] = {
-                    "status": "unhealthy",
-                    "last_check": datetime.now().isoformat(),
-                    "error": str(e)
-                }
-                health_status["unhealthy_machines"] += 1
-
+    @staticmethod
+    def _count_health(health_status: Dict[str, Any], status: str):
+        if status == "healthy":
+            health_status["healthy_machines"] += 1
+        elif status == "unknown":
+            # Aún sin consultar (p. ej. recién arrancado): no degrada el estado
+            health_status["unknown_machines"] += 1
+        else:
+            health_status["unhealthy_machines"] += 1
+
+    def _finish_health_report(self, health_status: Dict[str, Any]) -> Dict[str, Any]:
         # Determinar estado general
         if health_status["unhealthy_machines"] > 0:
             if health_status["healthy_machines"] == 0:
@@ -308,4 +557,43 @@ class PLCManager:
             else:
                 health_status["overall_status"] = "degraded"
 
+        if self.fleet is not None:
+            health_status["fleet"] = self.fleet.stats()
+
         return health_status
+
+    def _deep_health_check(self) -> Dict[str, Any]:
+        """Consulta cada máquina; las peticiones concurrentes esperan y reutilizan el resultado."""
+        with self._deep_health_lock:
+            age = time.monotonic() - self._deep_health_at
+            if self._deep_health is not None and age < self.deep_health_interval:
+                return {**self._deep_health, "cached": True,
+                        "next_deep_in": round(self.deep_health_interval - age, 3)}
+
+            health_status = self._new_health_report("deep")
+            for machine_id in self.controllers.keys():
+                try:
+                    # Con el circuito abierto falla de inmediato sin contactar el PLC
+                    status = self._call_with_breaker(
+                        machine_id, self.controllers[machine_id].get_current_status)
+                    health_status["machines"][machine_id] = {
+                        "status": "healthy",
+                        "last_check": datetime.now().isoformat(),
+                        "position": status.get("position", "unknown"),
+                        "circuit": self.breakers[machine_id].snapshot(),
+                        "latency": self.get_latency(machine_id)
+                    }
+                    self._count_health(health_status, "healthy")
+                except Exception as e:
+                    health_status["machines"][machine_id] = {
+                        "status": "unhealthy",
+                        "last_check": datetime.now().isoformat(),
+                        "error": str(e),
+                        "circuit": self.breakers[machine_id].snapshot(),
+                        "latency": self.get_latency(machine_id)
+                    }
+                    self._count_health(health_status, "unhealthy")
+
+            self._deep_health = self._finish_health_report(health_status)
+            self._deep_health_at = time.monotonic()
+            return {**self._deep_health, "cached": False}
@@ -0,0 +1,410 @@
+"""
+Reactor de E/S basado en `selectors` para todos los PLCs.
+
+Un único hilo multiplexa los sockets no bloqueantes de todas las máquinas: los
+llamadores envían intercambios (comando → respuesta de N bytes) y reciben un
+`concurrent.futures.Future`. Cada intercambio tiene su propio plazo; si vence,
+el futuro falla con TimeoutError y la conexión se reinicia (el protocolo no
+permite correlacionar una respuesta tardía). Los intercambios de una misma
+máquina se serializan; los de máquinas distintas avanzan en paralelo.
+
+`ReactorPLC` adapta el reactor a la interfaz de `PLC` para que `PLCManager`
+pueda usarlo como transporte: el número de hilos no crece con la flota.
+
+Autor: IA Punto: Soluciones Tecnológicas
+Proyecto para: INDUSTRIAS PICO S.A.S
+Fecha de creación: 2025-07-28
+"""
+
+import errno
+import logging
+import selectors
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, wait
+from typing import Dict, Optional, Tuple
+
+from commons import tracing
+from commons.metrics import PLC_COMMANDS, PLC_EXCHANGE_SECONDS, PLC_TIMEOUTS
+from commons.utils import validar_comando, validar_argumento
+from models.latency_tracker import LatencyEstimator
+
+
+class _Exchange:
+    __slots__ = ("payload", "response_size", "deadline", "future", "sent_at")
+
+    def __init__(self, payload: bytes, response_size: int, deadline: float, future: Future):
+        self.payload = payload
+        self.response_size = response_size
+        self.deadline = deadline
+        self.future = future
+        self.sent_at: Optional[float] = None
+
+
+class _Endpoint:
+    """Estado de la conexión con una máquina dentro del reactor."""
+
+    def __init__(self, address: Tuple[str, int]):
+        self.address = address
+        self.sock: Optional[socket.socket] = None
+        self.state = "disconnected"  # disconnected | connecting | connected
+        self.connect_deadline: Optional[float] = None
+        self.queue = deque()
+        self.current: Optional[_Exchange] = None
+        self.out_buffer = b""
+        self.in_buffer = bytearray()
+
+
+class PLCReactor:
+    """
+    Bucle de eventos de un solo hilo para los intercambios con los PLCs.
+    """
+
+    def __init__(self, connect_timeout: float = 5.0, default_timeout: float = 5.0):
+        """
+        Args:
+            connect_timeout: Plazo para establecer la conexión TCP
+            default_timeout: Plazo por defecto de cada intercambio
+        """
+        self.connect_timeout = connect_timeout
+        self.default_timeout = default_timeout
+        self.logger = logging.getLogger(__name__)
+        self._selector = selectors.DefaultSelector()
+        self._endpoints: Dict[Tuple[str, int], _Endpoint] = {}
+        self._submissions = deque()
+        self._lock = threading.Lock()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def start(self):
+        """Arranca el hilo del reactor."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="plc-reactor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Detiene el reactor y falla los intercambios pendientes."""
+        self._running = False
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        for endpoint in self._endpoints.values():
+            self._reset(endpoint, ConnectionError("Reactor detenido"), fail_queue=True)
+
+    def submit(self, host: str, port: int, payload: bytes,
+               response_size: int = 2, timeout: float = None) -> Future:
+        """
+        Encola un intercambio con la máquina host:port.
+
+        Returns:
+            Future que se resuelve con los `response_size` bytes recibidos. Al
+            resolverse lleva `round_trip`: segundos desde que el comando terminó
+            de escribirse hasta la respuesta (sin la espera en cola).
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+        deadline = time.monotonic() + (timeout if timeout is not None else self.default_timeout)
+        with self._lock:
+            self._submissions.append(
+                ((host, port), _Exchange(payload, response_size, deadline, future)))
+        self._wake()
+        return future
+
+    def pending_count(self) -> int:
+        """Intercambios encolados o en curso (profundidad de cola)."""
+        with self._lock:
+            total = len(self._submissions)
+            endpoints = list(self._endpoints.values())
+        for endpoint in endpoints:
+            total += len(endpoint.queue) + (1 if endpoint.current else 0)
+        return total
+
+    def endpoint_state(self, host: str, port: int) -> str:
+        endpoint = self._endpoints.get((host, port))
+        return endpoint.state if endpoint else "disconnected"
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # Ya hay un despertar pendiente
+
+    # ------------------------------------------------------------------
+    # Bucle del reactor
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        while self._running:
+            self._drain_submissions()
+            self._expire_deadlines()
+            for events in self._selector.select(self._next_timeout()):
+                key, mask = events
+                if key.data is None:
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                    continue
+                endpoint = key.data
+                try:
+                    if mask & selectors.EVENT_WRITE:
+                        self._on_writable(endpoint)
+                    if mask & selectors.EVENT_READ and endpoint.sock is not None:
+                        self._on_readable(endpoint)
+                except OSError as e:
+                    self._reset(endpoint, ConnectionError(str(e)))
+                except Exception as e:
+                    # Un error inesperado de una máquina no debe detener el reactor
+                    self.logger.exception(
+                        "Reactor: error inesperado con %s:%s", *endpoint.address)
+                    self._reset(endpoint, e)
+
+    def _drain_submissions(self):
+        with self._lock:
+            submissions, self._submissions = self._submissions, deque()
+        for address, exchange in submissions:
+            endpoint = self._endpoints.get(address)
+            if endpoint is None:
+                with self._lock:
+                    endpoint = self._endpoints[address] = _Endpoint(address)
+            endpoint.queue.append(exchange)
+            self._advance(endpoint)
+
+    def _next_timeout(self) -> Optional[float]:
+        deadlines = []
+        for endpoint in self._endpoints.values():
+            if endpoint.state == "connecting":
+                deadlines.append(endpoint.connect_deadline)
+            if endpoint.current is not None:
+                deadlines.append(endpoint.current.deadline)
+            if endpoint.queue:
+                deadlines.append(endpoint.queue[0].deadline)
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - time.monotonic())
+
+    def _expire_deadlines(self):
+        now = time.monotonic()
+        for endpoint in self._endpoints.values():
+            if endpoint.state == "connecting" and endpoint.connect_deadline <= now:
+                # Sin esto el socket seguiría conectando hasta que el sistema se rinda
+                self._reset(endpoint, TimeoutError(
+                    f"Timeout conectando a {endpoint.address[0]}:{endpoint.address[1]}"),
+                    fail_queue=True)
+            current = endpoint.current
+            if current is not None and current.deadline <= now:
+                # Una respuesta tardía desincronizaría el flujo: se reinicia la conexión
+                self._reset(endpoint, TimeoutError(
+                    f"Timeout en intercambio con {endpoint.address[0]}:{endpoint.address[1]}"))
+            while endpoint.queue and endpoint.queue[0].deadline <= now:
+                exchange = endpoint.queue.popleft()
+                exchange.future.set_exception(TimeoutError(
+                    f"Timeout en cola para {endpoint.address[0]}:{endpoint.address[1]}"))
+            self._advance(endpoint)
+
+    def _advance(self, endpoint: _Endpoint):
+        """Inicia el siguiente intercambio de la máquina si está libre."""
+        if endpoint.current is not None or not endpoint.queue:
+            return
+        if endpoint.state == "disconnected":
+            self._start_connect(endpoint)
+            return
+        if endpoint.state != "connected":
+            return
+        endpoint.current = endpoint.queue.popleft()
+        endpoint.out_buffer = endpoint.current.payload
+        endpoint.in_buffer.clear()
+        self._selector.modify(endpoint.sock, selectors.EVENT_WRITE, endpoint)
+
+    def _start_connect(self, endpoint: _Endpoint):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        code = sock.connect_ex(endpoint.address)
+        if code not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, "WSAEWOULDBLOCK", -1)):
+            sock.close()
+            self._fail_queue(endpoint, ConnectionError(
+                f"No se pudo conectar a {endpoint.address[0]}:{endpoint.address[1]}: {errno.errorcode.get(code, code)}"))
+            return
+        endpoint.sock = sock
+        endpoint.state = "connecting"
+        endpoint.connect_deadline = time.monotonic() + self.connect_timeout
+        self._selector.register(sock, selectors.EVENT_WRITE, endpoint)
+
+    def _on_writable(self, endpoint: _Endpoint):
+        if endpoint.state == "connecting":
+            error = endpoint.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if error:
+                raise OSError(error, f"Conexión rechazada: {errno.errorcode.get(error, error)}")
+            endpoint.state = "connected"
+            self.logger.info(
+                f"Reactor conectado a {endpoint.address[0]}:{endpoint.address[1]}")
+            self._selector.modify(endpoint.sock, selectors.EVENT_READ, endpoint)
+            self._advance(endpoint)
+            return
+        if endpoint.current is None:
+            self._selector.modify(endpoint.sock, selectors.EVENT_READ, endpoint)
+            return
+        sent = endpoint.sock.send(endpoint.out_buffer)
+        endpoint.out_buffer = endpoint.out_buffer[sent:]
+        if not endpoint.out_buffer:
+            endpoint.current.sent_at = time.monotonic()
+            self._selector.modify(endpoint.sock, selectors.EVENT_READ, endpoint)
+
+    def _on_readable(self, endpoint: _Endpoint):
+        try:
+            data = endpoint.sock.recv(64)
+        except BlockingIOError:
+            return
+        if not data:
+            raise OSError("Conexión cerrada por el PLC")
+        current = endpoint.current
+        if current is None:
+            return  # Bytes no solicitados: se descartan
+        endpoint.in_buffer.extend(data)
+        if len(endpoint.in_buffer) >= current.response_size:
+            response = bytes(endpoint.in_buffer[:current.response_size])
+            endpoint.in_buffer.clear()
+            endpoint.current = None
+            current.future.round_trip = time.monotonic() - current.sent_at
+            current.future.set_result(response)
+            self._advance(endpoint)
+
+    @staticmethod
+    def _fail(future: Future, error: Exception):
+        if not future.done():
+            future.set_exception(error)
+
+    def _fail_queue(self, endpoint: _Endpoint, error: Exception):
+        while endpoint.queue:
+            self._fail(endpoint.queue.popleft().future, error)
+
+    def _reset(self, endpoint: _Endpoint, error: Exception, fail_queue: bool = False):
+        """Cierra la conexión de la máquina y falla el intercambio en curso."""
+        if endpoint.sock is not None:
+            try:
+                self._selector.unregister(endpoint.sock)
+            except (KeyError, ValueError):
+                pass
+            endpoint.sock.close()
+            endpoint.sock = None
+        was_connecting = endpoint.state == "connecting"
+        endpoint.state = "disconnected"
+        endpoint.connect_deadline = None
+        if endpoint.current is not None:
+            self._fail(endpoint.current.future, error)
+            endpoint.current = None
+        if fail_queue or was_connecting:
+            # Si no se pudo conectar, los demás en cola fallarían igual
+            self._fail_queue(endpoint, error)
+        self.logger.warning(
+            f"Reactor: conexión con {endpoint.address[0]}:{endpoint.address[1]} reiniciada: {error}")
+
+
+class ReactorPLC:
+    """
+    Adaptador con la interfaz de `PLC` que usa un `PLCReactor` compartido.
+
+    `send_command` encola el intercambio y `receive_response` espera su futuro,
+    de modo que el tiempo entre ambos (p. ej. la pausa del controlador) se
+    solapa con la comunicación.
+    """
+
+    def __init__(self, reactor: PLCReactor, ip: str, port: int,
+                 timeout_floor: float = 0.2, timeout_ceiling: float = 5.0,
+                 machine_id: str = None):
+        self.reactor = reactor
+        self.ip = ip
+        self.port = port
+        self.machine_id = machine_id or f"{ip}:{port}"
+        self.timeout = timeout_ceiling
+        self.latency = LatencyEstimator(timeout_floor, timeout_ceiling)
+        self.logger = logging.getLogger(__name__)
+        self._pending: Optional[Future] = None
+
+    @property
+    def connection_state(self) -> str:
+        return self.reactor.endpoint_state(self.ip, self.port)
+
+    @property
+    def sock(self):
+        """Compatibilidad con código que comprueba `plc.sock`."""
+        return self if self.connection_state == "connected" else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._pending = None
+
+    def connect(self) -> bool:
+        """La conexión la gestiona el reactor; siempre se puede encolar."""
+        return True
+
+    def close(self):
+        self._pending = None
+
+    def send_command(self, command: int, argument: int = None) -> bool:
+        validar_comando(command)
+        if argument is not None:
+            validar_argumento(argument)
+        data = struct.pack('B', command)
+        if argument is not None:
+            data += struct.pack('B', argument)
+        PLC_COMMANDS.labels(self.machine_id, command).inc()
+        future = self.reactor.submit(
+            self.ip, self.port, data, 2, self.latency.timeout())
+        # La muestra la mide el reactor entre la escritura y la respuesta: no
+        # incluye la espera en cola ni la pausa del llamador
+        future.add_done_callback(self._record_latency)
+        self._pending = future
+        return True
+
+    def _record_latency(self, future: Future):
+        error = future.exception()
+        if error is None:
+            elapsed = future.round_trip
+            self.latency.record(elapsed)
+            PLC_EXCHANGE_SECONDS.labels(self.machine_id).observe(elapsed)
+        elif isinstance(error, TimeoutError):
+            self.latency.record_timeout()
+            PLC_TIMEOUTS.labels(self.machine_id).inc()
+
+    def wait_response(self, timeout: float = None) -> bool:
+        """Espera a que el reactor complete el intercambio pendiente."""
+        future = self._pending
+        if future is None:
+            return False
+        wait([future], timeout=self.timeout + 1.0 if timeout is None else timeout)
+        return future.done()
+
+    def receive_response(self) -> dict:
+        future, self._pending = self._pending, None
+        if future is None:
+            raise RuntimeError("No hay comando pendiente de respuesta")
+        try:
+            with tracing.span("plc.receive"):
+                data = future.result(timeout=self.timeout + 1.0)
+        except Exception as e:
+            raise RuntimeError(f"Error recibiendo datos: {str(e)}")
+        status, position = struct.unpack('BB', data)
+        return {'status_code': status, 'position': position}
+
+    def get_current_status(self) -> dict:
+        try:
+            self.send_command(0)
+            return self.receive_response()
+        except Exception as e:
+            self.logger.error(f"Error en get_current_status: {str(e)}")
+            return {'error': str(e)}
@@ -0,0 +1,146 @@
+"""
+PLC de reproducción a partir de una grabación de tráfico.
+
+Sirve las respuestas grabadas por `PLCTrafficRecorder` en el mismo orden en que
+se recibieron, reproduciendo la latencia original de cada intercambio dividida
+por `speed` (speed=0 responde sin espera). Permite reproducir el tráfico de
+producción y medir cambios de la API o del WebSocket sin hardware.
+
+Autor: IA Punto: Soluciones Tecnológicas
+Proyecto para: INDUSTRIAS PICO S.A.S
+Fecha de creación: 2025-07-28
+"""
+
+import logging
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from commons.utils import validar_comando, validar_argumento
+from models.plc import PLCTrafficRecorder
+
+
+class ReplayPLC:
+    """
+    Implementación con la interfaz de `PLC` que reproduce una grabación.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, loop: bool = False,
+                 ip: str = "replay", port: int = 0):
+        """
+        Args:
+            path: Archivo grabado por PLCTrafficRecorder
+            speed: Factor de aceleración de la latencia (1.0 = original, 0 = sin espera)
+            loop: Volver al inicio al agotar la grabación
+            ip: Dirección informativa (compatibilidad con PLC)
+            port: Puerto informativo (compatibilidad con PLC)
+        """
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.ip = ip
+        self.port = port
+        self.sock = None
+        self.connection_state = "disconnected"
+        self.logger = logging.getLogger(__name__)
+        self.exchanges = self._load_exchanges(path)
+        if not self.exchanges:
+            raise ValueError(f"La grabación '{path}' no contiene intercambios")
+        self._index = 0
+        self._pending = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ReplayPLC":
+        """Crea el PLC desde las claves replay_file, replay_speed y replay_loop."""
+        return cls(config["replay_file"], speed=config.get("replay_speed", 1.0),
+                   loop=config.get("replay_loop", False),
+                   ip=config.get("ip", "replay"), port=config.get("port", 0))
+
+    @staticmethod
+    def _load_exchanges(path: str) -> List[Tuple[bytes, bytes, float]]:
+        """Empareja cada trama enviada con la respuesta que la siguió."""
+        exchanges = []
+        sent = None
+        for timestamp, direction, data in PLCTrafficRecorder.read(path):
+            if direction == PLCTrafficRecorder.SENT:
+                sent = (timestamp, data)
+            elif sent is not None:
+                exchanges.append((sent[1], data, timestamp - sent[0]))
+                sent = None
+        return exchanges
+
+    def __enter__(self):
+        self._lock.acquire()
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._lock.release()
+
+    def connect(self) -> bool:
+        self.sock = self
+        self.connection_state = "connected"
+        return True
+
+    def close(self):
+        self._pending = None
+
+    def shutdown(self):
+        self.close()
+        self.sock = None
+        self.connection_state = "disconnected"
+
+    def send_command(self, command: int, argument: int = None) -> bool:
+        """
+        Toma el siguiente intercambio grabado.
+
+        Si la trama no coincide con la grabada se avisa, pero se sirve igualmente
+        la respuesta grabada para que la reproducción sea determinista.
+
+        Raises:
+            RuntimeError: Si la grabación se agotó y no está en bucle
+        """
+        validar_comando(command)
+        if argument is not None:
+            validar_argumento(argument)
+        data = struct.pack('B', command)
+        if argument is not None:
+            data += struct.pack('B', argument)
+        with self._lock:
+            if self._index >= len(self.exchanges):
+                if not self.loop:
+                    raise RuntimeError("Grabación de tráfico agotada")
+                self._index = 0
+            recorded, response, latency = self.exchanges[self._index]
+            self._index += 1
+        if recorded != data:
+            self.logger.warning(
+                f"[REPLAY] Trama {data.hex()} distinta de la grabada {recorded.hex()}")
+        self._pending = (time.monotonic(), response, latency)
+        return True
+
+    def receive_response(self) -> dict:
+        """Entrega la respuesta grabada respetando la latencia escalada."""
+        pending, self._pending = self._pending, None
+        if pending is None:
+            raise RuntimeError("No hay comando pendiente de respuesta")
+        sent_at, response, latency = pending
+        if self.speed > 0:
+            remaining = sent_at + latency / self.speed - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+        if len(response) < 2:
+            raise RuntimeError("Respuesta grabada incompleta")
+        status, position = struct.unpack('BB', response[:2])
+        return {'status_code': status, 'position': position}
+
+    def get_current_status(self) -> dict:
+        try:
+            with self._lock:
+                self.send_command(0)
+                return self.receive_response()
+        except Exception as e:
+            self.logger.error(f"Error en get_current_status: {str(e)}")
+            return {'error': str(e)}
@@ -3,6 +3,16 @@ Simulador de PLC para desarrollo y pruebas.
 
 Emula el comportamiento de un PLC Delta AS Series para pruebas de la API y la interfaz gráfica, sin necesidad de hardware real.
 
+El estado se calcula a partir del reloj con `CarouselModel`: un movimiento enciende
+RUN y SENTIDO_GIRO y la posición avanza un cangilón por intervalo en el sentido más
+corto. Ninguna llamada duerme, de modo que las pruebas y benchmarks son rápidos y
+las lecturas de estado reflejan el movimiento en curso.
+
+`FaultProfile` inyecta fallos de forma reproducible (conexiones caídas o
+rechazadas, respuestas parciales o tardías, bits de alarma/VFD/parada de
+emergencia y errores de posicionamiento) para validar timeouts, circuit breakers
+y reintentos. Lo usan este simulador y el servidor TCP simulado.
+
 Autor: IA Punto: Soluciones Integrales de Tecnología y Marketing
 Proyecto para: INDUSTRIAS PICO S.A.S
 Fecha: 2024-09-27
@@ -11,31 +21,315 @@ Fecha: 2024-09-27
 import random
 import time
 import logging
+from typing import Any, Callable, Dict, List, Optional, Union
 from commons.utils import validar_comando, validar_argumento, debug_print
 
+# Bits de estado (ver commons.utils.ESTADOS_PLC)
+BIT_NOT_READY = 0b00000001        # READY=1: el equipo no puede operar
+BIT_RUN = 0b00000010
+BIT_REMOTE = 0b00000100           # MODO_OPERACION=1: remoto
+BIT_ALARM = 0b00001000
+BIT_NO_EMERGENCY = 0b00010000     # PARADA_EMERGENCIA=1: sin parada
+BIT_VFD_ERROR = 0b00100000
+BIT_POSITIONING_ERROR = 0b01000000
+BIT_DESCENDING = 0b10000000       # SENTIDO_GIRO=1: descendente
+
+STATUS_IDLE = BIT_REMOTE | BIT_NO_EMERGENCY
+
+
+class SimulatedFaultError(ConnectionError):
+    """Fallo de comunicación inyectado por un FaultProfile."""
+
+
+class FaultProfile:
+    """
+    Perfil de fallos sembrable, por probabilidad o por calendario.
+
+    Fallos de comunicación (se evalúan en cada intercambio o conexión):
+        drop: la conexión se cierra sin responder
+        partial: se responde un solo byte y se cierra la conexión
+        delay: la respuesta se retrasa `delay` segundos
+        refuse: la conexión se rechaza
+    Fallos de estado (al dispararse por probabilidad se mantienen `latch` segundos):
+        alarm, vfd, estop: bits ALARMA, VFD y PARADA_EMERGENCIA
+        positioning_error: el movimiento se detiene un cangilón antes y
+            enciende ERROR_POSICIONAMIENTO hasta el siguiente movimiento
+
+    Ejemplo de configuración:
+        {"probabilities": {"drop": 0.01, "delay": 0.05, "alarm": 0.001},
+         "schedule": [{"fault": "estop", "at": 30, "duration": 10, "every": 120}],
+         "delay": 2.0, "latch": 5.0, "seed": 42}
+    """
+
+    COMMUNICATION_FAULTS = ("drop", "partial", "delay", "refuse")
+    STATUS_FAULTS = ("alarm", "vfd", "estop")
+    FAULTS = COMMUNICATION_FAULTS + STATUS_FAULTS + ("positioning_error",)
+
+    def __init__(self, probabilities: Dict[str, float] = None,
+                 schedule: List[Dict[str, Any]] = None, delay: float = 2.0,
+                 latch: float = 5.0, rng: random.Random = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            probabilities: Probabilidad por fallo en cada evaluación (0-1)
+            schedule: Ventanas {'fault', 'at', 'duration', 'every'} en segundos
+                desde la creación del perfil; 'every' repite la ventana
+            delay: Segundos de retraso del fallo 'delay'
+            latch: Segundos que se mantiene un fallo de estado disparado al azar
+            rng: Generador aleatorio sembrable
+            clock: Reloj monotónico (inyectable para pruebas)
+        """
+        self.probabilities = dict(probabilities or {})
+        self.schedule = list(schedule or [])
+        for fault in list(self.probabilities) + [w["fault"] for w in self.schedule]:
+            if fault not in self.FAULTS:
+                raise ValueError(f"Fallo simulado desconocido: {fault}")
+        self.delay = delay
+        self.latch = latch
+        self.rng = rng or random.Random()
+        self.clock = clock
+        self._started = clock()
+        self._latched: Dict[str, float] = {}
+        self.injected: Dict[str, int] = {fault: 0 for fault in self.FAULTS}
+
+    @classmethod
+    def from_config(cls, spec: Dict[str, Any], machine_id: str = "",
+                    clock: Callable[[], float] = time.monotonic) -> "FaultProfile":
+        """
+        Crea un perfil desde la configuración; con 'seed', cada máquina obtiene
+        una secuencia propia y reproducible.
+        """
+        seed = spec.get("seed")
+        rng = random.Random(f"{seed}:{machine_id}") if seed is not None else None
+        return cls(spec.get("probabilities"), spec.get("schedule"),
+                   delay=spec.get("delay", 2.0), latch=spec.get("latch", 5.0),
+                   rng=rng, clock=clock)
+
+    def _scheduled(self, fault: str, now: float) -> bool:
+        elapsed = now - self._started
+        for window in self.schedule:
+            if window["fault"] != fault:
+                continue
+            offset = elapsed - window.get("at", 0.0)
+            if offset < 0:
+                continue
+            every = window.get("every")
+            if every:
+                offset %= every
+            if offset < window.get("duration", 1.0):
+                return True
+        return False
+
+    def should(self, fault: str) -> bool:
+        """Evalúa si el fallo ocurre ahora (calendario o probabilidad)."""
+        now = self.clock()
+        if self._scheduled(fault, now):
+            hit = True
+        else:
+            hit = self.rng.random() < self.probabilities.get(fault, 0.0)
+        if hit:
+            self.injected[fault] += 1
+        return hit
+
+    def status_bits(self, status: int) -> int:
+        """Aplica al código de estado los fallos de estado activos."""
+        now = self.clock()
+        for fault in self.STATUS_FAULTS:
+            if self._latched.get(fault, 0.0) > now or self._scheduled(fault, now):
+                active = True
+            elif self.probabilities.get(fault) and self.should(fault):
+                self._latched[fault] = now + self.latch
+                active = True
+            else:
+                active = False
+            if not active:
+                continue
+            if fault == "alarm":
+                status |= BIT_ALARM
+            elif fault == "vfd":
+                status |= BIT_VFD_ERROR
+            else:
+                status &= ~BIT_NO_EMERGENCY
+            status |= BIT_NOT_READY
+        return status
+
+
+def resolve_fault_profile(machine_config: Dict[str, Any],
+                          profiles: Dict[str, Dict[str, Any]] = None,
+                          default: Union[str, Dict[str, Any]] = None) -> Optional[FaultProfile]:
+    """
+    Resuelve la clave 'fault_profile' de una máquina (nombre de
+    'fault_profiles' o definición en línea), con un perfil por defecto opcional.
+
+    Raises:
+        ValueError: Si el perfil nombrado no existe
+    """
+    spec = machine_config.get("fault_profile", default)
+    if not spec:
+        return None
+    if isinstance(spec, str):
+        if spec not in (profiles or {}):
+            raise ValueError(f"Perfil de fallos no definido: {spec}")
+        spec = profiles[spec]
+    machine_key = machine_config.get("id", machine_config.get("port", ""))
+    return FaultProfile.from_config(spec, str(machine_key))
+
+
+class CarouselModel:
+    """
+    Máquina de estados del carrusel basada en el tiempo.
+
+    La posición no se guarda paso a paso: se deriva del instante de inicio del
+    movimiento, el sentido y el número de cangilones a recorrer.
+    """
+
+    def __init__(self, n_buckets: int = 10, bucket_interval: float = 0.5,
+                 clock: Callable[[], float] = time.monotonic,
+                 rng: random.Random = None, initial_position: int = None):
+        """
+        Args:
+            n_buckets: Número de cangilones (posiciones) del carrusel
+            bucket_interval: Segundos para avanzar un cangilón
+            clock: Reloj monotónico (inyectable para pruebas)
+            rng: Generador aleatorio sembrable
+            initial_position: Posición inicial; aleatoria si es None
+        """
+        self.n_buckets = n_buckets
+        self.bucket_interval = bucket_interval
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self._origin = (self.rng.randrange(n_buckets)
+                        if initial_position is None else initial_position % n_buckets)
+        self._target = self._origin
+        self._steps = 0
+        self._direction = 1  # 1 ascendente, -1 descendente
+        self._started_at = 0.0
+        self.positioning_error = False
+
+    def _steps_done(self) -> int:
+        if not self._steps:
+            return 0
+        if self.bucket_interval <= 0:
+            done = self._steps
+        else:
+            done = min(self._steps,
+                       int((self.clock() - self._started_at) / self.bucket_interval))
+        if done >= self._steps:
+            # Movimiento terminado: se consolida la posición final
+            self._origin = self._target
+            self._steps = 0
+            return 0
+        return done
+
+    @property
+    def position(self) -> int:
+        done = self._steps_done()
+        return (self._origin + self._direction * done) % self.n_buckets
+
+    @property
+    def is_running(self) -> bool:
+        self._steps_done()
+        return self._steps > 0
+
+    @property
+    def descending(self) -> bool:
+        return self.is_running and self._direction < 0
+
+    def start_move(self, target: int, stop_short: bool = False) -> bool:
+        """
+        Inicia un movimiento hacia `target` por el sentido más corto.
+
+        Con `stop_short` el carrusel se detiene un cangilón antes y queda con
+        ERROR_POSICIONAMIENTO hasta el siguiente movimiento.
+
+        Returns:
+            False si el carrusel ya está en movimiento.
+
+        Raises:
+            ValueError: Si la posición no existe en el carrusel
+        """
+        if not 0 <= target < self.n_buckets:
+            raise ValueError(
+                f"Posición fuera de rango (0-{self.n_buckets - 1})")
+        if self.is_running:
+            return False
+        forward = (target - self._origin) % self.n_buckets
+        backward = (self._origin - target) % self.n_buckets
+        self._direction = 1 if forward <= backward else -1
+        self._steps = min(forward, backward)
+        self._target = target
+        self.positioning_error = stop_short and self._steps > 0
+        if self.positioning_error:
+            self._steps -= 1
+            self._target = (target - self._direction) % self.n_buckets
+        self._started_at = self.clock()
+        return True
+
+    def status_code(self) -> int:
+        """Código de estado de 8 bits coherente con el movimiento actual."""
+        if not self.is_running:
+            if self.positioning_error:
+                return STATUS_IDLE | BIT_POSITIONING_ERROR | BIT_NOT_READY
+            return STATUS_IDLE
+        status = STATUS_IDLE | BIT_RUN | BIT_NOT_READY
+        if self._direction < 0:
+            status |= BIT_DESCENDING
+        return status
+
 
 class PLCSimulator:
     """
-    Simula un PLC con estados y respuestas predefinidas.
+    Simula un PLC con un modelo físico del carrusel.
     """
 
-    def __init__(self, ip: str, port: int):
+    def __init__(self, ip: str, port: int, n_buckets: int = 10,
+                 bucket_interval: float = 0.5, seed: int = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 faults: FaultProfile = None):
         """
         Inicializa el simulador con una dirección IP y puerto ficticios.
 
         Args:
             ip: Dirección IP ficticia (solo para compatibilidad).
             port: Puerto ficticio (solo para compatibilidad).
+            n_buckets: Número de cangilones del carrusel.
+            bucket_interval: Segundos para avanzar un cangilón.
+            seed: Semilla para una simulación reproducible.
+            clock: Reloj monotónico (inyectable para pruebas).
+            faults: Perfil de fallos a inyectar (opcional).
         """
         self.ip = ip
         self.port = port
-        self.current_position = random.randint(
-            0, 9)  # Posición inicial aleatoria
-        self.is_running = False  # Estado inicial: detenido
-        self.status_code = 0
+        self.rng = random.Random(seed)
+        self.model = CarouselModel(n_buckets, bucket_interval, clock, self.rng)
+        self.faults = faults
+        self.status_code = self.model.status_code()
         self.sock = None  # Simulación de socket
         self.logger = logging.getLogger(__name__)
 
+    @classmethod
+    def from_config(cls, config: Dict[str, Any],
+                    fault_profiles: Dict[str, Dict[str, Any]] = None) -> "PLCSimulator":
+        """
+        Crea un simulador a partir de una entrada de configuración.
+
+        Claves opcionales: bucket_count, bucket_interval, simulator_seed,
+        fault_profile (nombre de `fault_profiles` o definición en línea).
+        """
+        return cls(config["ip"], config["port"],
+                   n_buckets=config.get("bucket_count", 10),
+                   bucket_interval=config.get("bucket_interval", 0.5),
+                   seed=config.get("simulator_seed"),
+                   faults=resolve_fault_profile(config, fault_profiles))
+
+    @property
+    def current_position(self) -> int:
+        return self.model.position
+
+    @property
+    def is_running(self) -> bool:
+        return self.model.is_running
+
     def connect(self) -> bool:
         """
         Simula la conexión al PLC.
@@ -43,6 +337,9 @@ class PLCSimulator:
         Returns:
             True si la conexión es exitosa.
         """
+        if self.faults is not None and self.faults.should("refuse"):
+            raise SimulatedFaultError(
+                f"Conexión rechazada por el PLC simulado {self.ip}:{self.port}")
         self.logger.info(
             f"Simulando conexión con el PLC en {self.ip}:{self.port}")
         self.sock = type('FakeSocket', (object,), {
@@ -85,59 +382,34 @@ class PLCSimulator:
         try:
             self.logger.info(
                 f"Comando recibido en el simulador: {command}, Argumento: {argument}")
-            time.sleep(0.5)  # Simula latencia
-            if command == 0:  # Comando STATUS
-                self.status_code = self.generate_status()
-                position = self.current_position
-                self.logger.info(
-                    f"Estado simulado: {self.status_code}, Posición: {position}")
-                return {'status_code': self.status_code, 'position': position}
-            elif command == 1:  # Comando MUEVETE
-                if self.is_running:
+            if command == 1:  # Comando MUEVETE
+                target_position = argument if argument is not None else 0
+                stop_short = self.faults is not None and self.faults.should(
+                    "positioning_error")
+                if not self.model.start_move(target_position, stop_short):
                     self.logger.warning(
                         "El carrusel ya está en movimiento. Ignorando el comando.")
                     return {'error': 'PLC en movimiento'}
-                target_position = argument if argument is not None else 0
-                self.is_running = True
-                self.status_code |= 0b00000010  # Enciende el bit RUN
                 self.logger.info(
                     f"Moviendo el carrusel a la posición {target_position}...")
-                time.sleep(2)  # Simula tiempo de movimiento
-                self.current_position = target_position
-                self.is_running = False
-                self.status_code &= 0b11111101  # Apaga el bit RUN
-                return {'status_code': self.status_code, 'position': self.current_position}
-            else:
-                self.status_code = self.generate_status()
-                return {'status_code': self.status_code, 'position': self.current_position}
+            self.status_code = self.generate_status()
+            return {'status_code': self.status_code, 'position': self.current_position}
         except Exception as e:
             self.logger.error(f"Error en simulador: {str(e)}")
             return {'error': str(e)}
 
     def generate_status(self) -> int:
         """
-        Genera un código de estado simulado.
+        Calcula el código de estado a partir del modelo del carrusel y de los
+        fallos de estado activos.
 
         Returns:
             Código de estado simulado (8 bits).
         """
-        status_code = random.randint(0, 255)
-
-        # Simula probabilidad de estar en movimiento (30%)
-        if random.random() < 0.3:
-            self.is_running = True
-            status_code |= 0b00000010  # Enciende el bit RUN
-        else:
-            self.is_running = False
-            status_code &= 0b11111101  # Apaga el bit RUN
-
-        # Simula estado READY si no hay errores ni movimiento
-        if not self.is_running and (status_code & 0b01111100) == 0:
-            status_code |= 0b00000001  # Enciende el bit READY
-        else:
-            status_code &= 0b11111110  # Apaga el bit READY
-
-        return status_code
+        status = self.model.status_code()
+        if self.faults is not None:
+            status = self.faults.status_bits(status)
+        return status
 
     def get_current_status(self) -> dict:
         """
@@ -145,18 +417,29 @@ class PLCSimulator:
 
         Returns:
             Diccionario con estado y posición simulados.
+            Si se inyecta un fallo, retorna {'error': <mensaje>} como el PLC real.
         """
-        self.status_code = self.generate_status()
-        return {
-            'status_code': self.status_code,
-            'position': self.current_position
-        }
+        try:
+            return self.receive_response()
+        except SimulatedFaultError as e:
+            self.logger.error(f"Error en get_current_status: {str(e)}")
+            return {'error': str(e)}
 
     def receive_response(self) -> dict:
         """
         Simula la recepción de una respuesta del PLC (status y posición).
+
+        Raises:
+            SimulatedFaultError: Si el perfil de fallos corta la respuesta
         """
-        # Simplemente devuelve el estado y posición actuales
+        if self.faults is not None:
+            if self.faults.should("drop"):
+                raise SimulatedFaultError("Conexión cerrada por el PLC (simulado)")
+            if self.faults.should("partial"):
+                raise SimulatedFaultError("Respuesta incompleta del PLC (simulado)")
+            if self.faults.should("delay"):
+                time.sleep(self.faults.delay)
+        self.status_code = self.generate_status()
         return {
             'status_code': self.status_code,
             'position': self.current_position
@@ -0,0 +1,277 @@
+"""
+Servidor TCP de simulación de PLCs para pruebas de carga.
+
+Un único proceso asyncio aloja cientos de carruseles virtuales, cada uno
+escuchando en su propio puerto y hablando el protocolo real del PLC Delta:
+comando de 1 byte (STATUS=0) o 2 bytes (MUEVETE=1 + posición) y respuesta de 2
+bytes (estado, posición). Cada carrusel tiene latencia, jitter y tiempo por
+cangilón configurables y usa el mismo `CarouselModel` que `PLCSimulator`, de modo
+que el cliente `PLC` de producción se ejercita de extremo a extremo sobre localhost.
+
+Uso:
+    python -m models.plc_tcp_simulator --base-port 15000 --count 200 \\
+        --latency 0.005 --jitter 0.002 --bucket-interval 0.5 \\
+        --write-config config_multi_plc_sim.json [--faults config_multi_plc.json]
+
+Con --faults se leen 'fault_profiles', 'default_fault_profile' y el
+'fault_profile' de cada entrada de 'plc_machines' (emparejada por puerto).
+
+Autor: IA Punto: Soluciones Tecnológicas
+Proyecto para: INDUSTRIAS PICO S.A.S
+Fecha de creación: 2025-07-28
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from models.plc_simulator import CarouselModel, FaultProfile, resolve_fault_profile
+
+CMD_STATUS = 0
+CMD_MUEVETE = 1
+
+
+class VirtualCarousel:
+    """
+    Carrusel virtual: latencia de red sobre un `CarouselModel`.
+    """
+
+    def __init__(self, port: int, latency: float = 0.005, jitter: float = 0.0,
+                 bucket_interval: float = 0.5, n_buckets: int = 10,
+                 rng: random.Random = None, clock: Callable[[], float] = time.monotonic,
+                 faults: FaultProfile = None):
+        """
+        Args:
+            port: Puerto TCP del carrusel
+            latency: Segundos de latencia por respuesta
+            jitter: Variación máxima (±) de la latencia en segundos
+            bucket_interval: Segundos para avanzar un cangilón
+            n_buckets: Número de cangilones del carrusel
+            rng: Generador aleatorio (sembrable para reproducibilidad)
+            clock: Reloj monotónico (inyectable para pruebas)
+            faults: Perfil de fallos a inyectar (opcional)
+        """
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.model = CarouselModel(n_buckets, bucket_interval, clock, self.rng)
+        self.faults = faults
+        self.exchanges = 0
+
+    def fault(self, name: str) -> bool:
+        return self.faults is not None and self.faults.should(name)
+
+    def handle(self, command: int, argument: Optional[int] = None) -> bytes:
+        """Procesa un comando y devuelve la respuesta de 2 bytes."""
+        self.exchanges += 1
+        if command == CMD_MUEVETE and argument is not None \
+                and argument < self.model.n_buckets:
+            # Como el PLC real, un MUEVETE durante un movimiento se ignora
+            self.model.start_move(argument, self.fault("positioning_error"))
+        status = self.model.status_code()
+        if self.faults is not None:
+            status = self.faults.status_bits(status)
+        return bytes((status, self.model.position))
+
+    def response_delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+        return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+
+class PLCTCPSimulatorServer:
+    """
+    Aloja varios carruseles virtuales en puertos consecutivos.
+    """
+
+    def __init__(self, base_port: int = 15000, count: int = 1, host: str = "127.0.0.1",
+                 latency: float = 0.005, jitter: float = 0.0, bucket_interval: float = 0.5,
+                 seed: int = None, n_buckets: int = 10,
+                 faults: Dict[int, FaultProfile] = None):
+        """
+        Args:
+            faults: Perfil de fallos por puerto (opcional)
+        """
+        self.host = host
+        self.base_port = base_port
+        self.logger = logging.getLogger(__name__)
+        rng = random.Random(seed)
+        self.carousels: List[VirtualCarousel] = [
+            VirtualCarousel(base_port + i, latency, jitter, bucket_interval, n_buckets,
+                            rng=random.Random(rng.random()),
+                            faults=(faults or {}).get(base_port + i))
+            for i in range(count)]
+        self._servers: List[asyncio.AbstractServer] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    async def start(self):
+        """Abre un servidor asyncio por carrusel."""
+        for carousel in self.carousels:
+            server = await asyncio.start_server(
+                lambda r, w, c=carousel: self._handle_client(c, r, w),
+                self.host, carousel.port)
+            self._servers.append(server)
+        self.logger.info(
+            f"[TCP_SIM] {len(self.carousels)} carruseles en {self.host}:"
+            f"{self.base_port}-{self.base_port + len(self.carousels) - 1}")
+
+    async def close(self):
+        for server in self._servers:
+            server.close()
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers.clear()
+
+    async def _handle_client(self, carousel: VirtualCarousel,
+                             reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if carousel.fault("refuse"):
+            writer.transport.abort()  # RST inmediato, como un connect rechazado
+            return
+        try:
+            while True:
+                command = (await reader.readexactly(1))[0]
+                argument = None
+                if command == CMD_MUEVETE:
+                    argument = (await reader.readexactly(1))[0]
+                delay = carousel.response_delay()
+                if carousel.fault("delay"):
+                    delay += carousel.faults.delay
+                if delay:
+                    await asyncio.sleep(delay)
+                if carousel.fault("drop"):
+                    writer.transport.abort()
+                    return
+                response = carousel.handle(command, argument)
+                if carousel.fault("partial"):
+                    writer.write(response[:1])
+                    await writer.drain()
+                    writer.transport.abort()
+                    return
+                writer.write(response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def machine_configs(self) -> List[Dict[str, Any]]:
+        """Entradas 'plc_machines' para apuntar el backend a los carruseles virtuales."""
+        return [{
+            "id": f"sim_{carousel.port}",
+            "name": f"Carrusel simulado {carousel.port}",
+            "ip": self.host,
+            "port": carousel.port,
+            "bucket_count": carousel.model.n_buckets,
+            "simulator": False
+        } for carousel in self.carousels]
+
+    def start_in_thread(self):
+        """Arranca el servidor en un hilo propio (para pruebas y herramientas)."""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            try:
+                self._loop.run_until_complete(self.start())
+            except Exception as e:
+                errors.append(e)
+                started.set()
+                return
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.close())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="plc-tcp-simulator", daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def stop(self):
+        """Detiene un servidor arrancado con start_in_thread()."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+
+
+def load_fault_profiles(config: Dict[str, Any], base_port: int,
+                        count: int) -> Dict[int, FaultProfile]:
+    """Resuelve el perfil de fallos de cada puerto a partir de una configuración multi-PLC."""
+    profiles = config.get("fault_profiles", {})
+    default = config.get("default_fault_profile")
+    machines = {machine.get("port"): machine for machine in config.get("plc_machines", [])}
+    faults = {}
+    for port in range(base_port, base_port + count):
+        machine = machines.get(port, {"port": port})
+        profile = resolve_fault_profile(machine, profiles, default)
+        if profile is not None:
+            faults[port] = profile
+    return faults
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Servidor TCP con carruseles PLC virtuales")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=15000)
+    parser.add_argument("--count", type=int, default=10,
+                        help="Número de carruseles (uno por puerto)")
+    parser.add_argument("--latency", type=float, default=0.005,
+                        help="Latencia por respuesta en segundos")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Variación máxima de la latencia en segundos")
+    parser.add_argument("--bucket-interval", "--move-duration", type=float, default=0.5,
+                        dest="bucket_interval",
+                        help="Segundos para avanzar un cangilón (posición)")
+    parser.add_argument("--buckets", type=int, default=10,
+                        help="Cangilones por carrusel")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--faults", metavar="PATH",
+                        help="Configuración JSON con los perfiles de fallos a inyectar")
+    parser.add_argument("--write-config", metavar="PATH",
+                        help="Escribe una configuración multi-PLC apuntando a los carruseles")
+    return parser.parse_args(argv)
+
+
+async def _serve(server: PLCTCPSimulatorServer):
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    faults = None
+    if args.faults:
+        with open(args.faults, "r", encoding="utf-8") as f:
+            faults = load_fault_profiles(json.load(f), args.base_port, args.count)
+    server = PLCTCPSimulatorServer(args.base_port, args.count, args.host, args.latency,
+                                   args.jitter, args.bucket_interval, args.seed,
+                                   args.buckets, faults)
+    if args.write_config:
+        with open(args.write_config, "w", encoding="utf-8") as f:
+            json.dump({"plc_machines": server.machine_configs()}, f, indent=2,
+                      ensure_ascii=False)
+    try:
+        asyncio.run(_serve(server))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
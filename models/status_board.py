@@ -0,0 +1,246 @@
+"""
+Tablero de estado en memoria compartida para lectores entre procesos.
+
+Publica la última instantánea de cada máquina (raw_status, posición, timestamp,
+banderas de error y secuencia) en un segmento `multiprocessing.shared_memory`
+con disposición fija. Cada registro se protege con un seqlock: el escritor deja
+la secuencia impar mientras escribe y par al terminar; el lector reintenta si
+observa una secuencia impar o distinta antes y después de leer.
+
+Así la GUI, la aplicación web o el servidor WebSocket que corren en el mismo
+equipo pueden leer el estado actual sin HTTP, sin serialización y sin llamadas
+al sistema.
+
+Autor: IA Punto: Soluciones Tecnológicas
+Proyecto para: INDUSTRIAS PICO S.A.S
+Fecha de creación: 2025-07-28
+"""
+
+import logging
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional
+
+DEFAULT_BOARD_NAME = "carousel_status_board"
+DEFAULT_SLOTS = 64
+MAX_SLOTS = 0xFFFF  # El número de slots se guarda en 16 bits en la cabecera
+
+# Cabecera: magic, versión, número de slots, tamaño de registro
+_HEADER = struct.Struct('<4sHHI')
+_HEADER_SIZE = 16
+_MAGIC = b'CSB1'
+_VERSION = 1
+
+# Registro: secuencia, machine_id, raw_status, posición, banderas, relleno, timestamp
+_RECORD = struct.Struct('<I32sBBBxd')
+_SEQ = struct.Struct('<I')
+_MACHINE_ID_SIZE = 32
+
+# Banderas de error del registro
+FLAG_COMM_ERROR = 0x01  # La última consulta al PLC falló
+FLAG_PLC_BUSY = 0x02    # El PLC estaba ocupado por otro proceso
+
+_MAX_READ_RETRIES = 100
+
+# Segmentos creados por este proceso (su resource_tracker ya los gestiona)
+_OWNED_NAMES = set()
+
+
+class StatusBoard:
+    """
+    Segmento de memoria compartida con un registro por máquina.
+
+    Un único proceso (el backend) crea el tablero y publica; cualquier otro
+    proceso del mismo equipo puede adjuntarse con `StatusBoard.attach()` y leer.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, slots: int, owner: bool):
+        self._shm = shm
+        self._buf = shm.buf
+        self.slots = slots
+        self.owner = owner
+        self._slot_index: Dict[str, int] = {}
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def create(cls, name: str = DEFAULT_BOARD_NAME, slots: int = DEFAULT_SLOTS) -> "StatusBoard":
+        """
+        Crea (o recrea si quedó huérfano) el segmento y lo inicializa en cero.
+
+        Args:
+            name: Nombre del segmento de memoria compartida
+            slots: Número máximo de máquinas publicables (hasta MAX_SLOTS)
+        """
+        if not 0 < slots <= MAX_SLOTS:
+            raise ValueError(f"slots debe estar entre 1 y {MAX_SLOTS}")
+        size = _HEADER_SIZE + slots * _RECORD.size
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Segmento de una ejecución anterior que no se liberó
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        _OWNED_NAMES.add(name)
+        _HEADER.pack_into(shm.buf, 0, _MAGIC, _VERSION, slots, _RECORD.size)
+        return cls(shm, slots, owner=True)
+
+    @classmethod
+    def attach(cls, name: str = DEFAULT_BOARD_NAME) -> "StatusBoard":
+        """
+        Se adjunta a un tablero existente en modo lectura.
+
+        Raises:
+            FileNotFoundError: Si el backend no ha creado el tablero
+            ValueError: Si el segmento no tiene el formato esperado
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        if sys.platform != "win32" and name not in _OWNED_NAMES:
+            # En POSIX el resource_tracker eliminaría el segmento al salir el lector
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, "shared_memory")
+            except Exception:
+                pass
+        magic, version, slots, record_size = _HEADER.unpack_from(shm.buf, 0)
+        if magic != _MAGIC or version != _VERSION or record_size != _RECORD.size:
+            shm.close()
+            raise ValueError(f"Segmento '{name}' no es un tablero de estado válido")
+        return cls(shm, slots, owner=False)
+
+    def _offset(self, slot: int) -> int:
+        return _HEADER_SIZE + slot * _RECORD.size
+
+    def _read_machine_id(self, slot: int) -> str:
+        start = self._offset(slot) + _SEQ.size
+        raw = bytes(self._buf[start:start + _MACHINE_ID_SIZE])
+        return raw.rstrip(b'\x00').decode('utf-8', errors='replace')
+
+    def _find_slot(self, machine_id: str, register: bool) -> Optional[int]:
+        slot = self._slot_index.get(machine_id)
+        if slot is not None:
+            return slot
+        for i in range(self.slots):
+            current = self._read_machine_id(i)
+            if current == machine_id:
+                self._slot_index[machine_id] = i
+                return i
+            if not current:
+                if not register:
+                    return None
+                encoded = machine_id.encode('utf-8')
+                start = self._offset(i) + _SEQ.size
+                self._buf[start:start + _MACHINE_ID_SIZE] = encoded.ljust(
+                    _MACHINE_ID_SIZE, b'\x00')
+                self._slot_index[machine_id] = i
+                return i
+        if register:
+            raise RuntimeError(
+                f"Tablero de estado lleno ({self.slots} slots), no se puede publicar '{machine_id}'")
+        return None
+
+    def publish(self, machine_id: str, raw_status: int, position: int,
+                flags: int = 0, timestamp: float = None):
+        """
+        Publica la instantánea de una máquina (solo el proceso propietario).
+
+        Args:
+            machine_id: ID de la máquina
+            raw_status: Código de estado de 8 bits
+            position: Posición actual del carrusel
+            flags: Banderas FLAG_* de error
+            timestamp: Marca de tiempo (epoch); por defecto time.time()
+
+        Raises:
+            ValueError: Si el ID ocupa más de 32 bytes en UTF-8 (truncado, otro
+                proceso no podría encontrarlo por su ID completo)
+        """
+        if len(machine_id.encode('utf-8')) > _MACHINE_ID_SIZE:
+            raise ValueError(
+                f"ID de máquina demasiado largo para el tablero (máximo {_MACHINE_ID_SIZE} "
+                f"bytes): '{machine_id}'")
+        slot = self._find_slot(machine_id, register=True)
+        offset = self._offset(slot)
+        seq = _SEQ.unpack_from(self._buf, offset)[0]
+        _SEQ.pack_into(self._buf, offset, (seq + 1) & 0xFFFFFFFF)
+        struct.pack_into('<BBBxd', self._buf, offset + _SEQ.size + _MACHINE_ID_SIZE,
+                         raw_status & 0xFF, position & 0xFF, flags & 0xFF,
+                         time.time() if timestamp is None else timestamp)
+        _SEQ.pack_into(self._buf, offset, (seq + 2) & 0xFFFFFFFF)
+
+    def publish_status(self, machine_id: str, status: Dict[str, Any], flags: int = 0):
+        """
+        Publica un resultado de `get_current_status()`.
+
+        Si el resultado contiene 'error' se conserva el último estado conocido
+        y se marca FLAG_COMM_ERROR.
+        """
+        if 'error' in status:
+            last = self.read(machine_id) or {'raw_status': 0, 'position': 0}
+            self.publish(machine_id, last['raw_status'], last['position'],
+                         flags | FLAG_COMM_ERROR)
+        else:
+            self.publish(machine_id, status.get('status_code', status.get('raw_status', 0)),
+                         status.get('position', 0), flags)
+
+    def read(self, machine_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Lee de forma consistente el registro de una máquina.
+
+        Returns:
+            Diccionario con raw_status, position, flags, timestamp y sequence,
+            o None si la máquina no ha sido publicada.
+        """
+        slot = self._find_slot(machine_id, register=False)
+        if slot is None:
+            return None
+        return self._read_slot(slot)
+
+    def _read_slot(self, slot: int) -> Optional[Dict[str, Any]]:
+        offset = self._offset(slot)
+        for _ in range(_MAX_READ_RETRIES):
+            seq_before = _SEQ.unpack_from(self._buf, offset)[0]
+            if seq_before & 1:
+                continue  # Escritura en curso
+            seq_before, _mid, raw_status, position, flags, timestamp = _RECORD.unpack_from(
+                self._buf, offset)
+            seq_after = _SEQ.unpack_from(self._buf, offset)[0]
+            if seq_before == seq_after:
+                if seq_before == 0:
+                    return None  # Slot registrado pero aún sin datos
+                return {
+                    'raw_status': raw_status,
+                    'position': position,
+                    'flags': flags,
+                    'timestamp': timestamp,
+                    'sequence': seq_before // 2
+                }
+        raise RuntimeError("No se pudo obtener una lectura consistente del tablero")
+
+    def read_all(self) -> Dict[str, Dict[str, Any]]:
+        """Lee todos los registros publicados, indexados por ID de máquina."""
+        result = {}
+        for i in range(self.slots):
+            machine_id = self._read_machine_id(i)
+            if not machine_id:
+                break
+            self._slot_index.setdefault(machine_id, i)
+            record = self._read_slot(i)
+            if record is not None:
+                result[machine_id] = record
+        return result
+
+    def close(self):
+        """Libera la vista local; el propietario además elimina el segmento."""
+        self._buf = None
+        self._shm.close()
+        if self.owner:
+            _OWNED_NAMES.discard(self._shm.name.lstrip('/'))
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,287 @@
+"""
+Historial de estados por máquina con codificación solo-cambios.
+
+Cada máquina guarda una serie de transiciones (timestamp, raw_status, posición):
+una lectura igual a la anterior no se almacena, así que el monitor puede
+consultar cada segundo sin que el historial crezca mientras el carrusel está
+quieto. Los datos recientes viven en un anillo en memoria; toda la serie se
+escribe además en un segmento en disco de tamaño fijo mapeado en memoria
+(`mmap`), también circular, que sobrevive a reinicios.
+
+Formato del segmento (`<machine_id>.hist`): cabecera de 32 bytes (magic,
+versión, tamaño de registro, capacidad, total escrito) seguida de `capacity`
+registros de 12 bytes `<dBBxx` (timestamp, raw_status, posición). El registro
+lógico i está en el slot `(total - count + i) % capacity`.
+
+Las consultas por rango hacen búsqueda binaria por timestamp y, con una
+resolución dada, agregan los cambios por intervalo en el servidor.
+
+Autor: IA Punto: Soluciones Tecnológicas
+Proyecto para: INDUSTRIAS PICO S.A.S
+Fecha de creación: 2025-07-28
+"""
+
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+_HEADER = struct.Struct('<4sHHIQ')
+_HEADER_SIZE = 32
+_MAGIC = b'CSH1'
+_VERSION = 1
+_RECORD = struct.Struct('<dBBxx')
+
+DEFAULT_RING_SIZE = 4096
+DEFAULT_SEGMENT_CAPACITY = 16_384  # ~192 KB por máquina, reservados al crear el archivo
+DEFAULT_MAX_POINTS = 2000
+
+Point = Tuple[float, int, int]
+
+
+class HistorySegment:
+    """
+    Anillo de registros de tamaño fijo en un archivo mapeado en memoria.
+    """
+
+    def __init__(self, path: str, capacity: int = DEFAULT_SEGMENT_CAPACITY):
+        """
+        Abre o crea el segmento. Un archivo existente conserva su capacidad.
+
+        Raises:
+            ValueError: Si el archivo no es un segmento de historial válido
+        """
+        self.path = path
+        size = _HEADER_SIZE + capacity * _RECORD.size
+        exists = os.path.exists(path) and os.path.getsize(path) >= _HEADER_SIZE
+        self._file = open(path, 'r+b' if exists else 'w+b')
+        if exists:
+            header = self._file.read(_HEADER.size)
+            magic, version, record_size, capacity, _ = _HEADER.unpack(header)
+            if magic != _MAGIC or version != _VERSION or record_size != _RECORD.size:
+                self._file.close()
+                raise ValueError(f"'{path}' no es un segmento de historial válido")
+            size = _HEADER_SIZE + capacity * _RECORD.size
+        if os.path.getsize(path) < size:
+            self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_WRITE)
+        self.capacity = capacity
+        if not exists:
+            _HEADER.pack_into(self._map, 0, _MAGIC, _VERSION, _RECORD.size, capacity, 0)
+        self.total = _HEADER.unpack_from(self._map, 0)[4]
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def append(self, point: Point):
+        slot = self.total % self.capacity
+        _RECORD.pack_into(self._map, _HEADER_SIZE + slot * _RECORD.size, *point)
+        self.total += 1
+        # El total se escribe después del registro: un lector nunca ve uno a medias
+        _HEADER.pack_into(self._map, 0, _MAGIC, _VERSION, _RECORD.size, self.capacity, self.total)
+
+    def __getitem__(self, index: int) -> Point:
+        slot = (self.total - len(self) + index) % self.capacity
+        return _RECORD.unpack_from(self._map, _HEADER_SIZE + slot * _RECORD.size)
+
+    def close(self):
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+
+
+def _bisect_ts(series, ts: float, low: int = 0) -> int:
+    """Primer índice cuyo timestamp es >= ts (series ordenada por tiempo)."""
+    high = len(series)
+    while low < high:
+        middle = (low + high) // 2
+        if series[middle][0] < ts:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+class _MachineSeries:
+    def __init__(self, ring_size: int, segment: Optional[HistorySegment]):
+        self.ring: deque = deque(maxlen=ring_size)
+        self.segment = segment
+        self.lock = threading.Lock()
+        if segment is not None:
+            for index in range(max(0, len(segment) - ring_size), len(segment)):
+                self.ring.append(segment[index])
+
+    def append(self, point: Point) -> bool:
+        with self.lock:
+            if self.ring and self.ring[-1][1:] == point[1:]:
+                return False
+            self.ring.append(point)
+            if self.segment is not None:
+                self.segment.append(point)
+            return True
+
+    def range(self, start: float, end: float) -> Tuple[Optional[Point], List[Point]]:
+        """(último punto antes de start, puntos en [start, end))."""
+        with self.lock:
+            ring = list(self.ring)
+            source = ring
+            if self.segment is not None and (not ring or ring[0][0] >= start):
+                # El rango (o el estado vigente en start) empieza antes que el anillo
+                source = self.segment
+            first = _bisect_ts(source, start)
+            last = _bisect_ts(source, end, first)
+            initial = source[first - 1] if first > 0 else None
+            return initial, [source[i] for i in range(first, last)]
+
+
+class StatusHistory:
+    """
+    Series de transiciones de estado por máquina (anillo en memoria + mmap).
+    """
+
+    def __init__(self, directory: Optional[str] = None, ring_size: int = DEFAULT_RING_SIZE,
+                 segment_capacity: int = DEFAULT_SEGMENT_CAPACITY,
+                 max_points: int = DEFAULT_MAX_POINTS, memory_only: Iterable[str] = ()):
+        """
+        Args:
+            directory: Carpeta de los segmentos en disco; None guarda solo en memoria
+            ring_size: Transiciones recientes por máquina en memoria
+            segment_capacity: Transiciones por máquina en disco (solo segmentos nuevos)
+            max_points: Puntos máximos por consulta; por encima se reduce la resolución
+            memory_only: Máquinas sin segmento en disco (p. ej. la flota virtual)
+        """
+        self.directory = directory
+        self.ring_size = ring_size
+        self.segment_capacity = segment_capacity
+        self.max_points = max_points
+        self.memory_only = set(memory_only)
+        self.logger = logging.getLogger(__name__)
+        self._series: Dict[str, _MachineSeries] = {}
+        self._series_lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, value: Union[None, bool, str, Dict[str, Any]],
+                    default_dir: str = None,
+                    memory_only: Iterable[str] = ()) -> Optional["StatusHistory"]:
+        """
+        Crea el historial desde la configuración.
+
+        Args:
+            value: False desactiva; None usa la carpeta por defecto; una carpeta; o
+                {directory, ring_size, segment_capacity, max_points}
+            default_dir: Carpeta por defecto (LOCALAPPDATA/Vertical PIC/history)
+            memory_only: Máquinas cuyo historial no se escribe en disco
+        """
+        if value is False:
+            return None
+        options = dict(value) if isinstance(value, dict) else {}
+        if isinstance(value, str):
+            options["directory"] = value
+        if "directory" not in options:
+            options["directory"] = default_dir or os.path.join(
+                os.getenv('LOCALAPPDATA', '.'), 'Vertical PIC', 'history')
+        options.setdefault("memory_only", memory_only)
+        return cls(**options)
+
+    def _series_for(self, machine_id: str) -> _MachineSeries:
+        series = self._series.get(machine_id)
+        if series is not None:
+            return series
+        with self._series_lock:
+            series = self._series.get(machine_id)
+            if series is None:
+                segment = None
+                if self.directory and machine_id not in self.memory_only:
+                    filename = re.sub(r'[^A-Za-z0-9_.-]', '_', machine_id) + '.hist'
+                    try:
+                        segment = HistorySegment(
+                            os.path.join(self.directory, filename), self.segment_capacity)
+                    except (OSError, ValueError) as e:
+                        self.logger.error(
+                            "Historial de %s solo en memoria: %s", machine_id, e)
+                series = _MachineSeries(self.ring_size, segment)
+                self._series[machine_id] = series
+            return series
+
+    def record(self, machine_id: str, ts: float, raw_status: int, position: int) -> bool:
+        """
+        Añade una lectura; devuelve False si no cambió respecto a la anterior.
+        """
+        return self._series_for(machine_id).append((ts, raw_status & 0xFF, position & 0xFF))
+
+    def record_status(self, machine_id: str, status: Dict[str, Any], ts: float):
+        """Listener de MultiPLCMonitor: (machine_id, status, timestamp)."""
+        raw = status.get('raw_status', status.get('status_code'))
+        if raw is None or status.get('position') is None:
+            return
+        self.record(machine_id, ts, raw, status['position'])
+
+    def machines(self) -> List[str]:
+        return list(self._series)
+
+    def query(self, machine_id: str, start: float, end: float,
+              resolution: float = 0) -> Dict[str, Any]:
+        """
+        Transiciones de una máquina en [start, end).
+
+        Args:
+            resolution: Segundos por intervalo. 0 devuelve cada transición; si
+                resultan más de max_points se usa la resolución mínima que cabe.
+                Con resolución, cada punto lleva el último estado del intervalo
+                y el número de cambios que agrupa.
+
+        Returns:
+            {'initial', 'points', 'resolution', 'count'}; initial es el estado
+            vigente en start (o None)
+        """
+        if end <= start:
+            raise ValueError("'to' debe ser posterior a 'from'")
+        if resolution < 0:
+            raise ValueError("'resolution' no puede ser negativa")
+        initial, points = self._series_for(machine_id).range(start, end)
+        if not resolution and len(points) > self.max_points:
+            resolution = (end - start) / self.max_points
+        if resolution:
+            resolution = max(resolution, (end - start) / self.max_points)
+            result = self._downsample(points, start, resolution)
+        else:
+            result = [{'ts': ts, 'raw_status': raw, 'position': position}
+                      for ts, raw, position in points]
+        return {
+            'initial': ({'ts': initial[0], 'raw_status': initial[1], 'position': initial[2]}
+                        if initial else None),
+            'points': result,
+            'resolution': resolution,
+            'count': len(result),
+        }
+
+    @staticmethod
+    def _downsample(points: List[Point], start: float, resolution: float) -> List[Dict[str, Any]]:
+        buckets: List[Dict[str, Any]] = []
+        current = None
+        for ts, raw, position in points:
+            bucket = math.floor((ts - start) / resolution)
+            if current != bucket:
+                current = bucket
+                buckets.append({'ts': start + bucket * resolution, 'raw_status': raw,
+                                'position': position, 'changes': 0})
+            entry = buckets[-1]
+            entry['raw_status'], entry['position'] = raw, position
+            entry['changes'] += 1
+        return buckets
+
+    def close(self):
+        """Vuelca y cierra los segmentos en disco."""
+        with self._series_lock:
+            for series in self._series.values():
+                if series.segment is not None:
+                    with series.lock:
+                        series.segment.close()
+                        series.segment = None
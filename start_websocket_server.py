@@ -3,7 +3,7 @@
 Script para iniciar el servidor WebSocket independiente.
 
 Uso:
-    python start_websocket_server.py [--host HOST] [--port PORT]
+    python start_websocket_server.py [--host HOST] [--port PORT] [--metrics-port PORT]
 
 Ejemplo:
     python start_websocket_server.py --host 0.0.0.0 --port 8765
@@ -62,6 +62,13 @@ El servidor se conectará automáticamente a los PLCs configurados en:
         help="Nivel de logging (default: INFO)"
     )
 
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Sirve /metrics (formato Prometheus) en este puerto (default: desactivado)"
+    )
+
     args = parser.parse_args()
 
     # Configurar logging con encoding UTF-8
@@ -102,6 +109,11 @@ El servidor se conectará automáticamente a los PLCs configurados en:
                 "   Asegúrese de que existe 'config_multi_plc.json' o 'config.json'")
             sys.exit(1)
 
+        if args.metrics_port:
+            from commons.metrics import serve_metrics
+            serve_metrics(args.metrics_port, args.host)
+            logger.info(f"Métricas en http://{args.host}:{args.metrics_port}/metrics")
+
         logger.info("Iniciando servidor WebSocket...")
         logger.info("   Presione Ctrl+C para detener el servidor")
         logger.info("-" * 50)
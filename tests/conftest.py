@@ -0,0 +1,20 @@
+"""
+Utilidades compartidas por las pruebas.
+"""
+
+import pytest
+
+
+class FakeClock:
+    """Reloj monotónico manual para los modelos con `clock` inyectable."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_clock():
+    return FakeClock()
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import unittest
+from api import create_app
+from models.alarm_detector import AlarmDetector
+from models.plc_manager import PLCManager
+from models.plc_simulator import BIT_ALARM, BIT_NO_EMERGENCY, BIT_VFD_ERROR, STATUS_IDLE
+
+
+class FakeWebSocket:
+    remote_address = ("127.0.0.1", 50000)
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+class TestAlarmDetector(unittest.TestCase):
+    def setUp(self):
+        self.emitted = []
+        self.detector = AlarmDetector(clear_debounce=2.0,
+                                      emit=lambda event, data: self.emitted.append((event, data)))
+
+    def test_raise_and_clear_edges(self):
+        self.assertEqual(self.detector.observe("m1", STATUS_IDLE, 0, ts=0), [])
+        raised = self.detector.observe("m1", STATUS_IDLE | BIT_ALARM, 3, ts=1)
+        self.assertEqual([(e['alarm'], e['state']) for e in raised], [("ALARMA", "raised")])
+        self.assertEqual(self.detector.observe("m1", STATUS_IDLE | BIT_ALARM, 3, ts=2), [])
+        self.assertEqual(self.detector.active(), {"m1": {"ALARMA": {
+            'since': 1, 'raw_status': STATUS_IDLE | BIT_ALARM, 'position': 3}}})
+        self.assertEqual(self.detector.observe("m1", STATUS_IDLE, 3, ts=3), [])  # antirrebote
+        cleared = self.detector.observe("m1", STATUS_IDLE, 3, ts=5)
+        self.assertEqual(cleared[0]['state'], "cleared")
+        self.assertEqual(cleared[0]['duration_s'], 4)
+        self.assertEqual(self.detector.active(), {})
+        self.assertEqual([event for event, _ in self.emitted], ['plc_alarm', 'plc_alarm'])
+
+    def test_chattering_fault_emits_once(self):
+        for ts in range(6):
+            raw = STATUS_IDLE | (BIT_VFD_ERROR if ts % 2 == 0 else 0)
+            self.detector.observe("m1", raw, 0, ts=ts * 0.5)
+        self.assertEqual(len(self.emitted), 1)
+        self.assertIn("VFD", self.detector.active("m1")["m1"])
+
+    def test_emergency_stop_is_active_low(self):
+        events = self.detector.observe("m2", STATUS_IDLE & ~BIT_NO_EMERGENCY, 0, ts=0)
+        self.assertEqual([e['alarm'] for e in events], ["PARADA_EMERGENCIA"])
+        self.assertEqual(events[0]['description'], "Parada de emergencia presionada y activa")
+
+    def test_from_config(self):
+        self.assertIsNone(AlarmDetector.from_config(False))
+        for value in (None, True, {}):
+            self.assertEqual(AlarmDetector.from_config(value).clear_debounce, 2.0)
+        self.assertEqual(AlarmDetector.from_config({"clear_debounce": 5}).clear_debounce, 5)
+
+    def test_api_alarms(self):
+        manager = PLCManager([], fleet={'count': 2, 'seed': 1})
+        try:
+            client = create_app(plc_manager=manager, enable_swagger=False,
+                                alarm_detector=self.detector).test_client()
+            self.detector.observe_status("fleet_1", {'raw_status': STATUS_IDLE | BIT_ALARM,
+                                                     'position': 4}, 10.0)
+            data = client.get('/v1/alarms').get_json()['data']
+            self.assertEqual(list(data['active']), ["fleet_1"])
+            self.assertEqual(len(data['events']), 1)
+            since = data['events'][0]['id']
+            self.assertEqual(client.get(f'/v1/alarms?since_id={since}')
+                             .get_json()['data']['events'], [])
+            self.assertEqual(client.get('/v1/alarms?since_id=x').status_code, 400)
+        finally:
+            manager.close_all_connections()
+
+    def test_api_alarms_disabled(self):
+        manager = PLCManager([], fleet={'count': 1, 'seed': 1})
+        try:
+            client = create_app(plc_manager=manager, enable_swagger=False).test_client()
+            response = client.get('/v1/alarms')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.get_json()['code'], 'FEATURE_DISABLED')
+        finally:
+            manager.close_all_connections()
+
+    def test_websocket_alarm_subscription(self):
+        from websocket_server import WebSocketServer
+        server = WebSocketServer()
+        subscriber, other = FakeWebSocket(), FakeWebSocket()
+        server.clients.update({subscriber, other})
+
+        async def scenario():
+            await server.handle_subscription_request(subscriber, {"subscription_type": "alarms"})
+            for event in server.detect_alarms({"m1": {'raw_status': STATUS_IDLE | BIT_ALARM,
+                                                      'position': 1},
+                                               "m2": {'error': 'timeout'}}):
+                await server.broadcast_message({"type": "plc_alarm", **event},
+                                               server.alarm_subscribers)
+
+        asyncio.run(scenario())
+        self.assertEqual(subscriber.sent[0]['type'], "subscription_confirmed")
+        self.assertEqual(subscriber.sent[1]['type'], "plc_alarm")
+        self.assertEqual(subscriber.sent[1]['alarm'], "ALARMA")
+        self.assertEqual(other.sent, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -115,6 +115,17 @@ class TestAPI(unittest.TestCase):
             if acquired:
                 plc_access_lock.release()
 
+    def test_metrics_endpoint(self):
+        self.client.get('/v1/status')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        text = response.get_data(as_text=True)
+        self.assertIn(
+            'carousel_http_request_seconds_count{method="GET",route="/v1/status",status="200"}',
+            text)
+        self.assertIn('# TYPE carousel_plc_exchange_seconds histogram', text)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from models.circuit_breaker import CircuitBreaker, CircuitOpenError
+from models.plc_manager import PLCManager
+from tests.conftest import FakeClock
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(
+            failure_threshold=2, recovery_timeout=5.0, clock=self.clock)
+
+    def test_opens_after_threshold(self):
+        self.breaker.record_failure("x")
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.breaker.record_failure("x")
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_half_open_single_trial(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 5.0
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_trial_reopens(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 6.0
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.record_failure("sigue caído")
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertAlmostEqual(self.breaker.retry_in(), 5.0)
+
+
+class TestManagerBreaker(unittest.TestCase):
+    def setUp(self):
+        self.manager = PLCManager([{
+            "id": "m1", "ip": "127.0.0.1", "port": 2000, "simulator": True,
+            "circuit_breaker": {"failure_threshold": 2, "recovery_timeout": 60}
+        }])
+        self.calls = 0
+
+        def failing_status():
+            self.calls += 1
+            raise RuntimeError("sin respuesta")
+        self.manager.controllers["m1"].get_current_status = failing_status
+        self.manager._ensure_probe_thread = lambda: None
+
+    def test_fail_fast_when_open(self):
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                self.manager.get_machine_status("m1")
+        with self.assertRaises(CircuitOpenError):
+            self.manager.get_machine_status("m1")
+        self.assertEqual(self.calls, 2)
+        machine = self.manager.get_available_machines()[0]
+        self.assertEqual(machine["status"], "unavailable")
+        self.assertEqual(machine["circuit"]["state"], CircuitBreaker.OPEN)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import threading
+import time
+import unittest
+from models.fleet_simulator import FleetSimulator, FleetPLC
+from models.plc_manager import PLCManager
+from tests.conftest import FakeClock
+
+
+class TestFleetSimulator(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.fleet = FleetSimulator(1000, n_buckets=10, bucket_interval=1.0,
+                                    seed=5, clock=self.clock)
+
+    def test_compact_state(self):
+        self.assertEqual(len(self.fleet.status), 1000)
+        self.assertEqual(self.fleet.read(0)[0], 0b00010100)
+        self.assertEqual(FleetSimulator(1000, seed=5).position, self.fleet.position)
+
+    def test_lazy_move_along_shorter_direction(self):
+        self.fleet.position[7] = 1
+        self.assertTrue(self.fleet.start_move(7, 8))  # 3 cangilones descendiendo
+        status, position = self.fleet.read(7)
+        self.assertTrue(status & 0b10000010 == 0b10000010)
+        self.assertEqual(position, 1)
+        self.assertFalse(self.fleet.start_move(7, 4))
+        self.clock.now = 2.0
+        self.assertEqual(self.fleet.read(7)[1], 9)
+        self.clock.now = 3.0
+        self.assertEqual(self.fleet.read(7), (0b00010100, 8))
+        self.assertEqual(self.fleet.stats()['moving'], 0)
+
+    def test_concurrent_exchanges_and_stats(self):
+        fleet = FleetSimulator(8, bucket_interval=0.001, seed=1)
+
+        def worker(index):
+            for i in range(500):
+                fleet.exchange(index, 1, i % 10)
+
+        threads = [threading.Thread(target=worker, args=(i % 8,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            fleet.stats()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(fleet.stats()['exchanges'], 8 * 500)
+
+    def test_fleet_plc_interface(self):
+        plc = FleetPLC(self.fleet, 3)
+        target = (self.fleet.read(3)[1] + 1) % 10
+        with plc:
+            plc.send_command(1, target)
+            self.assertTrue(plc.receive_response()['status_code'] & 0b10)
+        self.clock.now = 1.0
+        self.assertEqual(plc.get_current_status()['position'], target)
+        self.assertEqual(self.fleet.exchanges, 2)
+
+
+class TestPLCManagerFleet(unittest.TestCase):
+    def test_manager_with_thousand_machines(self):
+        manager = PLCManager([], fleet={'count': 1000, 'seed': 1, 'bucket_interval': 0.01})
+        try:
+            self.assertEqual(len(manager.get_available_machines()), 1000)
+            start = time.monotonic()
+            for machine_id in manager.controllers:
+                manager.get_machine_status(machine_id)
+            self.assertLess(time.monotonic() - start, 10.0)
+            manager.move_machine_to_position('fleet_007', 5)
+            self.assertEqual(manager.health_check()['fleet']['machines'], 1000)
+        finally:
+            manager.close_all_connections()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from models.latency_tracker import LatencyEstimator
+
+
+class TestLatencyEstimator(unittest.TestCase):
+    def test_ceiling_without_samples(self):
+        estimator = LatencyEstimator(floor=0.1, ceiling=3.0)
+        self.assertEqual(estimator.timeout(), 3.0)
+        self.assertIsNone(estimator.percentile(50))
+
+    def test_converges_to_floor_on_fast_link(self):
+        estimator = LatencyEstimator(floor=0.1, ceiling=3.0)
+        for _ in range(50):
+            estimator.record(0.005)
+        self.assertAlmostEqual(estimator.timeout(), 0.1)
+
+    def test_tracks_slow_link(self):
+        estimator = LatencyEstimator(floor=0.1, ceiling=3.0)
+        for _ in range(50):
+            estimator.record(0.4)
+        self.assertGreater(estimator.timeout(), 0.4)
+        self.assertLess(estimator.timeout(), 1.0)
+
+    def test_timeout_backoff_resets_on_sample(self):
+        estimator = LatencyEstimator(floor=0.1, ceiling=3.0)
+        for _ in range(50):
+            estimator.record(0.1)
+        base = estimator.timeout()
+        estimator.record_timeout()
+        self.assertAlmostEqual(estimator.timeout(), min(3.0, base * 2))
+        estimator.record(0.1)
+        self.assertLessEqual(estimator.timeout(), base)
+
+    def test_percentiles(self):
+        estimator = LatencyEstimator(window=100)
+        for i in range(1, 101):
+            estimator.record(i / 1000)
+        snapshot = estimator.snapshot()
+        self.assertEqual(snapshot["samples"], 100)
+        self.assertAlmostEqual(snapshot["p50_ms"], 50.0, delta=1.0)
+        self.assertAlmostEqual(snapshot["p99_ms"], 99.0, delta=1.0)
+
+    def test_invalid_bounds(self):
+        with self.assertRaises(ValueError):
+            LatencyEstimator(floor=2.0, ceiling=1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import logging
+import queue
+import threading
+import unittest
+from commons.log_pipeline import (NonBlockingQueueHandler, SampledLogFilter,
+                                  async_handler)
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.threads = set()
+        self.done = threading.Event()
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+        self.threads.add(threading.get_ident())
+        self.done.set()
+
+
+class TestLogPipeline(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("test_log_pipeline")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+
+    def tearDown(self):
+        self.logger.handlers.clear()
+        self.logger.filters.clear()
+
+    def test_records_are_written_from_listener_thread(self):
+        target = RecordingHandler()
+        target.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        self.logger.addHandler(async_handler(target))
+        self.logger.info("Máquina %s en posición %d", "m1", 3)
+        self.assertTrue(target.done.wait(2))
+        self.assertEqual(target.messages, ["INFO Máquina m1 en posición 3"])
+        self.assertNotIn(threading.get_ident(), target.threads)
+
+    def test_message_is_resolved_when_logged(self):
+        target = RecordingHandler()
+        target.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        handler = NonBlockingQueueHandler(queue.Queue())
+        self.logger.addHandler(handler)
+        status = {'position': 3}
+        self.logger.info("Estado: %s", status)
+        try:
+            raise ValueError("sin conexión")
+        except ValueError:
+            self.logger.exception("Fallo")
+        status['position'] = 7  # Cambia después del evento
+        first, second = handler.queue.get_nowait(), handler.queue.get_nowait()
+        self.assertEqual(first.getMessage(), "Estado: {'position': 3}")
+        self.assertIsNone(first.args)
+        self.assertIsNone(second.exc_info)
+        self.assertIn("ValueError: sin conexión", second.getMessage())
+        target.handle(first)
+        self.assertEqual(target.messages, ["INFO Estado: {'position': 3}"])
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = NonBlockingQueueHandler(queue.Queue(1))
+        self.logger.addHandler(handler)
+        for _ in range(3):
+            self.logger.info("estado")
+        self.assertEqual(handler.dropped, 2)
+
+    def test_sampled_filter(self):
+        target = RecordingHandler()
+        self.logger.addHandler(target)
+        self.logger.addFilter(SampledLogFilter(every=3))
+        for _ in range(6):
+            self.logger.info("STATUS %s", "m1", extra={"sample_key": "m1"})
+            self.logger.info("STATUS %s", "m2", extra={"sample_key": "m2"})
+        self.logger.info("COMMAND")
+        self.logger.warning("STATUS %s", "m1", extra={"sample_key": "m1"})
+        self.assertEqual(target.messages,
+                         ["STATUS m1", "STATUS m2", "STATUS m1", "STATUS m2",
+                          "COMMAND", "STATUS m1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
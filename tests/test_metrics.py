@@ -0,0 +1,44 @@
+import unittest
+from commons.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_and_gauge_exposition(self):
+        commands = self.registry.counter(
+            "plc_commands_total", "Comandos", ("machine", "command"))
+        commands.labels("m1", 0).inc()
+        commands.labels("m1", 0).inc(2)
+        clients = self.registry.gauge("clients", "Clientes")
+        clients.set_function(lambda: 7)
+        text = self.registry.render()
+        self.assertIn("# TYPE plc_commands_total counter", text)
+        self.assertIn('plc_commands_total{machine="m1",command="0"} 3', text)
+        self.assertIn("clients 7", text)
+
+    def test_histogram_cumulative_buckets(self):
+        latency = self.registry.histogram("latency_seconds", "Latencia", ("machine",),
+                                          buckets=(0.01, 0.1, 1.0))
+        for value in (0.005, 0.05, 0.05, 2.0):
+            latency.labels('a"b').observe(value)
+        text = self.registry.render()
+        self.assertIn('latency_seconds_bucket{machine="a\\"b",le="0.01"} 1', text)
+        self.assertIn('latency_seconds_bucket{machine="a\\"b",le="0.1"} 3', text)
+        self.assertIn('latency_seconds_bucket{machine="a\\"b",le="+Inf"} 4', text)
+        self.assertIn('latency_seconds_count{machine="a\\"b"} 4', text)
+        self.assertIn('latency_seconds_sum{machine="a\\"b"} 2.105', text)
+
+    def test_invalid_usage(self):
+        counter = self.registry.counter("c_total", "C", ("machine",))
+        with self.assertRaises(ValueError):
+            counter.labels("a", "b")
+        with self.assertRaises(ValueError):
+            counter.labels("a").inc(-1)
+        with self.assertRaises(ValueError):
+            self.registry.counter("c_total", "C")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from api import create_app
+from models.movement_analytics import MovementAnalytics
+from models.plc_manager import PLCManager
+from models.plc_simulator import (BIT_ALARM, BIT_DESCENDING, BIT_NOT_READY, BIT_RUN,
+                                  STATUS_IDLE)
+
+MOVING = STATUS_IDLE | BIT_RUN | BIT_NOT_READY
+
+
+class TestMovementAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        self.analytics = MovementAnalytics(
+            {"m1": 8}, window_seconds=600, slot_seconds=60, max_gap=5,
+            emit=lambda event, payload: self.events.append((event, payload)))
+
+    def feed(self, ts, raw, position, machine="m1"):
+        self.analytics.observe_status(machine, {'raw_status': raw, 'position': position}, ts)
+
+    def test_timed_move_uses_direction_and_ring(self):
+        self.feed(0, STATUS_IDLE, 1)
+        self.feed(1, MOVING | BIT_DESCENDING, 0)
+        self.feed(2, MOVING | BIT_DESCENDING, 7)
+        self.feed(4, STATUS_IDLE, 6)  # 1 -> 6 descendiendo: 3 cangilones en un anillo de 8
+        stats = self.analytics.machine("m1")
+        self.assertEqual(stats['moves'], 1)
+        self.assertEqual(stats['buckets_traveled'], 3)
+        self.assertEqual(stats['move_duration']['mean_s'], 3.0)
+        self.assertEqual(stats['seconds_per_bucket'], 1.0)
+        self.assertEqual(stats['time_s']['busy'], 3.0)
+        self.assertEqual(self.events[0][0], 'machine_analytics')
+        self.assertEqual(self.events[0][1]['move'],
+                         {'from': 1, 'to': 6, 'buckets': 3, 'duration_s': 3.0, 'ended_at': 4})
+
+    def test_untimed_move_alarm_time_and_gaps(self):
+        self.feed(0, STATUS_IDLE, 0)
+        self.feed(1, STATUS_IDLE, 7)  # Viaje corto entre dos consultas
+        self.feed(2, STATUS_IDLE | BIT_ALARM, 7)
+        self.feed(12, STATUS_IDLE, 7)  # 10 s sin lecturas: 5 en alarma, 5 desconocidos
+        stats = self.analytics.machine("m1")
+        self.assertEqual((stats['moves'], stats['buckets_traveled']), (1, 1))
+        self.assertIsNone(stats['move_duration']['mean_s'])
+        self.assertEqual(stats['time_s'], {'idle': 2.0, 'busy': 0.0, 'alarm': 5.0, 'unknown': 5.0})
+        self.assertEqual(stats['utilization']['alarm'], round(5 / 7, 4))
+
+    def test_window_expires_old_moves(self):
+        for minute in range(12):
+            self.feed(minute * 60, STATUS_IDLE, minute % 8)
+        stats = self.analytics.machine("m1", now=660)
+        self.assertEqual(stats['moves'], 11)
+        self.assertEqual(stats['window']['moves'], 10)
+        self.assertEqual(stats['window']['moves_per_hour'], 60.0)
+        self.assertEqual(self.analytics.machine("m1", now=5000)['window']['moves'], 0)
+
+    def test_from_config(self):
+        configs = [{"id": "m1", "bucket_count": 12}]
+        self.assertIsNone(MovementAnalytics.from_config(False, configs))
+        for value in (None, True, {}):
+            self.assertEqual(MovementAnalytics.from_config(value, configs).bucket_counts,
+                             {"m1": 12})
+        analytics = MovementAnalytics.from_config({"window_seconds": 120}, configs)
+        self.assertEqual(analytics.window_seconds, 120)
+
+    def test_api(self):
+        manager = PLCManager([], fleet={'count': 2, 'seed': 1})
+        analytics = MovementAnalytics.for_machines(manager.plc_configs)
+        try:
+            client = create_app(plc_manager=manager, enable_swagger=False,
+                                movement_analytics=analytics).test_client()
+            self.assertIsNone(client.get('/v1/machines/fleet_0/analytics').get_json()['data'])
+            analytics.observe_status("fleet_0", {'raw_status': STATUS_IDLE, 'position': 0}, 1.0)
+            analytics.observe_status("fleet_0", {'raw_status': STATUS_IDLE, 'position': 2}, 2.0)
+            data = client.get('/v1/machines/fleet_0/analytics').get_json()['data']
+            self.assertEqual(data['moves'], 1)
+            summary = client.get('/v1/analytics').get_json()['data']
+            self.assertEqual(summary['fleet']['moves'], 1)
+            self.assertEqual(client.get('/v1/machines/nope/analytics').status_code, 404)
+        finally:
+            manager.close_all_connections()
+
+    def test_api_disabled(self):
+        manager = PLCManager([], fleet={'count': 1, 'seed': 1})
+        try:
+            client = create_app(plc_manager=manager, enable_swagger=False).test_client()
+            for url in ('/v1/analytics', '/v1/machines/fleet_0/analytics'):
+                response = client.get(url)
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(response.get_json()['code'], 'FEATURE_DISABLED')
+        finally:
+            manager.close_all_connections()
+
+
+if __name__ == '__main__':
+    unittest.main()
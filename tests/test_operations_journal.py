@@ -0,0 +1,84 @@
+import os
+import tempfile
+import time
+import unittest
+from api import create_app
+from models.operations_journal import OperationsJournal
+from models.plc_manager import PLCManager
+
+
+class TestOperationsJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "operations.sqlite3")
+        self.journal = OperationsJournal(self.path)
+
+    def tearDown(self):
+        self.journal.close()
+        self.tmp.cleanup()
+
+    def test_record_and_query_filters(self):
+        now = time.time()
+        self.journal.record("m1", 1, 3, client="10.0.0.1",
+                            before={'status_code': 20, 'position': 0},
+                            after={'status_code': 20, 'position': 3},
+                            duration=0.25, ts=now - 60)
+        self.journal.record("m2", 1, 5, client="10.0.0.2", ts=now - 30)
+        self.journal.record("m1", 2, client="10.0.0.2", result="error",
+                            error="timeout", ts=now)
+        self.journal.record("m1", 0, client="10.0.0.1", ts=now)  # estado: no se registra
+        self.assertTrue(self.journal.flush())
+
+        operations = self.journal.query(machine="m1")
+        self.assertEqual([op["command"] for op in operations], [2, 1])
+        self.assertEqual(operations[0]["error"], "timeout")
+        self.assertEqual((operations[1]["position_before"], operations[1]["position_after"]),
+                         (0, 3))
+        self.assertEqual(operations[1]["duration_ms"], 250.0)
+        self.assertEqual(len(self.journal.query(client="10.0.0.2")), 2)
+        self.assertEqual(len(self.journal.query(since=now - 45)), 2)
+        self.assertEqual(len(self.journal.query(until=now - 45)), 1)
+        self.assertEqual(len(self.journal.query(limit=1)), 1)
+
+    def test_retention_and_row_cap(self):
+        self.journal.retention_days = 1
+        self.journal.max_rows = 3
+        now = time.time()
+        self.journal.record("m1", 1, 1, ts=now - 3 * 86400)
+        for i in range(5):
+            self.journal.record("m1", 1, i, ts=now - 10 + i)
+        self.journal.prune()
+        self.assertEqual([op["argument"] for op in self.journal.query()], [4, 3, 2])
+
+    def test_manager_commands_reach_api(self):
+        manager = PLCManager([], fleet={'count': 2, 'seed': 1}, journal=self.journal)
+        try:
+            client = create_app(plc_manager=manager, enable_swagger=False).test_client()
+            response = client.post('/v1/machines/fleet_1/move', json={'position': 4})
+            self.assertEqual(response.status_code, 200)
+            client.get('/v1/machines/fleet_0/status')
+            self.journal.flush()
+            data = client.get('/v1/operations?machine=fleet_1').get_json()['data']
+            self.assertEqual(data['count'], 1)
+            operation = data['operations'][0]
+            self.assertEqual((operation['command'], operation['argument']), (1, 4))
+            self.assertEqual(operation['client'], '127.0.0.1')
+            self.assertEqual(client.get('/v1/operations?machine=fleet_0')
+                             .get_json()['data']['count'], 0)
+            self.assertEqual(client.get('/v1/operations?since=ayer').status_code, 400)
+        finally:
+            manager.close_all_connections()
+
+    def test_disabled_journal(self):
+        manager = PLCManager([], fleet={'count': 1, 'seed': 1})
+        try:
+            client = create_app(plc_manager=manager, enable_swagger=False).test_client()
+            response = client.get('/v1/operations')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.get_json()['code'], 'FEATURE_DISABLED')
+        finally:
+            manager.close_all_connections()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import socket
+import threading
+import time
+import unittest
+from controllers.carousel_controller import CarouselController
+from models.plc import PLC, PLCReconnectingError
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class FakePLCServer:
+    """Servidor TCP mínimo que responde 2 bytes a cada comando recibido."""
+
+    def __init__(self, port, status=20, position=3):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(('127.0.0.1', port))
+        self.server.listen()
+        self.response = bytes([status, position])
+        self.received = []
+        self.running = True
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        while self.running:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    data = conn.recv(2)
+                except OSError:
+                    return
+                if not data:
+                    return
+                self.received.append(data)
+                conn.sendall(self.response)
+
+    def stop(self):
+        self.running = False
+        self.server.close()
+
+
+class TestPLCReconnect(unittest.TestCase):
+    def setUp(self):
+        self.port = free_port()
+        self.plc = PLC('127.0.0.1', self.port)
+        self.plc.base_backoff = 0.05
+        self.server = None
+
+    def tearDown(self):
+        self.plc.shutdown()
+        if self.server:
+            self.server.stop()
+
+    def test_connect_failure_does_not_block(self):
+        start = time.monotonic()
+        self.assertFalse(self.plc.connect())
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(self.plc.connection_state, 'reconnecting')
+        with self.assertRaises(PLCReconnectingError):
+            self.plc.send_command(0)
+
+    def test_supervisor_recovers_connection(self):
+        self.assertFalse(self.plc.connect())
+        self.server = FakePLCServer(self.port)
+        deadline = time.monotonic() + 3
+        while self.plc.sock is None and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.plc.connection_state, 'connected')
+        self.assertTrue(self.plc.connect())
+        self.plc.send_command(0)
+        self.assertEqual(self.plc.receive_response(),
+                         {'status_code': 20, 'position': 3})
+
+
+class TestPLCSocketOptions(unittest.TestCase):
+    def setUp(self):
+        self.port = free_port()
+        self.server = FakePLCServer(self.port)
+
+    def tearDown(self):
+        self.plc.shutdown()
+        self.server.stop()
+
+    def test_keepalive_and_nodelay(self):
+        self.plc = PLC('127.0.0.1', self.port, keepalive={'idle': 7})
+        self.assertTrue(self.plc.connect())
+        sock = self.plc.sock
+        self.assertEqual(sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE), 1)
+        self.assertEqual(sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY), 1)
+        if hasattr(socket, 'TCP_KEEPIDLE'):
+            self.assertEqual(
+                sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE), 7)
+
+    def test_persistent_connection_and_heartbeat(self):
+        self.plc = PLC('127.0.0.1', self.port, persistent=True,
+                       heartbeat_interval=0.1)
+        with self.plc:
+            self.plc.send_command(0)
+            self.plc.receive_response()
+        self.assertIsNotNone(self.plc.sock)
+        time.sleep(0.5)
+        self.assertGreater(len(self.server.received), 1)
+
+    def test_adaptive_timeout_from_latency(self):
+        self.plc = PLC('127.0.0.1', self.port, timeout_floor=0.05,
+                       timeout_ceiling=2.0)
+        self.assertEqual(self.plc.latency.timeout(), 2.0)
+        for _ in range(20):
+            self.assertNotIn('error', self.plc.get_current_status())
+        self.assertEqual(self.plc.latency.snapshot()['samples'], 20)
+        self.assertLess(self.plc.latency.timeout(), 0.5)
+
+    def test_latency_excludes_response_delay(self):
+        self.plc = PLC('127.0.0.1', self.port, persistent=True)
+        controller = CarouselController(self.plc)
+        controller.response_delay = 0.2
+        started = time.monotonic()
+        for _ in range(3):
+            self.assertEqual(controller.send_command(0)['raw_status'], 20)
+        # La pausa se mantiene, pero no entra en la muestra de latencia
+        self.assertGreaterEqual(time.monotonic() - started, 0.6)
+        self.assertEqual(self.plc.latency.snapshot()['samples'], 9)  # Con estado antes y después
+        self.assertLess(self.plc.latency.percentile(100), 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import time
+import unittest
+from models.plc_manager import PLCManager
+
+
+class TestPLCManagerHealth(unittest.TestCase):
+    def setUp(self):
+        self.manager = PLCManager([], fleet={'count': 3, 'seed': 1},
+                                  health_stale_after=30.0, deep_health_interval=60.0)
+        self.exchanges = lambda: self.manager.fleet.exchanges
+
+    def tearDown(self):
+        self.manager.close_all_connections()
+
+    def test_cached_health_never_touches_plcs(self):
+        health = self.manager.health_check()
+        self.assertEqual(self.exchanges(), 0)
+        self.assertEqual(health['mode'], 'cached')
+        self.assertEqual(health['unknown_machines'], 3)
+        self.assertEqual(health['overall_status'], 'healthy')
+
+        self.manager.get_machine_status('fleet_0')
+        exchanges = self.exchanges()
+        self.manager.last_success['fleet_1'] = time.time() - 60
+        health = self.manager.health_check()
+        self.assertEqual(self.exchanges(), exchanges)
+        self.assertEqual(health['machines']['fleet_0']['status'], 'healthy')
+        self.assertEqual(health['machines']['fleet_1']['status'], 'stale')
+        self.assertEqual(health['machines']['fleet_2']['status'], 'unknown')
+        self.assertEqual(health['overall_status'], 'degraded')
+
+    def test_open_breaker_is_unhealthy(self):
+        breaker = self.manager.breakers['fleet_2']
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure('sin respuesta')
+        entry = self.manager.health_check()['machines']['fleet_2']
+        self.assertEqual(entry['status'], 'unhealthy')
+        self.assertEqual(entry['error'], 'sin respuesta')
+
+    def test_deep_health_is_rate_limited(self):
+        first = self.manager.health_check(deep=True)
+        self.assertFalse(first['cached'])
+        self.assertEqual(first['healthy_machines'], 3)
+        exchanges = self.exchanges()
+        second = self.manager.health_check(deep=True)
+        self.assertTrue(second['cached'])
+        self.assertEqual(self.exchanges(), exchanges)
+        # El sondeo profundo también alimenta la salud en caché
+        self.assertEqual(self.manager.health_check()['healthy_machines'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
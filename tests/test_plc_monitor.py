@@ -0,0 +1,83 @@
+import unittest
+from controllers.plc_monitor import MultiPLCMonitor
+
+
+class FakeManager:
+    def __init__(self):
+        self.plc_configs = [{"id": "m1"}, {"id": "m2", "min_emit_interval": 0}]
+        self.controllers = {"m1": None, "m2": None}
+        self.responses = {}
+
+    def get_machine_status(self, machine_id, client_ip=None):
+        response = self.responses[machine_id]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class TestMultiPLCMonitor(unittest.TestCase):
+    def setUp(self):
+        self.manager = FakeManager()
+        self.events = []
+        self.monitor = MultiPLCMonitor(
+            self.manager, lambda event, data: self.events.append((event, data)),
+            min_emit_interval=1.0)
+
+    def test_emits_only_changes(self):
+        self.manager.responses["m1"] = {'raw_status': 20, 'position': 1}
+        self.monitor.poll_machine("m1", now=100.0)
+        self.monitor.poll_machine("m1", now=102.0)
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(self.events[0][0], 'machine_status')
+        self.assertEqual(self.events[0][1]['machine_id'], 'm1')
+
+    def test_rate_limit_coalesces_changes(self):
+        self.manager.responses["m1"] = {'raw_status': 20, 'position': 1}
+        self.monitor.poll_machine("m1", now=100.0)
+        self.manager.responses["m1"] = {'raw_status': 22, 'position': 2}
+        self.monitor.poll_machine("m1", now=100.2)
+        self.manager.responses["m1"] = {'raw_status': 22, 'position': 3}
+        self.monitor.poll_machine("m1", now=100.4)
+        self.assertEqual(len(self.events), 1)
+        self.monitor.poll_machine("m1", now=101.5)
+        self.assertEqual(len(self.events), 2)
+        self.assertEqual(self.events[1][1]['data']['position'], 3)
+
+    def test_per_machine_limit_override(self):
+        for i, now in enumerate((100.0, 100.1, 100.2)):
+            self.manager.responses["m2"] = {'raw_status': 20, 'position': i}
+            self.monitor.poll_machine("m2", now=now)
+        self.assertEqual(len(self.events), 3)
+
+    def test_error_and_listener(self):
+        seen = []
+        self.monitor.add_listener(lambda mid, status, ts: seen.append(mid))
+        self.manager.responses["m1"] = RuntimeError("sin conexión")
+        self.assertIsNone(self.monitor.poll_machine("m1"))
+        self.assertEqual(self.events[0][0], 'machine_status_error')
+        self.manager.responses["m2"] = {'raw_status': 20, 'position': 0}
+        self.monitor.poll_machine("m2", now=100.0)
+        self.assertEqual(seen, ["m2"])
+        self.assertEqual(self.monitor.last_success["m2"], 100.0)
+
+    def test_outage_is_always_reported_and_recovery_emitted(self):
+        self.manager.responses["m1"] = {'raw_status': 20, 'position': 1}
+        self.monitor.poll_machine("m1", now=100.0)
+        self.manager.responses["m1"] = RuntimeError("sin conexión")
+        with self.assertLogs('controllers.plc_monitor', level='WARNING') as logs:
+            # El primer error se emite aunque esté dentro de la ventana del estado
+            self.monitor.poll_machine("m1", now=100.1)
+            self.monitor.poll_machine("m1", now=100.5)
+            self.monitor.poll_machine("m1", now=101.2)
+        self.assertEqual(len(logs.records), 1)  # Un registro por transición
+        self.assertEqual([event for event, _ in self.events],
+                         ['machine_status', 'machine_status_error', 'machine_status_error'])
+        # Se recupera con el mismo estado que antes: se emite igualmente
+        self.manager.responses["m1"] = {'raw_status': 20, 'position': 1}
+        self.monitor.poll_machine("m1", now=101.3)
+        self.assertEqual(self.events[-1][0], 'machine_status')
+        self.assertEqual(self.events[-1][1]['data']['position'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
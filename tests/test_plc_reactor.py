@@ -0,0 +1,140 @@
+import socket
+import time
+import unittest
+from controllers.carousel_controller import CarouselController
+from models.plc_manager import PLCManager
+from models.plc_reactor import PLCReactor, ReactorPLC
+from tests.test_plc import FakePLCServer, free_port
+
+
+class TestPLCReactor(unittest.TestCase):
+    def setUp(self):
+        self.reactor = PLCReactor(connect_timeout=1.0, default_timeout=1.0)
+        self.reactor.start()
+        self.servers = []
+
+    def tearDown(self):
+        self.reactor.stop()
+        for server in self.servers:
+            server.stop()
+
+    def start_server(self, **kwargs):
+        port = free_port()
+        self.servers.append(FakePLCServer(port, **kwargs))
+        return port
+
+    def test_exchange_many_machines(self):
+        ports = [self.start_server(position=i) for i in range(5)]
+        futures = [self.reactor.submit('127.0.0.1', port, b'\x00')
+                   for port in ports for _ in range(3)]
+        results = [f.result(timeout=3) for f in futures]
+        self.assertEqual(results[0], bytes([20, 0]))
+        self.assertEqual(results[-1], bytes([20, 4]))
+        self.assertEqual(self.reactor.pending_count(), 0)
+
+    def test_connection_refused(self):
+        future = self.reactor.submit('127.0.0.1', free_port(), b'\x00')
+        with self.assertRaises(ConnectionError):
+            future.result(timeout=3)
+
+    def test_deadline(self):
+        silent = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        silent.bind(('127.0.0.1', 0))
+        silent.listen()
+        try:
+            future = self.reactor.submit(
+                '127.0.0.1', silent.getsockname()[1], b'\x00', timeout=0.2)
+            with self.assertRaises(TimeoutError):
+                future.result(timeout=3)
+        finally:
+            silent.close()
+
+    def assert_connect_times_out(self, host, port):
+        reactor = PLCReactor(connect_timeout=0.3, default_timeout=5.0)
+        reactor.start()
+        try:
+            started = time.monotonic()
+            futures = [reactor.submit(host, port, b'\x00') for _ in range(3)]
+            for future in futures:
+                try:
+                    future.result(timeout=3)
+                except ConnectionError:
+                    self.skipTest(f"La red rechaza {host} de inmediato")
+                except TimeoutError:
+                    continue
+                self.fail("El intercambio no debió completarse")
+            self.assertLess(time.monotonic() - started, 2.0)
+            self.assertEqual(reactor.endpoint_state(host, port), 'disconnected')
+        finally:
+            reactor.stop()
+
+    def test_connect_timeout_non_routable(self):
+        # Dirección no enrutable: el SYN nunca recibe respuesta
+        self.assert_connect_times_out('10.255.255.1', 502)
+
+    def test_connect_timeout_full_backlog(self):
+        # Con la cola de aceptación llena el kernel descarta el SYN
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(('127.0.0.1', 0))
+        server.listen(0)
+        port = server.getsockname()[1]
+        fillers = []
+        try:
+            for _ in range(5):
+                filler = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                filler.setblocking(False)
+                filler.connect_ex(('127.0.0.1', port))
+                fillers.append(filler)
+            time.sleep(0.1)
+            self.assert_connect_times_out('127.0.0.1', port)
+        finally:
+            for filler in fillers:
+                filler.close()
+            server.close()
+
+    def test_unexpected_error_keeps_reactor_running(self):
+        port = self.start_server()
+        on_readable = self.reactor._on_readable
+        calls = []
+
+        def broken_once(endpoint):
+            calls.append(endpoint)
+            if len(calls) == 1:
+                raise KeyError("fallo inesperado")
+            on_readable(endpoint)
+
+        self.reactor._on_readable = broken_once
+        with self.assertLogs('models.plc_reactor', level='ERROR'):
+            with self.assertRaises(KeyError):
+                self.reactor.submit('127.0.0.1', port, b'\x00').result(timeout=3)
+        self.assertTrue(self.reactor._thread.is_alive())
+        self.assertEqual(self.reactor.submit('127.0.0.1', port, b'\x00').result(timeout=3),
+                         bytes([20, 3]))
+
+    def test_manager_passes_connect_timeout(self):
+        manager = PLCManager([], transport='reactor', connect_timeout=0.5)
+        try:
+            self.assertEqual(manager.reactor.connect_timeout, 0.5)
+        finally:
+            manager.close_all_connections()
+
+    def test_reactor_plc_adapter(self):
+        port = self.start_server(status=5, position=7)
+        plc = ReactorPLC(self.reactor, '127.0.0.1', port, timeout_ceiling=1.0)
+        self.assertEqual(plc.get_current_status(),
+                         {'status_code': 5, 'position': 7})
+        self.assertEqual(plc.connection_state, 'connected')
+
+    def test_latency_excludes_response_delay(self):
+        port = self.start_server()
+        plc = ReactorPLC(self.reactor, '127.0.0.1', port, timeout_ceiling=1.0)
+        controller = CarouselController(plc)
+        controller.response_delay = 0.2
+        for _ in range(3):
+            self.assertEqual(controller.send_command(0)['raw_status'], 20)
+        self.assertEqual(plc.latency.snapshot()['samples'], 9)  # Con estado antes y después
+        self.assertLess(plc.latency.percentile(100), 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
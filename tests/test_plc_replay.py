@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from models.plc import PLC, PLCTrafficRecorder
+from models.plc_replay import ReplayPLC
+from tests.test_plc import FakePLCServer, free_port
+
+
+class TestTrafficRecordingAndReplay(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'plc.rec')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_record_and_replay_roundtrip(self):
+        port = free_port()
+        server = FakePLCServer(port, status=20, position=7)
+        plc = PLC.from_config({'ip': '127.0.0.1', 'port': port,
+                               'traffic_recording': self.path})
+        try:
+            with plc:
+                plc.send_command(1, 4)
+                plc.receive_response()
+            self.assertEqual(plc.get_current_status(),
+                             {'status_code': 20, 'position': 7})
+        finally:
+            plc.shutdown()
+            server.stop()
+
+        frames = list(PLCTrafficRecorder.read(self.path))
+        self.assertEqual([(d, data) for _t, d, data in frames], [
+            (PLCTrafficRecorder.SENT, b'\x01\x04'),
+            (PLCTrafficRecorder.RECEIVED, b'\x14\x07'),
+            (PLCTrafficRecorder.SENT, b'\x00'),
+            (PLCTrafficRecorder.RECEIVED, b'\x14\x07'),
+        ])
+        timestamps = [t for t, _d, _data in frames]
+        self.assertEqual(timestamps, sorted(timestamps))
+
+        replay = ReplayPLC(self.path, speed=0)
+        with replay:
+            replay.send_command(1, 4)
+            self.assertEqual(replay.receive_response(),
+                             {'status_code': 20, 'position': 7})
+        self.assertEqual(replay.get_current_status(),
+                         {'status_code': 20, 'position': 7})
+        self.assertIn('error', replay.get_current_status())
+
+    def test_replay_original_timing(self):
+        recorder = PLCTrafficRecorder(self.path)
+        recorder.record(PLCTrafficRecorder.SENT, b'\x00')
+        time.sleep(0.2)
+        recorder.record(PLCTrafficRecorder.RECEIVED, b'\x14\x02')
+        recorder.close()
+
+        replay = ReplayPLC(self.path, speed=1.0, loop=True)
+        start = time.monotonic()
+        replay.get_current_status()
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+        fast = ReplayPLC(self.path, speed=10.0, loop=True)
+        start = time.monotonic()
+        for _ in range(3):
+            self.assertEqual(fast.get_current_status()['position'], 2)
+        self.assertLess(time.monotonic() - start, 0.15)
+
+    def test_bounded_size_rotation_and_truncated_tail(self):
+        recorder = PLCTrafficRecorder(self.path, max_bytes=200, backups=1)
+        for _ in range(30):
+            recorder.record(PLCTrafficRecorder.SENT, b'\x00')
+        recorder.close()
+        self.assertLessEqual(os.path.getsize(self.path), 200)
+        self.assertTrue(os.path.exists(self.path + '.1'))
+        self.assertFalse(os.path.exists(self.path + '.2'))
+
+        # Un registro cortado al final no impide leer los anteriores
+        with open(self.path, 'ab') as f:
+            f.write(b'\x00\x01')
+        frames = list(PLCTrafficRecorder.read(self.path))
+        self.assertTrue(frames)
+        self.assertTrue(all(data == b'\x00' for _t, _d, data in frames))
+
+
+if __name__ == '__main__':
+    unittest.main()
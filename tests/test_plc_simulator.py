@@ -1,11 +1,14 @@
 import unittest
-import time
-from models.plc_simulator import PLCSimulator
+from models.plc_simulator import PLCSimulator, CarouselModel, FaultProfile
+from models.plc_manager import PLCManager
+from tests.conftest import FakeClock
 
 
 class TestPLCSimulator(unittest.TestCase):
     def setUp(self):
-        self.plc_simulator = PLCSimulator('127.0.0.1', 2000)
+        self.clock = FakeClock()
+        self.plc_simulator = PLCSimulator(
+            '127.0.0.1', 2000, bucket_interval=0.5, seed=1, clock=self.clock)
 
     def test_connect(self):
         self.assertTrue(self.plc_simulator.connect())
@@ -19,18 +22,20 @@ class TestPLCSimulator(unittest.TestCase):
     def test_send_command_muevete(self):
         self.plc_simulator.connect()
         initial_position = self.plc_simulator.current_position
-        # Elegir una nueva posición distinta a la inicial
-        new_position = initial_position + \
-            1 if initial_position < 10 else initial_position - 1
+        # Elegir una nueva posición distinta a la inicial y dentro del rango 0-9
+        new_position = (initial_position + 1) % 10
         result = self.plc_simulator.send_command(1, new_position)
-        time.sleep(2.5)
+        self.assertTrue(result['status_code'] & 0b10)  # RUN encendido
+        self.clock.now += 0.6
         self.assertEqual(self.plc_simulator.current_position, new_position)
         self.assertNotEqual(
             self.plc_simulator.current_position, initial_position)
+        self.assertFalse(self.plc_simulator.is_running)
 
     def test_send_command_error_en_movimiento(self):
         self.plc_simulator.connect()
-        self.plc_simulator.is_running = True  # Forzar estado en movimiento
+        target = (self.plc_simulator.current_position + 3) % 10
+        self.plc_simulator.send_command(1, target)  # Movimiento en curso
         result = self.plc_simulator.send_command(1, 2)
         self.assertIn('error', result)
         self.assertEqual(result['error'], 'PLC en movimiento')
@@ -40,5 +45,113 @@ class TestPLCSimulator(unittest.TestCase):
         with self.assertRaises(Exception):
             self.plc_simulator.send_command(1, 999)  # Argumento fuera de rango
 
+    def test_seed_is_reproducible(self):
+        other = PLCSimulator('127.0.0.1', 2000, seed=1, clock=self.clock)
+        self.assertEqual(other.current_position,
+                         self.plc_simulator.current_position)
+
     def tearDown(self):
         self.plc_simulator.close()
+
+
+class TestCarouselModel(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.model = CarouselModel(n_buckets=10, bucket_interval=1.0,
+                                   clock=self.clock, initial_position=1)
+
+    def test_idle_status(self):
+        self.assertEqual(self.model.status_code(), 0b00010100)
+
+    def test_moves_along_shorter_direction(self):
+        self.assertTrue(self.model.start_move(8))  # 3 cangilones descendiendo
+        self.assertTrue(self.model.descending)
+        status = self.model.status_code()
+        self.assertTrue(status & 0b10)        # RUN
+        self.assertTrue(status & 0b10000000)  # SENTIDO_GIRO descendente
+        self.assertTrue(status & 0b1)         # No listo durante el movimiento
+        self.clock.now = 1.0
+        self.assertEqual(self.model.position, 0)
+        self.clock.now = 2.5
+        self.assertEqual(self.model.position, 9)
+        self.clock.now = 3.0
+        self.assertEqual(self.model.position, 8)
+        self.assertFalse(self.model.is_running)
+        self.assertEqual(self.model.status_code(), 0b00010100)
+
+    def test_ascending_move_and_busy(self):
+        self.assertTrue(self.model.start_move(3))
+        self.assertFalse(self.model.descending)
+        self.assertFalse(self.model.start_move(5))
+        self.clock.now = 1.0
+        self.assertEqual(self.model.position, 2)
+
+    def test_out_of_range_target(self):
+        with self.assertRaises(ValueError):
+            self.model.start_move(10)
+
+
+class TestFaultProfile(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def test_scheduled_emergency_stop(self):
+        faults = FaultProfile(schedule=[
+            {'fault': 'estop', 'at': 10, 'duration': 5, 'every': 60}], clock=self.clock)
+        self.assertEqual(faults.status_bits(0b00010100), 0b00010100)
+        self.clock.now = 12
+        self.assertEqual(faults.status_bits(0b00010100), 0b00000101)
+        self.clock.now = 71
+        self.assertFalse(faults.status_bits(0b00010100) & 0b00010000)
+        self.clock.now = 76
+        self.assertEqual(faults.status_bits(0b00010100), 0b00010100)
+
+    def test_probabilistic_alarm_latches(self):
+        faults = FaultProfile(probabilities={'alarm': 1.0}, latch=5.0,
+                              clock=self.clock)
+        self.assertTrue(faults.status_bits(0b00010100) & 0b1000)
+        faults.probabilities['alarm'] = 0.0
+        self.clock.now = 4
+        self.assertTrue(faults.status_bits(0b00010100) & 0b1000)
+        self.clock.now = 6
+        self.assertFalse(faults.status_bits(0b00010100) & 0b1000)
+
+    def test_seeded_profiles_are_reproducible(self):
+        spec = {'probabilities': {'drop': 0.5}, 'seed': 3}
+        first = FaultProfile.from_config(spec, 'm1')
+        second = FaultProfile.from_config(spec, 'm1')
+        self.assertEqual([first.should('drop') for _ in range(20)],
+                         [second.should('drop') for _ in range(20)])
+
+    def test_unknown_fault(self):
+        with self.assertRaises(ValueError):
+            FaultProfile(probabilities={'meteor': 1.0})
+
+    def test_simulator_positioning_error_and_drop(self):
+        simulator = PLCSimulator('127.0.0.1', 2000, bucket_interval=0.1,
+                                 clock=self.clock, faults=FaultProfile(
+                                     probabilities={'positioning_error': 1.0},
+                                     clock=self.clock))
+        target = (simulator.current_position + 3) % 10
+        simulator.send_command(1, target)
+        self.clock.now = 1.0
+        status = simulator.get_current_status()
+        self.assertNotEqual(status['position'], target)
+        self.assertTrue(status['status_code'] & 0b01000000)
+        simulator.faults.probabilities = {'drop': 1.0}
+        self.assertIn('error', simulator.get_current_status())
+
+    def test_manager_opens_breaker_on_refused_connects(self):
+        manager = PLCManager(
+            [{'id': 'sim', 'ip': '127.0.0.1', 'port': 1, 'simulator': True}],
+            fault_profiles={'floor': {'probabilities': {'refuse': 1.0}}},
+            default_fault_profile='floor')
+        for _ in range(3):
+            with self.assertRaises(Exception):
+                manager.get_machine_status('sim')
+        self.assertEqual(manager.get_breaker_state('sim')['state'], 'open')
+        manager.close_all_connections()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import time
+import unittest
+from models.plc import PLC
+from models.plc_simulator import FaultProfile
+from models.plc_tcp_simulator import PLCTCPSimulatorServer, load_fault_profiles
+from tests.test_plc import free_port
+
+
+class TestPLCTCPSimulator(unittest.TestCase):
+    def setUp(self):
+        base_port = free_port()
+        self.server = PLCTCPSimulatorServer(
+            base_port, count=3, latency=0.001, bucket_interval=0.05, seed=7)
+        self.server.start_in_thread()
+        self.plcs = [PLC(config["ip"], config["port"])
+                     for config in self.server.machine_configs()]
+
+    def tearDown(self):
+        for plc in self.plcs:
+            plc.shutdown()
+        self.server.stop()
+
+    def test_status_on_every_port(self):
+        for plc in self.plcs:
+            status = plc.get_current_status()
+            self.assertNotIn('error', status)
+            self.assertEqual(status['status_code'] & 0b11, 0)  # Listo y detenido
+            self.assertIn(status['position'], range(10))
+
+    def test_move_sets_run_until_buckets_travelled(self):
+        plc = self.plcs[0]
+        target = (plc.get_current_status()['position'] + 3) % 10
+        with plc:
+            plc.send_command(1, target)
+            response = plc.receive_response()
+        self.assertTrue(response['status_code'] & 0b10)
+        time.sleep(0.4)
+        status = plc.get_current_status()
+        self.assertEqual(status['position'], target)
+        self.assertFalse(status['status_code'] & 0b10)
+
+
+class TestPLCTCPSimulatorFaults(unittest.TestCase):
+    def test_partial_response_is_reported_by_client(self):
+        port = free_port()
+        server = PLCTCPSimulatorServer(
+            port, count=1, latency=0,
+            faults={port: FaultProfile(probabilities={'partial': 1.0})})
+        server.start_in_thread()
+        plc = PLC('127.0.0.1', port)
+        try:
+            status = plc.get_current_status()
+            self.assertIn('error', status)
+        finally:
+            plc.shutdown()
+            server.stop()
+
+    def test_load_fault_profiles_from_multi_config(self):
+        faults = load_fault_profiles({
+            'fault_profiles': {'flaky': {'probabilities': {'drop': 0.1}}},
+            'default_fault_profile': 'flaky',
+            'plc_machines': [{'port': 15001, 'fault_profile': {'probabilities': {}}}]
+        }, 15000, 3)
+        self.assertEqual(sorted(faults), [15000, 15001, 15002])
+        self.assertEqual(faults[15000].probabilities, {'drop': 0.1})
+        self.assertEqual(faults[15001].probabilities, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+import unittest
+from api import create_app
+from controllers.carousel_controller import CarouselController
+from controllers.rotation_planner import ASCENDING, DESCENDING, RotationPlanner
+from models.plc_manager import PLCManager
+from models.plc_simulator import BIT_ALARM, BIT_NOT_READY, BIT_RUN, STATUS_IDLE
+
+
+class ScriptedPLC:
+    """PLC de prueba: estado antes del comando y respuesta fijos."""
+
+    def __init__(self, before, reply):
+        self.before = before
+        self.reply = reply
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def get_current_status(self):
+        return dict(self.before)
+
+    def send_command(self, command, argument=None):
+        return True
+
+    def receive_response(self):
+        return dict(self.reply)
+
+
+class TestRotationPlanner(unittest.TestCase):
+    def test_shorter_direction_on_ring(self):
+        planner = RotationPlanner(12, seconds_per_bucket=0.5)
+        self.assertEqual(planner.plan(2, 5)['direction'], ASCENDING)
+        plan = planner.plan(1, 10)
+        self.assertEqual((plan['direction'], plan['buckets'], plan['eta_s']), (DESCENDING, 3, 1.5))
+        self.assertEqual(planner.plan(0, 6)['direction'], ASCENDING)  # empate
+        plan = planner.plan(4, 4)
+        self.assertEqual((plan['direction'], plan['buckets'], plan['eta_s']), (None, 0, 0.0))
+
+    def test_measured_timing_overrides_configured(self):
+        measured = [None]
+        planner = RotationPlanner(10, seconds_per_bucket=0.5, measured=lambda: measured[0])
+        self.assertEqual(planner.plan(0, 4)['eta_s'], 2.0)
+        measured[0] = 1.25
+        self.assertEqual(planner.plan(0, 4)['eta_s'], 5.0)
+        self.assertIsNone(RotationPlanner(10).plan(0, 4)['eta_s'])
+
+    def test_validation_uses_bucket_count(self):
+        planner = RotationPlanner.from_config({"bucket_count": 16})
+        planner.validate(15)
+        with self.assertRaises(ValueError):
+            planner.validate(16)
+        with self.assertRaises(ValueError):
+            RotationPlanner(0)
+
+    def test_move_response_and_api_range(self):
+        manager = PLCManager([], fleet={'count': 1, 'bucket_count': 16, 'bucket_interval': 0.25,
+                                        'seed': 1})
+        try:
+            client = create_app(plc_manager=manager, enable_swagger=False).test_client()
+            response = client.post('/v1/machines/fleet_0/move', json={'position': 15})
+            self.assertEqual(response.status_code, 200)
+            plan = response.get_json()['data']['plan']
+            self.assertEqual(plan['to'], 15)
+            self.assertEqual(plan['seconds_per_bucket'], 0.25)
+            self.assertEqual(plan['eta_s'], plan['buckets'] * 0.25)
+            response = client.post('/v1/machines/fleet_0/move', json={'position': 16})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("entre 0 y 15", response.get_json()['error'])
+        finally:
+            manager.close_all_connections()
+
+    def controller(self, before, reply):
+        controller = CarouselController(ScriptedPLC(before, reply), planner=RotationPlanner(10))
+        controller.response_delay = 0
+        return controller
+
+    def test_plan_starts_from_position_before_move(self):
+        # La respuesta ya informa el primer cangilón recorrido
+        controller = self.controller({'status_code': STATUS_IDLE, 'position': 2},
+                                     {'status_code': STATUS_IDLE | BIT_RUN | BIT_NOT_READY,
+                                      'position': 3})
+        plan = controller.move_to_position(6)['plan']
+        self.assertEqual((plan['state'], plan['from'], plan['buckets']), ('planned', 2, 4))
+
+    def test_rejected_moves(self):
+        moving = STATUS_IDLE | BIT_RUN | BIT_NOT_READY
+        cases = [
+            ({'status_code': STATUS_IDLE | BIT_ALARM, 'position': 1},
+             {'status_code': STATUS_IDLE | BIT_ALARM, 'position': 1}, ["ALARMA"]),
+            ({'status_code': STATUS_IDLE | BIT_NOT_READY, 'position': 1},
+             {'status_code': STATUS_IDLE | BIT_NOT_READY, 'position': 1}, ["NO_LISTO"]),
+            ({'status_code': moving, 'position': 1}, {'status_code': moving, 'position': 2},
+             ["EN_MOVIMIENTO"]),
+        ]
+        for before, reply, reasons in cases:
+            plan = self.controller(before, reply).move_to_position(6)['plan']
+            self.assertEqual(plan['state'], 'rejected')
+            self.assertEqual(plan['reasons'], reasons)
+            self.assertEqual(plan['from'], 1)
+            self.assertIsNone(plan['eta_s'])
+
+    def test_same_target_while_moving_is_planned(self):
+        controller = self.controller({'status_code': STATUS_IDLE, 'position': 1},
+                                     {'status_code': STATUS_IDLE | BIT_RUN | BIT_NOT_READY,
+                                      'position': 1})
+        controller.move_to_position(6)
+        controller.plc.before = {'status_code': STATUS_IDLE | BIT_RUN | BIT_NOT_READY,
+                                 'position': 3}
+        self.assertEqual(controller.move_to_position(6)['plan']['state'], 'planned')
+        self.assertEqual(controller.move_to_position(8)['plan']['reasons'], ["EN_MOVIMIENTO"])
+
+    def test_moving_target_cleared_when_run_drops(self):
+        moving = STATUS_IDLE | BIT_RUN | BIT_NOT_READY
+        controller = self.controller({'status_code': STATUS_IDLE, 'position': 1},
+                                     {'status_code': moving, 'position': 1})
+        controller.move_to_position(6)
+        self.assertEqual(controller.moving_target, 6)
+        # El movimiento termina: una lectura con RUN=0 olvida el destino
+        controller.plc.reply = {'status_code': STATUS_IDLE, 'position': 6}
+        controller.get_current_status()
+        self.assertIsNone(controller.moving_target)
+        # Otro movimiento (p. ej. desde el HMI) en curso: volver a pedir 6 se rechaza
+        controller.plc.before = {'status_code': moving, 'position': 8}
+        controller.plc.reply = {'status_code': moving, 'position': 8}
+        plan = controller.move_to_position(6)['plan']
+        self.assertEqual(plan['reasons'], ["EN_MOVIMIENTO"])
+        self.assertIsNone(controller.moving_target)
+
+    def test_fleet_move_while_running_is_rejected(self):
+        manager = PLCManager([], fleet={'count': 1, 'bucket_interval': 5.0, 'seed': 1})
+        try:
+            client = create_app(plc_manager=manager, enable_swagger=False).test_client()
+            start = manager.controllers['fleet_0'].plc.get_current_status()['position']
+            target = (start + 3) % 10
+            plan = client.post('/v1/machines/fleet_0/move',
+                               json={'position': target}).get_json()['data']['plan']
+            self.assertEqual((plan['state'], plan['from'], plan['buckets']), ('planned', start, 3))
+            response = client.post('/v1/machines/fleet_0/move', json={'position': (start + 5) % 10})
+            self.assertEqual(response.status_code, 409)
+            body = response.get_json()
+            self.assertFalse(body['success'])
+            self.assertEqual(body['code'], 'PLC_BUSY')
+            self.assertIn("EN_MOVIMIENTO", body['error'])
+            self.assertEqual(body['data']['plan']['state'], 'rejected')
+        finally:
+            manager.close_all_connections()
+
+    def test_fleet_move_with_fault_is_bad_command(self):
+        manager = PLCManager([], fleet={'count': 1, 'seed': 1})
+        try:
+            manager.fleet.status[0] |= BIT_ALARM
+            client = create_app(plc_manager=manager, enable_swagger=False).test_client()
+            response = client.post('/v1/machines/fleet_0/move', json={'position': 3})
+            self.assertEqual(response.status_code, 409)
+            body = response.get_json()
+            self.assertEqual((body['success'], body['code']), (False, 'BAD_COMMAND'))
+            self.assertIn("ALARMA", body['error'])
+        finally:
+            manager.close_all_connections()
+
+
+if __name__ == '__main__':
+    unittest.main()
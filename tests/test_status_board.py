@@ -0,0 +1,70 @@
+import unittest
+import uuid
+from models.status_board import StatusBoard, FLAG_COMM_ERROR
+
+
+class TestStatusBoard(unittest.TestCase):
+    def setUp(self):
+        self.name = f"csb_test_{uuid.uuid4().hex[:8]}"
+        self.board = StatusBoard.create(self.name, slots=4)
+        self.reader = StatusBoard.attach(self.name)
+
+    def tearDown(self):
+        self.reader.close()
+        self.board.close()
+
+    def test_publish_and_read(self):
+        self.board.publish('machine_1', 20, 7, timestamp=123.5)
+        record = self.reader.read('machine_1')
+        self.assertEqual(record['raw_status'], 20)
+        self.assertEqual(record['position'], 7)
+        self.assertEqual(record['flags'], 0)
+        self.assertEqual(record['timestamp'], 123.5)
+        self.assertEqual(record['sequence'], 1)
+
+    def test_unknown_machine(self):
+        self.assertIsNone(self.reader.read('no_existe'))
+
+    def test_error_keeps_last_state(self):
+        self.board.publish_status('machine_1', {'status_code': 5, 'position': 3})
+        self.board.publish_status('machine_1', {'error': 'timeout'})
+        record = self.reader.read('machine_1')
+        self.assertEqual(record['raw_status'], 5)
+        self.assertEqual(record['position'], 3)
+        self.assertTrue(record['flags'] & FLAG_COMM_ERROR)
+        self.assertEqual(record['sequence'], 2)
+
+    def test_board_sized_for_large_fleet(self):
+        name = f"csb_test_{uuid.uuid4().hex[:8]}"
+        board = StatusBoard.create(name, slots=1250)
+        try:
+            for index in range(1000):
+                board.publish(f'fleet_{index}', 20, index % 10)
+            self.assertEqual(len(board.read_all()), 1000)
+        finally:
+            board.close()
+        with self.assertRaises(ValueError):
+            StatusBoard.create(name, slots=0x10000)
+
+    def test_read_all(self):
+        self.board.publish('a', 1, 1)
+        self.board.publish('b', 2, 2)
+        self.assertEqual(set(self.reader.read_all()), {'a', 'b'})
+
+    def test_long_machine_id_is_rejected(self):
+        long_id = 'carrusel_' + 'x' * 30
+        with self.assertRaises(ValueError):
+            self.board.publish(long_id, 20, 1)
+        self.board.publish('x' * 32, 20, 1)
+        self.assertEqual(self.reader.read('x' * 32)['position'], 1)
+        self.assertEqual(set(self.reader.read_all()), {'x' * 32})
+
+    def test_board_full(self):
+        for i in range(4):
+            self.board.publish(f'm{i}', 0, 0)
+        with self.assertRaises(RuntimeError):
+            self.board.publish('m4', 0, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+from api import create_app
+from models.plc_manager import PLCManager
+from models.status_history import DEFAULT_SEGMENT_CAPACITY, HistorySegment, StatusHistory
+
+
+class TestStatusHistory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_change_only_encoding_and_range(self):
+        history = StatusHistory()
+        for ts, raw, position in [(0, 20, 0), (1, 20, 0), (2, 22, 0), (3, 22, 1),
+                                  (4, 22, 1), (5, 20, 3)]:
+            history.record("m1", ts, raw, position)
+        result = history.query("m1", 2.5, 10)
+        self.assertEqual(result['initial'], {'ts': 2, 'raw_status': 22, 'position': 0})
+        self.assertEqual([(p['ts'], p['position']) for p in result['points']], [(3, 1), (5, 3)])
+        self.assertEqual(history.query("m1", 0, 10)['count'], 4)
+
+    def test_downsampling(self):
+        history = StatusHistory(max_points=100)
+        for i in range(60):
+            history.record("m1", i, 20, i % 10)
+        result = history.query("m1", 0, 60, resolution=10)
+        self.assertEqual(result['count'], 6)
+        self.assertEqual(result['points'][1],
+                         {'ts': 10, 'raw_status': 20, 'position': 9, 'changes': 10})
+        # Sin resolución, más transiciones que max_points se agrupan automáticamente
+        history.max_points = 12
+        self.assertEqual(history.query("m1", 0, 60)['resolution'], 5)
+
+    def test_segment_survives_reopen_and_serves_old_ranges(self):
+        history = StatusHistory(self.tmp.name, ring_size=4, segment_capacity=16)
+        for i in range(20):
+            history.record("fleet/1", i, 20, i % 10)
+        history.close()
+        reopened = StatusHistory(self.tmp.name, ring_size=4)
+        self.assertFalse(reopened.record("fleet/1", 20, 20, 19 % 10))  # sin cambio
+        old = reopened.query("fleet/1", 5, 8)
+        self.assertEqual([p['ts'] for p in old['points']], [5, 6, 7])
+        self.assertEqual(old['initial']['ts'], 4)  # Los 4 primeros se sobrescribieron
+        self.assertIsNone(reopened.query("fleet/1", 0, 4)['initial'])
+        reopened.close()
+        segment = HistorySegment(os.path.join(self.tmp.name, "fleet_1.hist"))
+        self.assertEqual((segment.capacity, len(segment), segment.total), (16, 16, 20))
+        segment.close()
+
+    def test_window_starting_at_oldest_ring_point(self):
+        history = StatusHistory(self.tmp.name, ring_size=4)
+        for i in range(8):
+            history.record("m1", i, 20, i)
+        oldest = history._series_for("m1").ring[0][0]
+        result = history.query("m1", oldest, oldest + 2)
+        # El estado vigente antes de la ventana sigue en el segmento
+        self.assertEqual(result['initial']['ts'], oldest - 1)
+        self.assertEqual([p['ts'] for p in result['points']], [oldest, oldest + 1])
+        history.close()
+
+    def test_memory_only_machines_have_no_segment(self):
+        history = StatusHistory.from_config(self.tmp.name, memory_only=["fleet_0"])
+        history.record("fleet_0", 1, 20, 1)
+        history.record("m1", 1, 20, 1)
+        self.assertEqual(history.query("fleet_0", 0, 2)['count'], 1)
+        history.close()
+        self.assertEqual(os.listdir(self.tmp.name), ["m1.hist"])
+        self.assertEqual(os.path.getsize(os.path.join(self.tmp.name, "m1.hist")),
+                         32 + 12 * DEFAULT_SEGMENT_CAPACITY)
+
+    def test_api_history(self):
+        history = StatusHistory()
+        manager = PLCManager([], fleet={'count': 2, 'seed': 1})
+        try:
+            client = create_app(plc_manager=manager, enable_swagger=False,
+                                status_history=history).test_client()
+            history.record_status("fleet_0", {'raw_status': 20, 'position': 1}, 100.0)
+            history.record_status("fleet_0", {'raw_status': 22, 'position': 2}, 130.0)
+            response = client.get('/v1/machines/fleet_0/history?from=110&to=200')
+            data = response.get_json()['data']
+            self.assertEqual(data['initial']['position'], 1)
+            self.assertEqual(data['points'], [{'ts': 130.0, 'raw_status': 22, 'position': 2}])
+            self.assertEqual(client.get('/v1/machines/nope/history').status_code, 404)
+            self.assertEqual(
+                client.get('/v1/machines/fleet_0/history?from=200&to=100').status_code, 400)
+        finally:
+            manager.close_all_connections()
+
+    def test_api_history_disabled(self):
+        manager = PLCManager([], fleet={'count': 1, 'seed': 1})
+        try:
+            client = create_app(plc_manager=manager, enable_swagger=False).test_client()
+            response = client.get('/v1/machines/fleet_0/history')
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.get_json()['code'], 'FEATURE_DISABLED')
+        finally:
+            manager.close_all_connections()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import json
+import os
+import tempfile
+import unittest
+from api import create_app
+from commons import tracing
+from models.plc_manager import PLCManager
+
+
+class TestTracing(unittest.TestCase):
+    def tearDown(self):
+        tracing.configure(enabled=False, export_path="")
+
+    def test_disabled_spans_are_noop(self):
+        tracing.configure(enabled=False, export_path="")
+        self.assertIsNone(tracing.start_trace("GET /x"))
+        with tracing.span("plc.send") as first, tracing.span("plc.receive") as second:
+            self.assertIs(first, second)
+
+    def test_nested_spans_and_server_timing(self):
+        tracing.configure(enabled=True, export_path="")
+        trace = tracing.start_trace("GET /x")
+        with tracing.span("manager.lock_wait"):
+            pass
+        with tracing.span("controller.status_before"):
+            with tracing.span("plc.send"):
+                pass
+        with tracing.span("plc.send"):
+            pass
+        self.assertIs(tracing.finish_trace(), trace)
+        self.assertIsNone(tracing.current_trace())
+        spans = trace.to_dict()["spans"]
+        self.assertEqual(spans[2]["parent"], 1)
+        self.assertIsNone(spans[3]["parent"])
+        header = trace.server_timing()
+        self.assertEqual([part.split(";")[0] for part in header.split(", ")],
+                         ["manager.lock_wait", "controller.status_before", "plc.send", "total"])
+
+    def test_api_server_timing_and_jsonl_export(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "traces.jsonl")
+            tracing.configure(enabled=True, export_path=path)
+            manager = PLCManager([], fleet={'count': 2, 'seed': 1})
+            try:
+                client = create_app(plc_manager=manager, enable_swagger=False).test_client()
+                response = client.get('/v1/machines/fleet_0/status')
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("manager.lock_wait;dur=", response.headers["Server-Timing"])
+                self.assertIn("total;dur=", response.headers["Server-Timing"])
+            finally:
+                manager.close_all_connections()
+            tracing.flush()
+            with open(path, encoding="utf-8") as f:
+                record = json.loads(f.readline())
+            self.assertEqual(record["name"], "GET /v1/machines/<machine_id>/status")
+            self.assertEqual(record["attributes"]["status"], 200)
+            self.assertIn("controller.response_delay",
+                          [span["name"] for span in record["spans"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
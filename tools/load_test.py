@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Generador de carga para la API REST y el servidor WebSocket.
+
+Proyecto: Sistema de Control de Carrusel Industrial
+Cliente: Industrias Pico S.A.S
+Desarrollo: IA Punto: Soluciones Tecnológicas
+
+Creado: 2025-07-28
+Última modificación: 2025-07-28
+
+Uso:
+    python tools/load_test.py [--machines 20] [--duration 20] [--concurrency 16]
+        [--mix status=0.95,move=0.05] [--ws-clients 50] [--latency 0.005]
+        [--output resultados.json]
+
+Este script:
+1. Arranca en este proceso el servidor TCP simulado (models.plc_tcp_simulator)
+   con N carruseles, de modo que el backend usa el cliente `PLC` real
+2. Escribe una configuración multi-PLC en un directorio temporal y lanza
+   `main.py --headless` (y `start_websocket_server.py` si hay clientes WS)
+3. Durante --duration segundos ejecuta --concurrency hilos HTTP con conexiones
+   persistentes según la mezcla de consultas de estado y movimientos, y
+   mantiene --ws-clients suscriptores WebSocket midiendo ping/pong
+4. Imprime (y opcionalmente guarda) un JSON con throughput, p50/p95/p99,
+   tasas de error e intercambios PLC por segundo, junto con el commit medido
+   para comparar regresiones entre commits
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from models.plc_tcp_simulator import PLCTCPSimulatorServer  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _free_port_block(count: int) -> int:
+    """Busca un bloque de puertos consecutivos libres para los carruseles."""
+    for _ in range(50):
+        base = random.randint(20000, 60000 - count)
+        sockets = []
+        try:
+            for port in range(base, base + count):
+                s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sockets.append(s)
+                s.bind(("127.0.0.1", port))
+            return base
+        except OSError:
+            continue
+        finally:
+            for s in sockets:
+                s.close()
+    raise RuntimeError("No se encontró un bloque de puertos libres")
+
+
+def percentile(samples: List[float], p: float) -> float:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], errors: int, duration: float) -> Dict:
+    """Resumen de una serie de latencias en segundos."""
+    total = len(latencies) + errors
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 2)
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "throughput_rps": round(len(latencies) / duration, 1) if duration else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(max(latencies) if latencies else None),
+    }
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("status", "move"):
+            raise argparse.ArgumentTypeError(f"Operación desconocida en la mezcla: {name}")
+        mix[name.strip()] = float(weight)
+    if sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("La mezcla debe tener algún peso positivo")
+    return mix
+
+
+def wait_for_port(port: int, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"El proceso terminó con código {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"El puerto {port} no respondió en {timeout} s")
+
+
+class HTTPWorker(threading.Thread):
+    """Hilo que ejecuta peticiones en bucle cerrado sobre una conexión persistente."""
+
+    def __init__(self, port: int, machine_ids: List[str], mix: Dict[str, float],
+                 stop_at: float, seed: int):
+        super().__init__(daemon=True)
+        self.port = port
+        self.machine_ids = machine_ids
+        self.operations = list(mix)
+        self.weights = [mix[op] for op in self.operations]
+        self.stop_at = stop_at
+        self.rng = random.Random(seed)
+        self.latencies: Dict[str, List[float]] = {op: [] for op in self.operations}
+        self.errors: Dict[str, int] = {op: 0 for op in self.operations}
+        self.status_codes: Dict[int, int] = {}
+
+    def _request(self, connection, operation: str, machine_id: str):
+        if operation == "status":
+            connection.request("GET", f"/v1/machines/{machine_id}/status")
+        else:
+            body = json.dumps({"position": self.rng.randrange(10)})
+            connection.request("POST", f"/v1/machines/{machine_id}/move", body=body,
+                               headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        response.read()
+        return response.status
+
+    def run(self):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+        while time.monotonic() < self.stop_at:
+            operation = self.rng.choices(self.operations, self.weights)[0]
+            machine_id = self.rng.choice(self.machine_ids)
+            start = time.perf_counter()
+            try:
+                status = self._request(connection, operation, machine_id)
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+                self.errors[operation] += 1
+                continue
+            elapsed = time.perf_counter() - start
+            self.status_codes[status] = self.status_codes.get(status, 0) + 1
+            if status == 200:
+                self.latencies[operation].append(elapsed)
+            else:
+                self.errors[operation] += 1
+        connection.close()
+
+
+async def _ws_client(port: int, stop_at: float, ping_interval: float, results: Dict):
+    import websockets
+    start = time.perf_counter()
+    try:
+        async with websockets.connect(f"ws://127.0.0.1:{port}", max_size=None,
+                                      open_timeout=10) as websocket:
+            results["connect_latencies"].append(time.perf_counter() - start)
+            await websocket.send(json.dumps({"type": "subscribe",
+                                             "subscription_type": "status_updates"}))
+            ping_sent = None
+            next_ping = time.monotonic()
+            while time.monotonic() < stop_at:
+                if ping_sent is None and time.monotonic() >= next_ping:
+                    ping_sent = time.perf_counter()
+                    await websocket.send(json.dumps({"type": "ping"}))
+                try:
+                    message = await asyncio.wait_for(
+                        websocket.recv(), timeout=max(0.01, min(stop_at, next_ping + ping_interval) - time.monotonic()))
+                except asyncio.TimeoutError:
+                    continue
+                results["messages"] += 1
+                results["bytes"] += len(message)
+                if ping_sent is not None and '"pong"' in message:
+                    results["ping_latencies"].append(time.perf_counter() - ping_sent)
+                    ping_sent = None
+                    next_ping = time.monotonic() + ping_interval
+    except Exception as e:
+        results["errors"] += 1
+        results["last_error"] = str(e)
+
+
+def run_ws_clients(port: int, clients: int, stop_at: float, ping_interval: float) -> Dict:
+    results = {"connect_latencies": [], "ping_latencies": [], "messages": 0,
+               "bytes": 0, "errors": 0, "last_error": None}
+
+    async def main():
+        await asyncio.gather(*[
+            _ws_client(port, stop_at, ping_interval, results) for _ in range(clients)])
+    asyncio.run(main())
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_load_test(args) -> Dict:
+    base_port = _free_port_block(args.machines)
+    simulator = PLCTCPSimulatorServer(
+        base_port, args.machines, latency=args.latency, jitter=args.jitter,
+        bucket_interval=args.bucket_interval, seed=args.seed).start_in_thread()
+    api_port = _free_port()
+    ws_port = _free_port()
+    processes = []
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            machines = simulator.machine_configs()
+            with open(os.path.join(work_dir, "config_multi_plc.json"), "w",
+                      encoding="utf-8") as f:
+                json.dump({"api_config": {"port": api_port, "swagger_enabled": False,
+                                          "plc_transport": args.transport},
+                           "plc_machines": machines}, f)
+            env = dict(os.environ)
+            env.setdefault("LOCALAPPDATA", work_dir)
+            env["API_SWAGGER_ENABLED"] = "0"
+            backend = subprocess.Popen(
+                [sys.executable, os.path.join(ROOT_DIR, "main.py"), "--headless"],
+                cwd=work_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            processes.append(backend)
+            wait_for_port(api_port, backend)
+            if args.ws_clients:
+                ws_server = subprocess.Popen(
+                    [sys.executable, os.path.join(ROOT_DIR, "start_websocket_server.py"),
+                     "--host", "127.0.0.1", "--port", str(ws_port), "--log-level", "WARNING"],
+                    cwd=work_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                processes.append(ws_server)
+                wait_for_port(ws_port, ws_server)
+
+            # Calentamiento: primera conexión de cada PLC fuera de la medición
+            time.sleep(args.warmup)
+            exchanges_before = sum(c.exchanges for c in simulator.carousels)
+            started = time.monotonic()
+            stop_at = started + args.duration
+            machine_ids = [m["id"] for m in machines]
+            workers = [HTTPWorker(api_port, machine_ids, args.mix, stop_at, args.seed + i)
+                       for i in range(args.concurrency)]
+            for worker in workers:
+                worker.start()
+            ws_results = None
+            if args.ws_clients:
+                ws_results = run_ws_clients(ws_port, args.ws_clients, stop_at,
+                                            args.ws_ping_interval)
+            for worker in workers:
+                worker.join()
+            duration = time.monotonic() - started
+            exchanges = sum(c.exchanges for c in simulator.carousels) - exchanges_before
+    finally:
+        for process in processes:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        simulator.stop()
+
+    http_report = {}
+    all_latencies, all_errors = [], 0
+    status_codes: Dict[str, int] = {}
+    for operation in args.mix:
+        latencies = [x for w in workers for x in w.latencies[operation]]
+        errors = sum(w.errors[operation] for w in workers)
+        http_report[operation] = summarize(latencies, errors, duration)
+        all_latencies += latencies
+        all_errors += errors
+    for worker in workers:
+        for code, count in worker.status_codes.items():
+            status_codes[str(code)] = status_codes.get(str(code), 0) + count
+    http_report["total"] = summarize(all_latencies, all_errors, duration)
+    http_report["status_codes"] = status_codes
+
+    report = {
+        "commit": git_commit(),
+        "config": {
+            "machines": args.machines, "duration_s": args.duration,
+            "concurrency": args.concurrency, "mix": args.mix,
+            "ws_clients": args.ws_clients, "plc_latency_s": args.latency,
+            "plc_jitter_s": args.jitter, "transport": args.transport, "seed": args.seed
+        },
+        "http": http_report,
+        "plc": {
+            "exchanges": exchanges,
+            "exchanges_per_s": round(exchanges / duration, 1) if duration else 0.0
+        }
+    }
+    if ws_results is not None:
+        connected = len(ws_results["connect_latencies"])
+        report["websocket"] = {
+            "clients": args.ws_clients,
+            "connected": connected,
+            "errors": ws_results["errors"],
+            "last_error": ws_results["last_error"],
+            "messages": ws_results["messages"],
+            "messages_per_s": round(ws_results["messages"] / duration, 1),
+            "bytes_per_s": round(ws_results["bytes"] / duration, 1),
+            "connect": summarize(ws_results["connect_latencies"], 0, duration),
+            "ping": summarize(ws_results["ping_latencies"], 0, duration),
+        }
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Prueba de carga de la API REST y del servidor WebSocket")
+    parser.add_argument("--machines", type=int, default=20,
+                        help="Carruseles simulados (default: 20)")
+    parser.add_argument("--duration", type=float, default=20.0,
+                        help="Segundos de medición (default: 20)")
+    parser.add_argument("--warmup", type=float, default=2.0,
+                        help="Segundos de calentamiento antes de medir (default: 2)")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="Hilos HTTP en bucle cerrado (default: 16)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("status=0.95,move=0.05"),
+                        help="Mezcla de operaciones, p. ej. status=0.9,move=0.1")
+    parser.add_argument("--ws-clients", type=int, default=0,
+                        help="Suscriptores WebSocket simultáneos (default: 0)")
+    parser.add_argument("--ws-ping-interval", type=float, default=1.0,
+                        help="Segundos entre ping de cada cliente WS (default: 1)")
+    parser.add_argument("--latency", type=float, default=0.005,
+                        help="Latencia simulada del PLC en segundos (default: 0.005)")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Jitter simulado del PLC en segundos (default: 0)")
+    parser.add_argument("--bucket-interval", type=float, default=0.5,
+                        help="Segundos por cangilón en los movimientos (default: 0.5)")
+    parser.add_argument("--transport", choices=("blocking", "reactor"), default="blocking",
+                        help="Transporte de PLC del backend (default: blocking)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", metavar="PATH",
+                        help="Guarda el informe JSON en este archivo")
+    return parser.parse_args(argv)
+
+
+def main():
+    """Función principal."""
+    args = parse_args()
+    report = run_load_test(args)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque del backend headless.
+
+Proyecto: Sistema de Control de Carrusel Industrial
+Cliente: Industrias Pico S.A.S
+Desarrollo: IA Punto: Soluciones Tecnológicas
+
+Creado: 2025-07-28
+Última modificación: 2025-07-28
+
+Uso:
+    python tools/startup_benchmark.py [--runs 3] [--budget-ms 2500] [--import-budget-ms 400]
+
+Este script:
+1. Mide con `python -X importtime` el coste de importar `main` (debe ser bajo:
+   la GUI, eventlet, Swagger y el simulador se cargan de forma diferida)
+2. Lanza `main.py --headless` con un PLC simulado en un directorio temporal y
+   mide el time-to-first-request (primer 200 de /v1/health)
+3. Imprime un JSON con los resultados y termina con código 1 si se excede
+   alguno de los presupuestos
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr: str):
+    """
+    Parsea la salida de `-X importtime`.
+
+    Returns:
+        Lista de tuplas (módulo, self_us, cumulative_us) en orden de aparición.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            _, data = line.split(":", 1)
+            self_us, cumulative_us, module = data.split("|", 2)
+            entries.append((module.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return entries
+
+
+def measure_import(module: str = "main", top: int = 10):
+    """Mide el tiempo de importación de un módulo en un intérprete limpio."""
+    env = dict(os.environ)
+    env.setdefault("LOCALAPPDATA", tempfile.gettempdir())
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {module}: {result.stderr[-500:]}")
+    entries = parse_importtime(result.stderr)
+    total_us = next((c for m, _, c in entries if m == module), 0)
+    heaviest = sorted(entries, key=lambda e: e[2], reverse=True)[:top]
+    loaded = {m for m, _, _ in entries}
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 2),
+        "heaviest": [{"module": m, "cumulative_ms": round(c / 1000, 2)} for m, _, c in heaviest],
+        "gui_loaded": "tkinter" in loaded or "gui.main_gui" in loaded,
+        "eventlet_loaded": "eventlet" in loaded,
+        "flasgger_loaded": "flasgger" in loaded,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_first_request(timeout: float = 30.0, swagger: bool = False):
+    """
+    Arranca `main.py --headless` con PLC simulado y mide el tiempo hasta el
+    primer 200 de /v1/health.
+
+    Returns:
+        Milisegundos hasta la primera respuesta correcta.
+    """
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as work_dir:
+        with open(os.path.join(work_dir, "config.json"), "w", encoding="utf-8") as f:
+            json.dump({"ip": "127.0.0.1", "port": 3200,
+                       "simulator_enabled": True, "api_port": port}, f)
+        env = dict(os.environ)
+        env.setdefault("LOCALAPPDATA", work_dir)
+        env["API_SWAGGER_ENABLED"] = "1" if swagger else "0"
+        url = f"http://127.0.0.1:{port}/v1/health"
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT_DIR, "main.py"), "--headless"],
+            cwd=work_dir, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while time.perf_counter() - start < timeout:
+                if process.poll() is not None:
+                    raise RuntimeError(
+                        f"El backend terminó con código {process.returncode}")
+                try:
+                    with urllib.request.urlopen(url, timeout=1) as response:
+                        if response.status == 200:
+                            return (time.perf_counter() - start) * 1000
+                except OSError:
+                    time.sleep(0.01)
+            raise RuntimeError(f"El backend no respondió en {timeout} s")
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark de arranque del backend headless")
+    parser.add_argument("--runs", type=int, default=3,
+                        help="Repeticiones del time-to-first-request (default: 3)")
+    parser.add_argument("--budget-ms", type=float, default=2500.0,
+                        help="Presupuesto de time-to-first-request en ms (default: 2500)")
+    parser.add_argument("--import-budget-ms", type=float, default=400.0,
+                        help="Presupuesto de importación de main en ms (default: 400)")
+    parser.add_argument("--swagger", action="store_true",
+                        help="Incluye Swagger en el arranque medido")
+    args = parser.parse_args()
+
+    import_report = measure_import("main")
+    samples = [measure_first_request(swagger=args.swagger)
+               for _ in range(args.runs)]
+    best_ms = min(samples)
+
+    report = {
+        "import": import_report,
+        "time_to_first_request_ms": {
+            "samples": [round(s, 1) for s in samples],
+            "best": round(best_ms, 1),
+            "budget": args.budget_ms,
+        },
+        "import_budget_ms": args.import_budget_ms,
+    }
+    failures = []
+    if import_report["total_ms"] > args.import_budget_ms:
+        failures.append("import")
+    if import_report["gui_loaded"] or import_report["eventlet_loaded"]:
+        failures.append("lazy_imports")
+    if best_ms > args.budget_ms:
+        failures.append("time_to_first_request")
+    report["failures"] = failures
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
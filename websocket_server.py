@@ -21,6 +21,8 @@ import time
 from datetime import datetime
 from typing import Dict, Set, Optional, Any
 from commons.config_manager import ConfigManager
+from commons.metrics import BROADCAST_SECONDS, WEBSOCKET_CLIENTS
+from models.alarm_detector import ALARM_EVENT, AlarmDetector
 from models.plc_manager import PLCManager
 from models.plc import PLC
 from controllers.carousel_controller import CarouselController
@@ -46,6 +48,10 @@ class WebSocketServer:
         self.logger = logging.getLogger("websocket_server")
         self.running = False
         self.status_broadcast_task = None
+        # Clientes suscritos a "alarms" y detector de flancos sobre el broadcast de estado
+        self.alarm_subscribers: Set[websockets.WebSocketServerProtocol] = set()
+        self.alarm_detector = AlarmDetector()
+        WEBSOCKET_CLIENTS.labels("websocket").set_function(lambda: len(self.clients))
 
         # Configurar logging
         logging.basicConfig(
@@ -103,7 +109,8 @@ class WebSocketServer:
             "mode": "multi-plc" if self.is_multi_plc else "single-plc",
             "server_info": {
                 "version": "1.0.0",
-                "capabilities": ["status_updates", "command_execution", "real_time_notifications"]
+                "capabilities": ["status_updates", "command_execution", "real_time_notifications",
+                                 "alarms"]
             }
         }
 
@@ -115,19 +122,23 @@ class WebSocketServer:
     async def unregister_client(self, websocket: websockets.WebSocketServerProtocol):
         """Desregistra un cliente WebSocket."""
         self.clients.discard(websocket)
+        self.alarm_subscribers.discard(websocket)
         client_info = f"{websocket.remote_address[0]}:{websocket.remote_address[1]}"
         self.logger.info(
             f"Cliente WebSocket desconectado: {client_info} - Total clientes: {len(self.clients)}")
 
-    async def broadcast_message(self, message: Dict[str, Any]):
-        """Envía un mensaje a todos los clientes conectados."""
-        if not self.clients:
+    async def broadcast_message(self, message: Dict[str, Any],
+                                clients: Optional[Set[websockets.WebSocketServerProtocol]] = None):
+        """Envía un mensaje a todos los clientes conectados (o a `clients`)."""
+        targets = self.clients if clients is None else clients
+        if not targets:
             return
 
+        started = time.perf_counter()
         message_json = json.dumps(message)
         disconnected_clients = set()
 
-        for client in self.clients.copy():
+        for client in targets.copy():
             try:
                 await client.send(message_json)
             except websockets.exceptions.ConnectionClosed:
@@ -139,6 +150,8 @@ class WebSocketServer:
         # Limpiar clientes desconectados
         for client in disconnected_clients:
             self.clients.discard(client)
+            self.alarm_subscribers.discard(client)
+        BROADCAST_SECONDS.labels("websocket").observe(time.perf_counter() - started)
 
     async def handle_client_message(self, websocket: websockets.WebSocketServerProtocol, message: str):
         """Maneja mensajes recibidos de clientes WebSocket."""
@@ -321,9 +334,25 @@ class WebSocketServer:
             "subscription_type": subscription_type,
             "timestamp": datetime.now().isoformat()
         }
+        if subscription_type == "alarms":
+            # Solo estos clientes reciben mensajes plc_alarm; se envían las ya activas
+            self.alarm_subscribers.add(websocket)
+            response["active_alarms"] = self.alarm_detector.active()
 
         await websocket.send(json.dumps(response))
 
+    def detect_alarms(self, all_status: Dict[str, Dict[str, Any]]):
+        """Pasa las lecturas correctas por el detector y devuelve los eventos de alarma."""
+        now = time.time()
+        events = []
+        for machine_id, status in all_status.items():
+            if isinstance(status, dict) and "error" not in status:
+                raw = status.get("raw_status", status.get("status_code"))
+                if raw is not None:
+                    events += self.alarm_detector.observe(
+                        machine_id, raw, status.get("position"), now)
+        return events
+
     async def status_broadcast_loop(self):
         """Loop para broadcast periódico de estado."""
         while self.running:
@@ -347,6 +376,7 @@ class WebSocketServer:
                             "status": all_status,
                             "timestamp": datetime.now().isoformat()
                         }
+                        alarm_events = self.detect_alarms(all_status)
                     else:
                         # Broadcast estado single-PLC
                         status = self.carousel_controller.get_current_status()
@@ -355,8 +385,12 @@ class WebSocketServer:
                             "status": status,
                             "timestamp": datetime.now().isoformat()
                         }
+                        alarm_events = self.detect_alarms({"single_plc": status})
 
                     await self.broadcast_message(broadcast_msg)
+                    for event in alarm_events:
+                        await self.broadcast_message(
+                            {"type": ALARM_EVENT, **event}, self.alarm_subscribers)
 
                 # Esperar 2 segundos antes del próximo broadcast
                 await asyncio.sleep(2)